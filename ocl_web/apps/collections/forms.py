@@ -6,7 +6,7 @@ from django import forms
 
 from libs.ocl import OclApi
 
-from apps.core.views import _get_collection_type_list, _get_locale_list, _get_custom_validation_schema_list
+from apps.core.views import _get_collection_type_list, _get_custom_validation_schema_list
 from apps.core.fields import ComboBoxWidget, MultipleInputWidget
 
 
@@ -16,9 +16,9 @@ class CollectionCreateForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super(CollectionCreateForm, self).__init__(*args, **kwargs)
         # create widgets here to delay calls to api until initialization of the form
-        self.fields['collection_type'].widget=ComboBoxWidget(data_list=[v for v in _get_collection_type_list()], name="collection_type_list")
-        self.fields['default_locale'].widget=ComboBoxWidget(data_list=[[l['code'], l['name']] for l in _get_locale_list()], name="default_locale_list")
-        self.fields['supported_locales'].widget=MultipleInputWidget(data_list=[l['name'] for l in _get_locale_list()], name="supported_locale_list")
+        self.fields['collection_type'].widget=ComboBoxWidget(option_list='collection_types', name="collection_type_list")
+        self.fields['default_locale'].widget=ComboBoxWidget(option_list='locales', name="default_locale_list")
+        self.fields['supported_locales'].widget=MultipleInputWidget(option_list='locale_names', name="supported_locale_list")
 
     required_css_class = 'required'
 
@@ -538,3 +538,48 @@ class CollectionVersionEditJsonViewTest(TestCase):
         }
         collectionVersionEditView.put(fake_request)
         self.assertTrue(mock_update_resource_version.called)
+
+
+class AllCollectionsForUserCacheTest(TestCase):
+    def setUp(self):
+        OclApi.invalidate_collections_for_user('tempuser')
+        OclApi.invalidate_collections_for_user('otheruser')
+
+    def tearDown(self):
+        OclApi.invalidate_collections_for_user('tempuser')
+        OclApi.invalidate_collections_for_user('otheruser')
+
+    @patch('libs.ocl.OclApi.get')
+    def test_collections_cached_until_invalidated(self, mock_get):
+        colResponse = MagicMock(spec=Response, status_code=200)
+        colResponse.json.return_value = [{'id': 'mycolid', 'owner': 'tempuser'}]
+        mock_get.return_value = colResponse
+        api = OclApi(FakeRequest())
+
+        self.assertEquals(api.get_all_collections_for_user('tempuser'), colResponse.json.return_value)
+        self.assertEquals(api.get_all_collections_for_user('tempuser'), colResponse.json.return_value)
+        self.assertEquals(mock_get.call_count, 1)
+
+        OclApi.invalidate_collections_for_user('tempuser')
+        api.get_all_collections_for_user('tempuser')
+        self.assertEquals(mock_get.call_count, 2)
+
+    @patch('libs.ocl.OclApi.get')
+    def test_other_user_collections_not_cached(self, mock_get):
+        ownResponse = MagicMock(spec=Response, status_code=200)
+        ownResponse.json.return_value = [{'id': 'owncol', 'owner': 'otheruser'}]
+        staffResponse = MagicMock(spec=Response, status_code=200)
+        staffResponse.json.return_value = [{'id': 'staffcol', 'owner': 'tempuser'}]
+        mock_get.side_effect = [ownResponse, staffResponse, staffResponse]
+        other_request = FakeRequest()
+        other_request.user = MyDict('otheruser')
+        own_api = OclApi(other_request)
+        staff_api = OclApi(FakeRequest())
+
+        self.assertEquals(own_api.get_all_collections_for_user('otheruser'), ownResponse.json.return_value)
+        # Staff (tempuser) listing otheruser's collections: neither served nor cached
+        self.assertEquals(staff_api.get_all_collections_for_user('otheruser'), staffResponse.json.return_value)
+        self.assertEquals(staff_api.get_all_collections_for_user('otheruser'), staffResponse.json.return_value)
+        self.assertEquals(mock_get.call_count, 3)
+        self.assertEquals(own_api.get_all_collections_for_user('otheruser'), ownResponse.json.return_value)
+        self.assertEquals(mock_get.call_count, 3)
@@ -3,6 +3,7 @@ OCL Collection views
 """
 import logging
 import re
+from functools import partial
 from urllib import urlencode
 
 import requests
@@ -12,11 +13,10 @@ from django.http import HttpResponseBadRequest
 from apps.collections.validation_messages import POSTED_HEAD_VERSION_OF_SOURCE, POSTED_NON_HEAD_VERSION_OF_SOURCE, \
     ENTERED_WITH_VERSION_NUMBER_FOR_CONCEPT, ENTERED_WITH_VERSION_NUMBER_FOR_MAPPING, \
     ENTERED_WITHOUT_VERSION_NUMBER_FOR_CONCEPT, ENTERED_WITHOUT_VERSION_NUMBER_FOR_MAPPING, EXPRESSIONS_SHOULD_EXIST
-from apps.core.utils import SearchStringFormatter
-from apps.core.views import UserOrOrgMixin
+from apps.core.utils import SearchStringFormatter, CountPaginator
+from apps.core.views import UserOrOrgMixin, RepoVersionSelectorMixin
 from braces.views import LoginRequiredMixin
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.core.urlresolvers import reverse
 from django.http import HttpResponse
 from django.http import (HttpResponseRedirect, Http404)
@@ -31,19 +31,19 @@ from .forms import (CollectionCreateForm, CollectionEditForm,
 logger = logging.getLogger('oclweb')
 
 
-class CollectionsBaseView(UserOrOrgMixin):
+class CollectionsBaseView(RepoVersionSelectorMixin, UserOrOrgMixin):
     def get_args(self):
         super(CollectionsBaseView, self).get_args()
         self.collection_id = self.kwargs.get('collection')
         self.collection_version_id = self.kwargs.get('collection_version')
 
     def get_collection_data(self, owner_type, owner_id, collection_id, field_name,
-                            collection_version_id=None, search_params=None):
+                            collection_version_id=None, search_params=None, api_client=None):
 
         searcher = OclSearch(search_type=field_name,
                              search_scope=OclConstants.SEARCH_SCOPE_RESTRICTED,
                              params=search_params)
-        api = OclApi(self.request, debug=True, facets=True)
+        api = api_client or OclApi(self.request, debug=True, facets=True)
 
         if collection_version_id:
             search_response = api.get(
@@ -66,13 +66,14 @@ class CollectionsBaseView(UserOrOrgMixin):
 
         return searcher
 
-    def get_collection_versions(self, owner_type, owner_id, collection_id, search_params=None):
+    def get_collection_versions(self, owner_type, owner_id, collection_id, search_params=None,
+                                api_client=None):
         # Perform the search
         searcher = OclSearch(search_type=OclConstants.RESOURCE_NAME_COLLECTION_VERSIONS,
                              search_scope=OclConstants.SEARCH_SCOPE_RESTRICTED,
                              params=search_params)
 
-        api = OclApi(self.request, debug=True, facets=False)
+        api = api_client or OclApi(self.request, debug=True, facets=False)
         search_response = api.get(owner_type, owner_id, 'collections', collection_id, 'versions',
                                   params=searcher.search_params)
 
@@ -98,16 +99,7 @@ class CollectionReferencesView(CollectionsBaseView, TemplateView):
         self.get_args()
 
         api = OclApi(self.request, debug=True)
-        results = api.get(self.owner_type, self.owner_id, 'collections', self.collection_id)
-        collection = results.json()
-
-        params = self.request.GET.copy()
-        params['verbose'] = 'true'
-        params['limit'] = '10'
-
-        versions = self.get_collection_versions(
-            self.owner_type, self.owner_id, self.collection_id,
-            search_params={'limit': '0'})
+        facets_api = OclApi(self.request, debug=True, facets=True)
 
         # Load the references in this collection, applying search parameters
         original_search_string = self.request.GET.get('q', '')
@@ -115,11 +107,19 @@ class CollectionReferencesView(CollectionsBaseView, TemplateView):
         params = self.request.GET.copy()
         params['verbose'] = 'true'
         params['limit'] = '10'
-        searcher = self.get_collection_data(
-            self.owner_type, self.owner_id, self.collection_id, 'references',
-            collection_version_id=self.collection_version_id,
-            search_params=params)
-        search_results_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+
+        # Load the collection, its recent versions and its references concurrently
+        results, (versions, more_versions), searcher = OclApi.gather(
+            partial(api.get, self.owner_type, self.owner_id, 'collections', self.collection_id),
+            partial(self.get_version_selector,
+                    self.owner_type, self.owner_id, 'collections', self.collection_id,
+                    selected_version_id=self.collection_version_id, api_client=api),
+            partial(self.get_collection_data,
+                    self.owner_type, self.owner_id, self.collection_id, 'references',
+                    collection_version_id=self.collection_version_id,
+                    search_params=params, api_client=facets_api))
+        collection = results.json()
+        search_results_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_results_current_page = search_results_paginator.page(searcher.current_page)
 
         add_reference_warning = self.request.session.get('add_reference_warning', None)
@@ -148,7 +148,8 @@ class CollectionReferencesView(CollectionsBaseView, TemplateView):
         context['selected_tab'] = 'References'
         context['collection'] = collection
         context['collection_version'] = self.collection_version_id
-        context['collection_versions'] = versions.search_results
+        context['collection_versions'] = versions
+        context['more_collection_versions'] = more_versions
         context['selected_tab'] = 'References'
         context['results'] = searcher.search_results
         context['current_page'] = search_results_current_page
@@ -163,7 +164,6 @@ class CollectionReferencesView(CollectionsBaseView, TemplateView):
         context['search_params'] = searcher.search_params
         context['search_facets_json'] = searcher.search_facets
         context['search_filters_debug'] = str(searcher.search_filter_list)
-        context['collection_versions'] = versions.search_results
 
         context['warning'] = add_reference_warning
         context['success'] = add_reference_success
@@ -182,16 +182,7 @@ class CollectionMappingsView(CollectionsBaseView, TemplateView):
         context = super(CollectionMappingsView, self).get_context_data(*args, **kwargs)
         self.get_args()
         api = OclApi(self.request, debug=True)
-        results = api.get(self.owner_type, self.owner_id, 'collections', self.collection_id)
-        collection = results.json()
-        # to fetch all , set limit to 0
-        params = self.request.GET.copy()
-        params['verbose'] = 'true'
-        params['limit'] = '10'
-
-        versions = self.get_collection_versions(
-            self.owner_type, self.owner_id, self.collection_id,
-            search_params={'limit': '0'})
+        facets_api = OclApi(self.request, debug=True, facets=True)
 
         # Load the mappings in this collection, applying search parameters
         original_search_string = self.request.GET.get('q', '')
@@ -199,13 +190,27 @@ class CollectionMappingsView(CollectionsBaseView, TemplateView):
         params = self.request.GET.copy()
         params['verbose'] = 'true'
         params['limit'] = '10'
-        searcher = self.get_collection_data(
-            self.owner_type, self.owner_id, self.collection_id,
-            OclConstants.RESOURCE_NAME_MAPPINGS,
-            collection_version_id=self.collection_version_id,
-            search_params=params)
 
-        search_results_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+        # Load the collection, its recent versions, its mappings
+        # and the user's collections concurrently
+        calls = [
+            partial(api.get, self.owner_type, self.owner_id, 'collections', self.collection_id),
+            partial(self.get_version_selector,
+                    self.owner_type, self.owner_id, 'collections', self.collection_id,
+                    selected_version_id=self.collection_version_id, api_client=api),
+            partial(self.get_collection_data,
+                    self.owner_type, self.owner_id, self.collection_id,
+                    OclConstants.RESOURCE_NAME_MAPPINGS,
+                    collection_version_id=self.collection_version_id,
+                    search_params=params, api_client=facets_api),
+        ]
+        if self.request.user.is_authenticated():
+            calls.append(partial(api.get_all_collections_for_user, self.request.user.username))
+        fetched = OclApi.gather(*calls)
+        results, (versions, more_versions), searcher = fetched[:3]
+        collection = results.json()
+
+        search_results_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_results_current_page = search_results_paginator.page(searcher.current_page)
 
         # Build URL params
@@ -229,7 +234,8 @@ class CollectionMappingsView(CollectionsBaseView, TemplateView):
         context['selected_tab'] = 'Mappings'
         context['collection'] = collection
         context['collection_version'] = self.collection_version_id
-        context['collection_versions'] = versions.search_results
+        context['collection_versions'] = versions
+        context['more_collection_versions'] = more_versions
         context['selected_tab'] = 'Mappings'
         context['results'] = searcher.search_results
         context['current_page'] = search_results_current_page
@@ -239,15 +245,14 @@ class CollectionMappingsView(CollectionsBaseView, TemplateView):
         context['search_query'] = searcher.get_query()
         context['search_filters'] = searcher.search_filter_list
 
-        if self.request.user.is_authenticated():
-            context['all_collections'] = api.get_all_collections_for_user(self.request.user.username)
+        if len(fetched) > 3:
+            context['all_collections'] = fetched[3]
 
         # Set debug variables
         context['url_params'] = self.request.GET
         context['search_params'] = searcher.search_params
         context['search_facets_json'] = searcher.search_facets
         context['search_filters_debug'] = str(searcher.search_filter_list)
-        context['collection_versions'] = versions.search_results
 
         return context
 
@@ -286,16 +291,7 @@ class CollectionConceptsView(CollectionsBaseView, TemplateView):
         context = super(CollectionConceptsView, self).get_context_data(*args, **kwargs)
         self.get_args()
         api = OclApi(self.request, debug=True)
-        results = api.get(self.owner_type, self.owner_id, 'collections', self.collection_id)
-        collection = results.json()
-        params = self.request.GET.copy()
-        params['verbose'] = 'true'
-        params['limit'] = '10'
-
-        # to fetch all , set limit to 0
-        versions = self.get_collection_versions(
-            self.owner_type, self.owner_id, self.collection_id,
-            search_params={'limit': '0'})
+        facets_api = OclApi(self.request, debug=True, facets=True)
 
         # Load the concepts in this collection, applying search parameters
         original_search_string = self.request.GET.get('q', '')
@@ -303,12 +299,27 @@ class CollectionConceptsView(CollectionsBaseView, TemplateView):
         params = self.request.GET.copy()
         params['verbose'] = 'true'
         params['limit'] = '10'
-        searcher = self.get_collection_data(
-            self.owner_type, self.owner_id, self.collection_id, OclConstants.RESOURCE_NAME_CONCEPTS,
-            collection_version_id=self.collection_version_id,
-            search_params=params)
 
-        search_results_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+        # Load the collection, its recent versions, its concepts
+        # and the user's collections concurrently
+        calls = [
+            partial(api.get, self.owner_type, self.owner_id, 'collections', self.collection_id),
+            partial(self.get_version_selector,
+                    self.owner_type, self.owner_id, 'collections', self.collection_id,
+                    selected_version_id=self.collection_version_id, api_client=api),
+            partial(self.get_collection_data,
+                    self.owner_type, self.owner_id, self.collection_id,
+                    OclConstants.RESOURCE_NAME_CONCEPTS,
+                    collection_version_id=self.collection_version_id,
+                    search_params=params, api_client=facets_api),
+        ]
+        if self.request.user.is_authenticated():
+            calls.append(partial(api.get_all_collections_for_user, self.request.user.username))
+        fetched = OclApi.gather(*calls)
+        results, (versions, more_versions), searcher = fetched[:3]
+        collection = results.json()
+
+        search_results_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_results_current_page = search_results_paginator.page(searcher.current_page)
 
         # Build URL params
@@ -331,7 +342,8 @@ class CollectionConceptsView(CollectionsBaseView, TemplateView):
         context['selected_tab'] = 'Concepts'
         context['collection'] = collection
         context['collection_version'] = self.collection_version_id
-        context['collection_versions'] = versions.search_results
+        context['collection_versions'] = versions
+        context['more_collection_versions'] = more_versions
         context['selected_tab'] = 'Concepts'
         context['results'] = searcher.search_results
         context['current_page'] = search_results_current_page
@@ -344,10 +356,9 @@ class CollectionConceptsView(CollectionsBaseView, TemplateView):
         context['search_sort'] = searcher.get_sort()
         context['search_facets_json'] = searcher.search_facets
         context['search_filters_debug'] = str(searcher.search_filter_list)
-        context['collection_versions'] = versions.search_results
 
-        if self.request.user.is_authenticated():
-            context['all_collections'] = api.get_all_collections_for_user(self.request.user.username)
+        if len(fetched) > 3:
+            context['all_collections'] = fetched[3]
 
         return context
 
@@ -397,7 +408,7 @@ class CollectionVersionsView(CollectionsBaseView, TemplateView):
         searcher = self.get_collection_versions(
             self.owner_type, self.owner_id, self.collection_id,
             search_params=params)
-        search_results_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+        search_results_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_results_current_page = search_results_paginator.page(searcher.current_page)
 
         for collection_version in searcher.search_results:
@@ -419,9 +430,8 @@ class CollectionVersionsView(CollectionsBaseView, TemplateView):
         self.get_args()
         if request.is_ajax():
             api = OclApi(self.request, debug=True)
-            result = api.get(self.owner_type, self.owner_id, 'collections',
-                             kwargs.get('collection'), 'versions', params={'limit': '0'})
-            return HttpResponse(json.dumps(result.json()), content_type="application/json")
+            return api.get_proxy_response(self.owner_type, self.owner_id, 'collections',
+                                          kwargs.get('collection'), 'versions', params={'limit': '0'})
         return super(CollectionVersionsView, self).get(self, *args, **kwargs)
 
 
@@ -538,6 +548,7 @@ class CollectionCreateView(CollectionsBaseView, FormView):
                     messages.add_message(self.request, messages.ERROR, emsg)
                 return HttpResponseRedirect(self.request.path)
 
+            OclApi.invalidate_collections_for_user(self.request.user.username)
             messages.add_message(self.request, messages.INFO, _('Collection created'))
 
             if self.from_org:
@@ -756,6 +767,8 @@ class CollectionDeleteView(CollectionsBaseView, FormView):
             return HttpResponseRedirect(self.request.path)
 
         else:
+            if not self.collection_version_id:
+                OclApi.invalidate_collections_for_user(self.request.user.username)
             messages.add_message(self.request, messages.INFO, _('Collection Deleted'))
 
             return HttpResponseRedirect(self.get_success_url())
@@ -822,6 +835,7 @@ class CollectionEditView(CollectionsBaseView, FormView):
         data = form.cleaned_data
         api = OclApi(self.request, debug=True)
         result = api.update_collection(self.owner_type, self.owner_id, self.collection_id, data)
+        OclApi.invalidate_collections_for_user(self.request.user.username)
 
         messages.add_message(self.request, messages.INFO, _('Collection updated'))
         if self.from_org:
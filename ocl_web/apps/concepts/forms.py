@@ -20,8 +20,7 @@ from django import forms
 from django.forms.formsets import formset_factory
 
 #from libs.ocl import OclApi
-from apps.core.views import (_get_locale_list, _get_concept_class_list, _get_datatype_list, _get_name_type_list,
-                             _get_description_type_list, _get_map_type_list)
+from apps.core.views import _get_locale_list, _get_name_type_list, _get_description_type_list
 from apps.core.fields import ListTextWidget, ComboBoxWidget
 from libs.ocl import OclApi
 
@@ -49,7 +48,7 @@ class ConceptNewMappingForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super(ConceptNewMappingForm, self).__init__(*args, **kwargs)
         # create widgets here to delay calls to api until initialization of the form
-        self.fields['map_type'].widget = ComboBoxWidget(data_list=[(t) for t in _get_map_type_list()], name="map_type_list", css_class='input-sm')
+        self.fields['map_type'].widget = ComboBoxWidget(option_list='map_types', name="map_type_list", css_class='input-sm')
 
 
     map_type = forms.CharField(
@@ -106,11 +105,8 @@ class  ConceptNewForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         super(ConceptNewForm, self).__init__(*args, **kwargs)
-        _concept_class_list = [(cl) for cl in _get_concept_class_list()]
-        _datatype_list = [(d) for d in _get_datatype_list()]
-
-        self.fields['concept_class'].widget = ComboBoxWidget(data_list=_concept_class_list, name="concept_class")
-        self.fields['datatype'].widget      = ComboBoxWidget(data_list=_datatype_list,      name="datatype_list")
+        self.fields['concept_class'].widget = ComboBoxWidget(option_list='concept_classes', name="concept_class")
+        self.fields['datatype'].widget      = ComboBoxWidget(option_list='datatypes',       name="datatype_list")
 
     required_css_class = 'required'
 
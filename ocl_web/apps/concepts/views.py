@@ -5,6 +5,7 @@ import re
 import requests
 import logging
 
+from django.conf import settings
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
 from django.views.generic.edit import (View, FormView)
@@ -23,11 +24,28 @@ from braces.views import (LoginRequiredMixin, JsonRequestResponseMixin)
 from .forms import (ConceptNewForm, ConceptEditForm, ConceptNewMappingForm, ConceptRetireForm)
 from libs.ocl import OclApi, OclSearch, OclConstants
 from apps.core.views import UserOrOrgMixin
+from apps.core.routing import get_url_template
+from libs.ocl.mapping_classifier import MappingClassifier, OTHER, paginate_categories
 from itertools import chain
 
 logger = logging.getLogger('oclweb')
 
 
+def get_mapping_url_templates():
+    """ Return the URL templates of MappingClassifier, for both owner types """
+    templates = {}
+    for owner_type, owner_param in (('Organization', 'org'), ('User', 'user')):
+        owner = {owner_param: 'owner'}
+        templates['source', owner_type] = get_url_template('source-home', source='source', **owner)
+        templates['concept', owner_type] = get_url_template(
+            'concept-home', source='source', concept='concept', **owner)
+        templates['mapping', owner_type] = get_url_template(
+            'mapping-home', source='source', mapping='mapping', **owner)
+    templates['owner', 'Organization'] = get_url_template('org-home', org='owner')
+    templates['owner', 'User'] = get_url_template('users:detail', username='owner')
+    return templates
+
+
 class ConceptReadBaseView(TemplateView):
     """ Base class for Concept Read views. """
 
@@ -127,27 +145,15 @@ class ConceptDetailsView(UserOrOrgMixin, ConceptReadBaseView):
             source_version_id=self.source_version_id, concept_version_id=self.concept_version_id,
             include_mappings=True, include_inverse_mappings=True)
 
-        concept['has_direct_mappings'] = False
-        concept['has_inverse_mappings'] = False
-        if 'mappings' in concept and concept['mappings']:
-            for mapping in concept['mappings']:
-                if (self.proper_owner_type == mapping['to_source_owner_type'] and
-                        self.owner_id == mapping['to_source_owner'] and
-                        self.source_id == mapping['to_source_name'] and
-                        self.concept_id == mapping['to_concept_code']):
-                    mapping['is_inverse_mapping'] = True
-                    concept['has_inverse_mappings'] = True
-                    mapping['is_direct_mapping'] = False
-                else:
-                    mapping['is_direct_mapping'] = True
-                    mapping['is_inverse_mapping'] = False
-                    concept['has_direct_mappings'] = True
-                if mapping['to_concept_url']:
-                    mapping['is_internal_mapping'] = True
-                    mapping['is_external_mapping'] = False
-                else:
-                    mapping['is_internal_mapping'] = False
-                    mapping['is_external_mapping'] = True
+        mappings = concept.get('mappings') or []
+        categories = MappingClassifier(
+            self.proper_owner_type, self.owner_id, self.source_id, self.concept_id,
+            url_templates=get_mapping_url_templates()).classify(mappings)
+        # Mappings neither from nor to the concept are listed with the direct mappings here
+        for mapping in categories[OTHER]:
+            mapping['is_direct_mapping'] = True
+        concept['has_direct_mappings'] = any(mapping['is_direct_mapping'] for mapping in mappings)
+        concept['has_inverse_mappings'] = any(mapping['is_inverse_mapping'] for mapping in mappings)
 
         if self.request.user.is_authenticated():
             context['all_collections'] = api.get_all_collections_for_user(self.request.user.username)
@@ -191,6 +197,12 @@ class ConceptMappingsView(FormView, UserOrOrgMixin,
 
         return data
 
+    def get_mappings_page_url(self, page):
+        """ Return the query string of a page of mappings, keeping the other parameters """
+        params = self.request.GET.copy()
+        params['mappings_page'] = page
+        return '?' + params.urlencode()
+
     def get_context_data(self, *args, **kwargs):
         """ Loads the concept details. """
 
@@ -206,112 +218,16 @@ class ConceptMappingsView(FormView, UserOrOrgMixin,
             source_version_id=self.source_version_id, concept_version_id=self.concept_version_id,
             include_mappings=True, include_inverse_mappings=True)
 
-        # Process mappings relative to current concept
-        # TODO(paynejd@gmail.com): Move processing code to concept/mapping class objects
-        mappings = {
-            'Direct Internal Mapping': [],
-            'Direct External Mapping': [],
-            'Inverse Mapping': [],
-            'Linked Answer': [],
-            'Linked Question': [],
-            'Set Member': [],
-            'Set Parent': [],
-            'Other': [],
-        }
-        if 'mappings' in concept and concept['mappings']:
-            for mapping in concept['mappings']:
-                mapping['is_direct_mapping'] = False
-                mapping['is_inverse_mapping'] = False
-                mapping['is_internal_mapping'] = False
-                mapping['is_external_mapping'] = False
-                mapping['mapping_category'] = None
-                mapping['to_url'] = None
-                mapping['from_url'] = None
-                mapping['mapping_url'] = None
-
-                # TODO: Set the mapping_url
-                mapping_url_args = {}
-                if mapping['owner_type'] == 'Organization':
-                    mapping_url_args['org'] = mapping['owner']
-                else:
-                    mapping_url_args['user'] = mapping['owner']
-                mapping_url_args['source'] = mapping['source']
-                mapping_url_args['mapping'] = mapping['id']
-                mapping['mapping_url'] = reverse('mapping-home', kwargs=mapping_url_args)
-
-                # this concept == from_concept
-                if (self.proper_owner_type == mapping['from_source_owner_type'] and
-                            self.owner_id == mapping['from_source_owner'] and
-                            self.source_id == mapping['from_source_name'] and
-                            self.concept_id == mapping['from_concept_code']):
-
-                    # Setup the arguments to reverse to_concept URL - URL reversed in next block
-                    to_concept_url_args = {}
-                    if mapping['to_source_owner_type'] == 'Organization':
-                        to_concept_url_args['org'] = mapping['to_source_owner']
-                    else:
-                        to_concept_url_args['user'] = mapping['to_source_owner']
-                    to_concept_url_args['source'] = mapping['to_source_name']
-
-                    # Set mapping attributes relative to the current concept
-                    mapping['is_direct_mapping'] = True
-                    if mapping['to_concept_url']:
-                        mapping['is_internal_mapping'] = True
-                        to_concept_url_args['concept'] = mapping['to_concept_code']
-                        mapping['to_url'] = reverse('concept-home', kwargs=to_concept_url_args)
-                    else:
-                        mapping['is_external_mapping'] = True
-                        mapping['to_url'] = reverse('source-home', kwargs=to_concept_url_args)
-
-                    # Determine the mapping category relative to current concept
-                    if mapping['map_type'] == 'Q-AND-A':
-                        mapping['mapping_category'] = 'Linked Answer'
-                        mappings['Linked Answer'].append(mapping)
-                    elif mapping['map_type'] == 'CONCEPT-SET':
-                        mapping['mapping_category'] = 'Set Member'
-                        mappings['Set Member'].append(mapping)
-                    elif mapping['to_concept_url']:
-                        mapping['mapping_category'] = 'Direct Internal Mapping'
-                        mappings['Direct Internal Mapping'].append(mapping)
-                    else:
-                        mapping['mapping_category'] = 'Direct External Mapping'
-                        mappings['Direct External Mapping'].append(mapping)
-
-                # this concept == to_concept (internal mapping)
-                elif (self.proper_owner_type == mapping['to_source_owner_type'] and
-                              self.owner_id == mapping['to_source_owner'] and
-                              self.source_id == mapping['to_source_name'] and
-                              self.concept_id == mapping['to_concept_code']):
-
-                    # Setup the arguments to reverse from_concept URL - which must be in OCL
-                    from_concept_url_args = {}
-                    if mapping['from_source_owner_type'] == 'Organization':
-                        from_concept_url_args['org'] = mapping['from_source_owner']
-                    else:
-                        from_concept_url_args['user'] = mapping['from_source_owner']
-                    from_concept_url_args['source'] = mapping['from_source_name']
-                    from_concept_url_args['concept'] = mapping['from_concept_code']
-                    mapping['from_url'] = reverse('concept-home', kwargs=from_concept_url_args)
-
-                    # Set mapping attributes relative to the current concept
-                    mapping['is_inverse_mapping'] = True
-                    mapping['is_internal_mapping'] = True
-
-                    # Determine the mapping category
-                    if mapping['map_type'] == 'Q-AND-A':
-                        mapping['mapping_category'] = 'Linked Question'
-                        mappings['Linked Question'].append(mapping)
-                    elif mapping['map_type'] == 'CONCEPT-SET':
-                        mapping['mapping_category'] = 'Set Parent'
-                        mappings['Set Parent'].append(mapping)
-                    else:
-                        mapping['mapping_category'] = 'Inverse Mapping'
-                        mappings['Inverse Mapping'].append(mapping)
-
-                # this concept != from_concept or to_concept! something's wrong
-                else:
-                    mapping['mapping_category'] = 'Other'
-                    mappings['Other'].append(mapping)
+        # Process mappings relative to current concept, a page of each category at a time
+        categories = MappingClassifier(
+            self.proper_owner_type, self.owner_id, self.source_id, self.concept_id,
+            url_templates=get_mapping_url_templates()).classify(concept.get('mappings') or [])
+        try:
+            page = max(int(self.request.GET.get('mappings_page', 1)), 1)
+        except ValueError:
+            page = 1
+        mappings, has_more = paginate_categories(
+            categories, page, settings.CONCEPT_MAPPINGS_PAGE_SIZE)
 
         if self.request.user.is_authenticated():
             context['all_collections'] = api.get_all_collections_for_user(self.request.user.username)
@@ -322,6 +238,8 @@ class ConceptMappingsView(FormView, UserOrOrgMixin,
         context['selected_tab'] = 'Mappings'
         context['concept'] = concept
         context['mappings'] = mappings
+        context['mappings_previous_url'] = self.get_mappings_page_url(page - 1) if page > 1 else None
+        context['mappings_next_url'] = self.get_mappings_page_url(page + 1) if has_more else None
         context['form'] = ConceptNewMappingForm()
         context['map_types'] = _get_map_type_list()
 
@@ -0,0 +1,317 @@
+"""
+Helpers for management commands that send many independent write requests to the API,
+e.g. import_mappings.
+
+- run_bulk() runs the requests on a pool of threads, optionally rate limited
+- a CheckpointJournal records the keys of the requests that succeeded, so that an
+  interrupted run skips them when it is started again
+- BulkRunStats counts the outcomes and prints the throughput and error summary
+
+For inputs too large to hold in memory (e.g. multi-gigabyte CSV files), the stages of an
+import can instead be chained as generators running on their own threads, see buffered(),
+run_stage() and submit_batches(). Each stage records its rows per second in a StageStats.
+"""
+import os
+import sys
+import time
+import Queue
+import threading
+from collections import Counter
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+
+class RateLimiter(object):
+    """
+    Client-side limit on the number of requests started per second, shared by all threads.
+    A rate of 0 or None means no limit.
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """ Block until the next request may be started """
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.time()
+            start_time = max(now, self.next_time)
+            self.next_time = start_time + self.interval
+        if start_time > now:
+            time.sleep(start_time - now)
+
+
+class CheckpointJournal(object):
+    """
+    Append-only file of the keys of completed requests, one per line.
+    Keys already in the file when it is opened are reported as done.
+    """
+
+    def __init__(self, path, restart=False):
+        self.path = path
+        self.done = set()
+        self.lock = threading.Lock()
+        if restart and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            with open(path, 'r') as journal_file:
+                self.done.update(line.rstrip('\n') for line in journal_file if line.strip())
+        self.journal_file = open(path, 'a')
+
+    def is_done(self, key):
+        return key in self.done
+
+    def record(self, key):
+        """ Record that the request for key succeeded, flushing so a crash does not lose it """
+        with self.lock:
+            self.done.add(key)
+            self.journal_file.write(key + '\n')
+            self.journal_file.flush()
+
+    def close(self):
+        self.journal_file.close()
+
+
+class BulkRunStats(object):
+    """ Counts the outcome of the requests of a bulk run """
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.errors = Counter()     # status code or exception name -> count
+        self.start_time = time.time()
+        self.lock = threading.Lock()
+
+    @property
+    def processed(self):
+        return self.succeeded + self.failed
+
+    def add_success(self):
+        with self.lock:
+            self.succeeded += 1
+
+    def add_failure(self, reason):
+        with self.lock:
+            self.failed += 1
+            self.errors[reason] += 1
+
+    def add_skipped(self):
+        with self.lock:
+            self.skipped += 1
+
+    def summary(self):
+        """ Return the throughput and error summary of the run """
+        elapsed = max(time.time() - self.start_time, 0.001)
+        lines = [
+            'Processed %d requests in %.1fs (%.1f/s): %d succeeded, %d failed, '
+            '%d skipped (already done)' % (self.processed, elapsed, self.processed / elapsed,
+                                           self.succeeded, self.failed, self.skipped),
+        ]
+        for reason, count in self.errors.most_common():
+            lines.append('  %s: %d' % (reason, count))
+        return '\n'.join(lines)
+
+
+def run_bulk(tasks, func, concurrency=1, rate=None, journal=None, stats=None, on_result=None):
+    """
+    Call func(payload) for each (key, payload) in tasks, on concurrency threads.
+
+    func must return a requests.Response; 2xx responses are successes and their key is
+    recorded in the journal. Exceptions raised by func fail their task only. Tasks whose
+    key is already in the journal are skipped.
+    on_result(key, payload, response, error) is called in the calling thread for every
+    completed task, e.g. to print progress.
+
+    tasks is iterated by the thread feeding the pool: invalid input should be handled while
+    generating the tasks (e.g. counted with stats.add_failure()). An exception raised by
+    tasks ends the run and is raised again in the calling thread.
+
+    :returns: BulkRunStats of the run
+    """
+    stats = stats or BulkRunStats()
+    rate_limiter = RateLimiter(rate)
+    tasks_error = []
+
+    def run_task(task):
+        key, payload = task
+        rate_limiter.wait()
+        try:
+            return key, payload, func(payload), None
+        except Exception as error:   # pylint: disable=W0703
+            return key, payload, None, error
+
+    def pending_tasks():
+        # An exception escaping here would silently stop the pool's task thread, and leave
+        # the calling thread waiting forever for the results
+        try:
+            for key, payload in tasks:
+                if journal is not None and journal.is_done(key):
+                    stats.add_skipped()
+                    continue
+                yield key, payload
+        except Exception:   # pylint: disable=W0703
+            tasks_error.append(sys.exc_info())
+
+    pool = ThreadPool(processes=max(concurrency, 1))
+    try:
+        for key, payload, response, error in pool.imap_unordered(run_task, pending_tasks()):
+            if error is not None:
+                stats.add_failure(error.__class__.__name__)
+            elif 200 <= response.status_code < 300:
+                stats.add_success()
+                if journal is not None:
+                    journal.record(key)
+            else:
+                stats.add_failure(response.status_code)
+            if on_result is not None:
+                on_result(key, payload, response, error)
+    finally:
+        pool.terminate()
+        pool.join()
+    if tasks_error:
+        raise tasks_error[0][0], tasks_error[0][1], tasks_error[0][2]
+    return stats
+
+
+class StageStats(object):
+    """
+    Number of rows handled by a pipeline stage and the time spent handling them, not
+    counting the time spent waiting for the stages before or after it.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.rejected = 0
+        self.busy = 0.0
+        self.errors = Counter()
+        self.lock = threading.Lock()
+
+    def add(self, seconds, count=1):
+        with self.lock:
+            self.busy += seconds
+            self.count += count
+
+    def add_error(self, reason):
+        with self.lock:
+            self.rejected += 1
+            self.errors[reason] += 1
+
+    @property
+    def rate(self):
+        """ Rows handled per second of work """
+        return self.count / self.busy if self.busy else 0.0
+
+    def __str__(self):
+        return '%-10s %8d rows %8d rejected %8.1fs busy %10.1f rows/s' % (
+            self.name, self.count, self.rejected, self.busy, self.rate)
+
+
+_END = object()
+
+
+def buffered(items, maxsize=1000):
+    """
+    Iterate items on a background thread and yield them through a queue of at most maxsize
+    items, so the stage producing them runs concurrently with the stage consuming them.
+    An exception raised by the producing stage is re-raised by the consumer.
+    """
+    queue = Queue.Queue(maxsize)
+    error = []
+
+    def produce():
+        try:
+            for item in items:
+                queue.put(item)
+        except Exception:   # pylint: disable=W0703
+            error.append(sys.exc_info())
+        finally:
+            queue.put(_END)
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    while True:
+        item = queue.get()
+        if item is _END:
+            break
+        yield item
+    if error:
+        raise error[0][0], error[0][1], error[0][2]
+
+
+def timed(items, stats):
+    """ Yield items, recording the time taken to produce each of them in stats """
+    items = iter(items)
+    while True:
+        start_time = time.time()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        stats.add(time.time() - start_time)
+        yield item
+
+
+def run_stage(func, items, stats):
+    """
+    Yield func(item) for each item, recording the time taken in stats. Rows for which func
+    raises ValueError are rejected: the error is printed and counted, and the row dropped.
+    """
+    for item in items:
+        start_time = time.time()
+        try:
+            result = func(item)
+        except ValueError as error:
+            stats.add(time.time() - start_time, count=0)
+            stats.add_error(error.__class__.__name__)
+            print '%s: %s' % (stats.name, error)
+            continue
+        stats.add(time.time() - start_time)
+        yield result
+
+
+def submit_batches(items, func, stats, batch_size=100, concurrency=4):
+    """
+    Call func(item) for each item on concurrency threads, batch_size items at a time so that
+    at most one batch is held in memory. func must return a requests.Response; responses
+    other than 2xx are printed and counted as errors in stats.
+    """
+    pool = ThreadPool(processes=max(concurrency, 1))
+
+    def submit(item):
+        try:
+            return item, func(item), None
+        except requests.RequestException as error:
+            return item, None, error
+
+    def flush(batch):
+        start_time = time.time()
+        results = pool.map(submit, batch)
+        stats.add(time.time() - start_time, count=len(batch))
+        for item, response, error in results:
+            if error is not None:
+                stats.add_error(error.__class__.__name__)
+                print '%s: %s %s' % (stats.name, item, error)
+            elif not 200 <= response.status_code < 300:
+                stats.add_error(response.status_code)
+                print '%s: %s %s %s' % (stats.name, item, response, response.text[:200])
+
+    try:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    finally:
+        pool.terminate()
+        pool.join()
+    return stats
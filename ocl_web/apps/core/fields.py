@@ -1,5 +1,20 @@
+import simplejson as json
 from django import forms
 
+from .option_lists import option_lists, to_awesomplete_list
+
+
+def _get_list_options(data_list, option_list, awesomplete):
+    """
+    Return the maxItems and list options of an Awesomplete, and the script loading its list.
+    A named option list is loaded from its cached JSON asset, a data list is inlined.
+    """
+    if option_list:
+        return '0', '[]', 'Awesomplete.LOAD_LIST({0}, "{1}");'.format(
+            awesomplete, option_lists.get_url(option_list))
+    return str(len(data_list)), json.dumps(to_awesomplete_list(data_list)), ''
+
+
 class ListTextWidget(forms.TextInput):
     def __init__(self, data_list, name, *args, **kwargs):
         super(ListTextWidget, self).__init__(*args, **kwargs)
@@ -17,9 +32,14 @@ class ListTextWidget(forms.TextInput):
         return (text_html + data_list)
 
 class ComboBoxWidget(forms.TextInput):
-    def __init__(self, data_list, name, *args, **kwargs):
+    """
+    Text input with an Awesomplete drop down, listing either data_list, or the named option
+    list of apps.core.option_lists passed as option_list.
+    """
+    def __init__(self, data_list=None, name=None, *args, **kwargs):
         self._name = name
         self._list = data_list
+        self._option_list = kwargs.pop('option_list', None)
         self._css_class = kwargs.pop('css_class', '')
         super(ComboBoxWidget, self).__init__(*args, **kwargs)
 
@@ -27,14 +47,7 @@ class ComboBoxWidget(forms.TextInput):
         txt_name = "id_%s" % name
         btn_name = "btn_%s" % name
         cbo_name = "cbo_%s" % name
-        list_text = ''
-        list_count = 0
-        for item in self._list:
-            if (isinstance(item, list)):
-                list_text += '["{1}","{0}"],'.format(item[0], item[1])
-            else:
-                list_text += '"{0}",'.format(item)
-            list_count += 1
+        max_items, list_text, load_script = _get_list_options(self._list, self._option_list, cbo_name)
 
         text_html = super(ComboBoxWidget, self).render(name, value,
                                                        attrs={"class":"dropdown-input form-control {0}".format(self._css_class)})
@@ -47,37 +60,37 @@ class ComboBoxWidget(forms.TextInput):
                       '	  var {1} = new Awesomplete({0}, {{' \
                       '       minChars: 0, ' \
                       '       maxItems: {2}, ' \
-                      '       list: [{3}] ' \
+                      '       list: {3} ' \
                       '   }}); ' \
-                      '</script>'.format(txt_name, cbo_name, str(list_count), list_text)
+                      '   {4} ' \
+                      '</script>'.format(txt_name, cbo_name, max_items, list_text, load_script)
 
         cbo_html = text_html + button_html + script_html
 
         return '<div>{0}</div>'.format(cbo_html)
 
 class MultipleInputWidget(forms.TextInput):
-    def __init__(self, data_list, name, *args, **kwargs):
+    """
+    Text input of comma separated values, completed from data_list or from the named option
+    list of apps.core.option_lists passed as option_list.
+    """
+    def __init__(self, data_list=None, name=None, *args, **kwargs):
         self._name = name
         self._list = data_list
+        self._option_list = kwargs.pop('option_list', None)
         self._css_class = kwargs.pop('css_class', '')
         super(MultipleInputWidget, self).__init__(*args, **kwargs)
 
     def render(self, name, value, attrs=None):
-        list_text = ''
-        list_count = 0
-        for item in self._list:
-            if (isinstance(item, list)):
-                list_text += '["{1}","{0}"],'.format(item[0], item[1])
-            else:
-                list_text += '"{0}",'.format(item)
-            list_count += 1
+        max_items, list_text, load_script = _get_list_options(self._list, self._option_list,
+                                                              'multiple_input')
 
         text_html = super(MultipleInputWidget, self).render(name, value,
                                                        attrs={'data-multiple':True, 'class':'form-control {0}'.format(self._css_class)})
 
         script_html = \
             '<script>' \
-            'new Awesomplete("input[data-multiple]", {{' \
+            'var multiple_input = new Awesomplete("input[data-multiple]", {{' \
             '	filter: function(text, input) {{' \
             '		return Awesomplete.FILTER_CONTAINS(text, input.match(/[^,]*$/)[0]);' \
             '	}},' \
@@ -95,8 +108,9 @@ class MultipleInputWidget(forms.TextInput):
             '   sort: Awesomplete.SORT_STANDARD, ' \
             '   minChars: 1,' \
             '   maxItems: {0}, ' \
-            '   list: [{1}] ' \
+            '   list: {1} ' \
             '}});' \
-            '</script>'.format(str(list_count),list_text)
+            '{2}' \
+            '</script>'.format(max_items, list_text, load_script)
 
         return text_html + script_html
@@ -0,0 +1,33 @@
+"""
+Drop cached OCL reference vocabularies (concept classes, datatypes, locales, map types...).
+
+Run this after editing one of the OCL/<X> reference sources so the web forms pick up the change
+without waiting for the cache to expire. Only useful with a cache shared between processes,
+e.g. memcached. The copies kept on disk by the import commands, in
+settings.REFERENCE_DATA_DISK_CACHE_DIR, are deleted as well.
+manage.py clear_reference_data [name ...]
+"""
+from django.core.management import BaseCommand, CommandError
+
+# Importing the views registers the reference data loaders
+import apps.core.views  # pylint: disable=W0611
+from apps.core.refdata import reference_data
+from apps.core.management.commands.importer import delete_reference_data_files
+
+
+class Command(BaseCommand):
+    """ manage.py Command 'clear_reference_data' """
+    help = 'Drop cached reference data, all of it if no name is given'
+    args = '[name ...]'
+
+    def handle(self, *args, **options):
+        for name in args:
+            if name not in reference_data.loaders:
+                raise CommandError('Unknown reference data %s, expected one of: %s' % (
+                    name, ', '.join(sorted(reference_data.loaders))))
+
+        for name in args or sorted(reference_data.loaders):
+            reference_data.invalidate(name)
+            self.stdout.write('Cleared %s' % name)
+        for path in delete_reference_data_files(args or None):
+            self.stdout.write('Deleted %s' % path)
@@ -21,6 +21,8 @@ import requests
 from django.core.management import BaseCommand, CommandError
 
 from libs.ocl import OclApi
+from libs.ocl.async_api import AsyncOclApi
+from libs.ocl.concurrency import ApiExecutor
 from apps.core.views import _get_concept_class_list
 from apps.core.views import _get_datatype_list
 from apps.core.views import _get_source_type_list
@@ -54,11 +56,18 @@ class Command(BaseCommand):
                     dest='create_mode',
                     default=False,
                     help='Create data.'),
+        make_option('--concurrency',
+                    action='store',
+                    dest='concurrency',
+                    type='int',
+                    default=10,
+                    help='Number of concept calls in flight at once, default 10.'),
     )
 
     def __init__(self):
         super(Command, self).__init__()
         self.ocl = None
+        self.async_ocl = None
         self.username = None
         self.password = None
         self.web_host = os.environ['OCL_WEB_HOST']
@@ -120,6 +129,13 @@ class Command(BaseCommand):
         self.ocl.save_auth_token(self.request, result.json())
         self.ocl = OclApi(self.request, debug=True)
 
+    def print_results(self, futures):
+        """ Wait for the scheduled calls and print their results in order """
+        results = self.async_ocl.wait_all([future for _, future in futures])
+        for (message, _), result in zip(futures, results):
+            print message
+            print result
+
     def make_source_name(self, n):
         """
             Create source name.
@@ -169,6 +185,7 @@ class Command(BaseCommand):
     def create_concepts(self):
         """ Create concepts for demo data """
 
+        futures = []
         for s in range(1, 11):
             sid = self.make_source_name(s)
             for c in range(1, 21):
@@ -185,15 +202,16 @@ class Command(BaseCommand):
                     'locale': lc,
                     'preferred': lc,
                 }
-                print 'creating concept %s' % concept_id
-                result = self.ocl.create_concept(
-                    'orgs', self.ORG_ID, sid,
-                    data, names=[name])
-                print result
+                futures.append(('creating concept %s' % concept_id,
+                                self.async_ocl.create_concept(
+                                    'orgs', self.ORG_ID, sid,
+                                    data, names=[name])))
+        self.print_results(futures)
 
     def update_concepts(self):
         """ Update concepts for demo data -- WHEN IS THIS USED? """
 
+        futures = []
         for s in range(1, 11):
             sid = self.make_source_name(s)
             for c in range(1, 21):
@@ -205,15 +223,17 @@ class Command(BaseCommand):
                     'update_comment': 'testing update',
                 }
 
-                print 'updating concept %s' % concept_id
-                result = self.ocl.update_concept(
-                    'orgs', self.ORG_ID, sid, concept_id,
-                    data)
-                print result
+                futures.append(('updating concept %s' % concept_id,
+                                self.async_ocl.submit(
+                                    self.ocl.update_concept,
+                                    'orgs', self.ORG_ID, sid, concept_id,
+                                    data)))
+        self.print_results(futures)
 
     def add_concept_data(self):
         """ Add names and descriptions """
 
+        futures = []
         for s in range(1, 11):
             sid = self.make_source_name(s)
             for c in range(1, 21):
@@ -225,22 +245,21 @@ class Command(BaseCommand):
                         'locale': random.choice(self.locale_list),
                     }
 
-                    print 'adding name %s' % data['name']
-                    result = self.ocl.post(
-                        'orgs', self.ORG_ID, 'sources', sid,
-                        'concepts', concept_id, 'names', **data)
-                    print result
+                    futures.append(('adding name %s' % data['name'],
+                                    self.async_ocl.post(
+                                        'orgs', self.ORG_ID, 'sources', sid,
+                                        'concepts', concept_id, 'names', **data)))
 
                     data = {
                         'description': 'description for %s variant %s' % (concept_id, v),
                         'locale': random.choice(self.locale_list),
                     }
 
-                    print 'adding desc %s' % data['description']
-                    result = self.ocl.post(
-                        'orgs', self.ORG_ID, 'sources', sid,
-                        'concepts', concept_id, 'descriptions', **data)
-                    print result
+                    futures.append(('adding desc %s' % data['description'],
+                                    self.async_ocl.post(
+                                        'orgs', self.ORG_ID, 'sources', sid,
+                                        'concepts', concept_id, 'descriptions', **data)))
+        self.print_results(futures)
 
     def handle(self, *args, **options):
 
@@ -256,9 +275,14 @@ class Command(BaseCommand):
 
             self.load_user(username)
             self.login()
-
-            self.create_orgs()
-            self.create_sources()
-            self.create_concepts()
-            self.add_concept_data()
-            self.update_concepts()
+            executor = ApiExecutor(options['concurrency'])
+            self.async_ocl = AsyncOclApi(self.request, debug=True, executor=executor)
+
+            try:
+                self.create_orgs()
+                self.create_sources()
+                self.create_concepts()
+                self.add_concept_data()
+                self.update_concepts()
+            finally:
+                executor.close()
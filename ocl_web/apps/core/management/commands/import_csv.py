@@ -0,0 +1,195 @@
+"""
+Import concepts or mappings into a source from a CSV file.
+
+    manage.py import_csv --username testusername --org_id CIEL --source_id CIEL
+        --type concepts --csv concepts.csv
+
+The file is streamed through parse, validate, transform and submit stages running
+concurrently, so files of any size can be imported with constant memory. Invalid rows
+are printed and skipped. Rows are submitted --batch_size at a time on --concurrency
+threads. At the end, the rows per second of each stage are printed to show whether
+reading the file or the API is the bottleneck.
+
+- The CSV file must have a header row.
+
+The column names for concepts must be:
+id
+concept_class
+datatype
+name
+locale
+name_type (optional, defaults to Fully Specified)
+description (optional)
+external_id (optional)
+
+The column names for mappings must be:
+from_concept_id
+map_type
+to_concept_id, for a concept of the same source, or
+to_source_url and to_concept_code, for a concept of another source
+"""
+from optparse import make_option
+from django.core.management import CommandError
+from .importer import ImporterCommand
+
+
+RESOURCE_TYPES = ('concepts', 'mappings')
+
+
+class Command(ImporterCommand):
+    """ import_csv manage.py command """
+
+    help = 'Import concepts or mappings from a CSV file'
+    option_list = ImporterCommand.option_list + (
+        make_option('--username',
+                    action='store',
+                    dest='username',
+                    default=None,
+                    help='username for an existing user, e.g. demo1'),
+        make_option('--org_id',
+                    action='store',
+                    dest='org_id',
+                    default=None,
+                    help='Organization ID, e.g. OMRS'),
+        make_option('--source_id',
+                    action='store',
+                    dest='source_id',
+                    default=None,
+                    help='Source ID, e.g. OMRS'),
+        make_option('--type',
+                    action='store',
+                    dest='resource_type',
+                    default='concepts',
+                    help='Type of the rows, concepts or mappings'),
+        make_option('--csv',
+                    action='store',
+                    dest='filename',
+                    default=None,
+                    help='CSV Filename'),
+        make_option('--concurrency',
+                    action='store',
+                    dest='concurrency',
+                    type='int',
+                    default=4,
+                    help='Number of rows submitted concurrently, e.g. 8'),
+        make_option('--batch_size',
+                    action='store',
+                    dest='batch_size',
+                    type='int',
+                    default=100,
+                    help='Number of rows submitted at a time'),
+        make_option('--test',
+                    action='store_true',
+                    dest='test_mode',
+                    default=False,
+                    help='Test only, validate the file but do not create data.'),
+    )
+
+    def __init__(self):
+        super(Command, self).__init__()
+        self.org_id = None
+        self.source_id = None
+
+    @staticmethod
+    def check_required(row, fields):
+        """ Raise ValueError if one of the fields is empty in the row """
+        missing = [field for field in fields if not row.get(field)]
+        if missing:
+            raise ValueError('%s is required: %s' % (', '.join(missing), row))
+
+    def validate_concept(self, row):
+        """ Check a concept row, raising ValueError if it is invalid """
+        self.check_required(row, ('id', 'concept_class', 'datatype', 'name', 'locale'))
+        if row['concept_class'] not in self.concept_class_list:
+            raise ValueError('Unknown concept_class %s: %s' % (row['concept_class'], row))
+        if row['datatype'] not in self.datatype_list:
+            raise ValueError('Unknown datatype %s: %s' % (row['datatype'], row))
+        if row['locale'] not in self.locale_list:
+            raise ValueError('Unknown locale %s: %s' % (row['locale'], row))
+        return row
+
+    def transform_concept(self, row):
+        """ Return the (base_data, names, descriptions) to create for a concept row """
+        base_data = {
+            'id': row['id'],
+            'concept_class': row['concept_class'],
+            'datatype': row['datatype'],
+        }
+        if row.get('external_id'):
+            base_data['external_id'] = row['external_id']
+        names = [{
+            'name': row['name'],
+            'locale': row['locale'],
+            'locale_preferred': True,
+            'name_type': row.get('name_type') or 'Fully Specified',
+        }]
+        descriptions = []
+        if row.get('description'):
+            descriptions.append({
+                'description': row['description'],
+                'locale': row['locale'],
+                'locale_preferred': True,
+            })
+        return base_data, names, descriptions
+
+    def submit_concept(self, item):
+        """ Create one concept """
+        base_data, names, descriptions = item
+        return self.get_api().create_concept(
+            'orgs', self.org_id, self.source_id, base_data,
+            names=names, descriptions=descriptions)
+
+    def validate_mapping(self, row):
+        """ Check a mapping row, raising ValueError if it is invalid """
+        self.check_required(row, ('from_concept_id', 'map_type'))
+        if not row.get('to_concept_id'):
+            self.check_required(row, ('to_source_url', 'to_concept_code'))
+        return row
+
+    def transform_mapping(self, row):
+        """ Return the (from_concept_id, data) to create for a mapping row """
+        data = {'map_type': row['map_type']}
+        if row.get('to_concept_id'):
+            data['to_concept_url'] = '/orgs/%s/sources/%s/concepts/%s/' % (
+                self.org_id, self.source_id, row['to_concept_id'])
+        else:
+            data['to_source_url'] = row['to_source_url']
+            data['to_concept_code'] = row['to_concept_code']
+        return row['from_concept_id'], data
+
+    def submit_mapping(self, item):
+        """ Create one mapping """
+        from_concept_id, data = item
+        return self.get_api().create_mapping_from_concept(
+            'orgs', self.org_id, self.source_id, from_concept_id, data)
+
+    def handle(self, *args, **options):
+
+        self.get_args(args, options)
+
+        self.org_id = options['org_id']
+        if self.org_id is None:
+            raise CommandError('--org_id is required.')
+
+        self.source_id = options['source_id']
+        if self.source_id is None:
+            raise CommandError('--source_id is required.')
+
+        if self.filename is None:
+            raise CommandError('--csv is required.')
+
+        resource_type = options['resource_type']
+        if resource_type not in RESOURCE_TYPES:
+            raise CommandError('--type must be one of %s' % ', '.join(RESOURCE_TYPES))
+        resource_name = resource_type[:-1]
+
+        if not self.test_mode:
+            self.connect()
+
+        stats = self.run_pipeline(
+            getattr(self, 'validate_%s' % resource_name),
+            getattr(self, 'transform_%s' % resource_name),
+            getattr(self, 'submit_%s' % resource_name),
+            concurrency=options['concurrency'], batch_size=options['batch_size'])
+        for stage_stats in stats:
+            print stage_stats
@@ -6,6 +6,11 @@ Import mappings via API.
 
     manage.py import_mappings input_file_name
 
+    Mappings are created by --concurrency threads (default 1), starting at most --rate
+    mappings per second if set. Each mapping created is recorded in a journal file
+    (input_file_name.journal by default) and skipped if the import is run again, so an
+    interrupted import resumes where it stopped. Use --restart to ignore the journal.
+
     File Example:
 
 q_and_a 985 1173 1152 5254 1150 6046 5526 968
@@ -19,27 +24,16 @@ q_and_a 1031 1311 1312 1313 1314 1315 1316 1317 1304
 from optparse import make_option
 import os.path
 
-from django.core.management import BaseCommand, CommandError
-
-from libs.ocl import OclApi
-from apps.core.views import _get_concept_class_list
-from apps.core.views import _get_datatype_list
-from apps.core.views import _get_source_type_list
-from apps.core.views import _get_locale_list
+from django.core.management import CommandError
 
-from users.models import User
+from apps.core.bulk import BulkRunStats, CheckpointJournal, run_bulk
+from .importer import ImporterCommand
 
 
-class FakeRequest(object):
-    """ FakeRequest class """
-    def __init__(self):
-        self.session = {}
-
-
-class Command(BaseCommand):
+class Command(ImporterCommand):
     """ manage.py Command 'import_mappings' """
     help = 'Import mappigs'
-    option_list = BaseCommand.option_list + (
+    option_list = ImporterCommand.option_list + (
         make_option('--username',
                     action='store',
                     dest='username',
@@ -55,55 +49,45 @@ class Command(BaseCommand):
                     dest='source_id',
                     default=None,
                     help='Source ID, e.g. OMRS'),
+        make_option('--concurrency',
+                    action='store',
+                    dest='concurrency',
+                    type='int',
+                    default=1,
+                    help='Number of mappings created concurrently, e.g. 8'),
+        make_option('--rate',
+                    action='store',
+                    dest='rate',
+                    type='float',
+                    default=None,
+                    help='Maximum number of mappings created per second, e.g. 20'),
+        make_option('--journal',
+                    action='store',
+                    dest='journal',
+                    default=None,
+                    help='Checkpoint file of the mappings created, '
+                         'defaults to the input file name + .journal'),
+        make_option('--restart',
+                    action='store_true',
+                    dest='restart',
+                    default=False,
+                    help='Ignore the mappings recorded in the journal and start over'),
     )
 
     def __init__(self):
         super(Command, self).__init__()
-        self.ocl = None
-        self.username = None
-        self.password = None
         self.api_host = os.environ['OCL_API_HOST']
-        self.web_host = os.environ['OCL_WEB_HOST']
         self.ORG_ID = None
         self.SOURCE_ID = None
-        self.locale_list = [d['code'] for d in _get_locale_list()]
-        self.source_type_list = _get_source_type_list()
-        self.concept_class_list = _get_concept_class_list()
-        self.datatype_list = _get_datatype_list()
+        self.verbosity = 1
 
-    def load_user(self, username):
+    def get_mapping_tasks(self, fields):
         """
-            Load access info for specified username to create data.
-            :param username: is an existing user in the system.
-        """
-        user = User.objects.get(username=username)
-        print user.password
-        self.username = username
-        self.password = user.password
-
-    def login(self):
-        """
-            Perform a login for the user to get authenticated access
-            for subsequence create calls.
-        """
-        self.ocl = OclApi(admin=True, debug=True)
-
-        result = self.ocl.get_user_auth(self.username, self.password)
-        print 'get auth:', result.status_code
-        if len(result.text) > 0:
-            print result.json()
-
-        # now use a "normal" API interface, save the user's access permission
-        self.request = FakeRequest()
-        self.ocl.save_auth_token(self.request, result.json())
-        self.ocl = OclApi(self.request, debug=True)
-
-
-    def create_mapping(self, fields):
-        """
-        Create mappings from fields.
+        Get the mappings to create from fields.
 
         :param fields: is a list in the form of mapping_name, src_id, dest_id+
+        :returns: a list of (key, (source_cid, data)), the key identifying the mapping in
+            the journal
 
         NOTE: The API URL path version is hard coded TBW
         """
@@ -112,46 +96,73 @@ class Command(BaseCommand):
 
         if map_type == 'internal':
             map_type, code, source = fields[2].split(',')
-            print map_type, code, source
             data = {
                 'map_type': map_type,
                 'to_source_code': source,
                 'to_concept_code': code,
             }
-            result = self.ocl.create_mapping_from_concept(
-                'orgs', self.ORG_ID, self.SOURCE_ID, source_cid, data)
-            print result
-            return
+            return [('%s %s %s' % (fields[0], source_cid, fields[2]), (source_cid, data))]
 
+        tasks = []
         for dest_id in fields[2:]:
             data = {
                 'map_type': map_type,
-                'to_concept_url': '%s/v1/orgs/%s/sources/%s/concepts/%s/' % (self.api_host,
-                                                                             self.ORG_ID,
-                                                                             self.SOURCE_ID,
-                                                                             dest_id),
                 'to_concept_url': '/orgs/%s/sources/%s/concepts/%s/' % (self.ORG_ID,
                                                                         self.SOURCE_ID,
                                                                         dest_id),
             }
-            result = self.ocl.create_mapping_from_concept(
-                'orgs', self.ORG_ID, self.SOURCE_ID, source_cid, data)
-            print result
+            tasks.append(('%s %s %s' % (map_type, source_cid, dest_id), (source_cid, data)))
+        return tasks
+
+    def create_mapping(self, task):
+        """ Create a mapping from a (source_cid, data) task """
+        source_cid, data = task
+        return self.get_api().create_mapping_from_concept(
+            'orgs', self.ORG_ID, self.SOURCE_ID, source_cid, data)
+
+    def print_result(self, key, task, result, error):
+        """ Print failed mappings, and every result if verbosity > 1 """
+        if error is not None:
+            print key, error
+        elif self.verbosity > 1 or result.status_code >= 300:
+            print key, result
+
+    def iter_mapping_tasks(self, stats):
+        """
+        Yield the tasks of the lines of the input file. Invalid lines are printed and
+        counted as failures in stats, and the import goes on with the next line.
+        """
+        for line in self.input:
+            if not line.strip():
+                continue
+            try:
+                tasks = self.get_mapping_tasks(line.split())
+            except (ValueError, IndexError) as error:
+                stats.add_failure(error.__class__.__name__)
+                print line.strip(), error
+                continue
+            for task in tasks:
+                yield task
 
     def load_mappings(self):
-        """ Load mappings from file """
-        for line in self.input:
-            fields = line.split()
-            self.create_mapping(fields)
+        """ Load mappings from file and create them """
+        stats = BulkRunStats()
+        try:
+            run_bulk(self.iter_mapping_tasks(stats), self.create_mapping,
+                     concurrency=self.concurrency, rate=self.rate, journal=self.journal,
+                     stats=stats, on_result=self.print_result)
+        finally:
+            self.journal.close()
+        print stats.summary()
 
     def handle(self, *args, **options):
 
         if len(args) != 1:
             raise CommandError('mapping input text file is required.')
 
-        username = options['username']
+        self.username = options['username']
 
-        if username is None:
+        if self.username is None:
             raise CommandError('--username is required.')
 
         self.ORG_ID = options['org_id']
@@ -174,7 +185,14 @@ class Command(BaseCommand):
         except IOError:
             raise CommandError('Could not open input file %s' % input_file)
 
-        self.load_user(username)
-        self.login()
+        self.concurrency = options['concurrency']
+        self.rate = options['rate']
+        self.verbosity = int(options.get('verbosity', 1))
+        self.journal = CheckpointJournal(options['journal'] or input_file + '.journal',
+                                         restart=options['restart'])
+        if self.journal.done:
+            print 'Resuming, %d mappings already created' % len(self.journal.done)
+
+        self.connect()
 
         self.load_mappings()
@@ -1,14 +1,29 @@
 """
 Base for importing objects into OCL.
+
+ImporterCommand is a base for management commands that talk to the API as a user. The
+reference vocabularies (locales, concept classes...) are only downloaded the first time a
+command reads them, and are kept on disk in settings.REFERENCE_DATA_DISK_CACHE_DIR for
+REFERENCE_DATA_CACHE_TIMEOUT seconds, so most runs never download them at all.
 """
 #from optparse import make_option
 import os.path
 import csv
+import time
+import tempfile
+import threading
 
-#from django.core.management import BaseCommand
+import simplejson as json
+from django.conf import settings
+from django.core.management import BaseCommand
 from django.core.management import CommandError
 
 from libs.ocl import OclApi
+from apps.core import refdata
+from apps.core.bulk import StageStats, buffered, timed, run_stage, submit_batches
+from apps.core.views import _get_concept_class_list
+from apps.core.views import _get_datatype_list
+from apps.core.views import _get_source_type_list
 
 from users.models import User
 
@@ -27,6 +42,7 @@ class Importer(object):
         self.username = None
         self.password = None
         self.web_host = os.environ['OCL_WEB_HOST']
+        self.local = threading.local()
 
     def load_user(self):
         """
@@ -54,6 +70,15 @@ class Importer(object):
         self.ocl.save_auth_token(self.request, result.json())
         self.ocl = OclApi(self.request, debug=True)
 
+    def get_api(self):
+        """
+        Return an OclApi for the current thread, using the access token saved by login(),
+        for commands that send requests from several threads.
+        """
+        if not hasattr(self.local, 'ocl'):
+            self.local.ocl = OclApi(self.request, debug=True)
+        return self.local.ocl
+
     def connect(self):
         """ Login to OCL """
         self.load_user()
@@ -65,6 +90,38 @@ class Importer(object):
         f = open(self.filename, 'r')
         self.reader = csv.DictReader(f)
 
+    def iter_csv(self):
+        """ Yield the rows of the CSV file one at a time, as dictionaries """
+        with open(self.filename, 'r') as f:
+            for row in csv.DictReader(f):
+                yield row
+
+    def run_pipeline(self, validate, transform, submit, concurrency=4, batch_size=100,
+                     queue_size=1000):
+        """
+        Import the rows of the CSV file through the parse, validate, transform and submit
+        stages. Each stage runs on its own thread and passes rows to the next one through a
+        queue of at most queue_size rows, so memory use does not depend on the file size.
+
+        :param validate: function(row) returning the row, raising ValueError if it is invalid
+        :param transform: function(row) returning what submit expects
+        :param submit: function(item) sending one item to the API and returning the
+            response. Items are submitted batch_size at a time, on concurrency threads.
+            Not called in test mode.
+        :returns: list of the StageStats of each stage
+        """
+        stats = [StageStats(name) for name in ('parse', 'validate', 'transform', 'submit')]
+        rows = buffered(timed(self.iter_csv(), stats[0]), queue_size)
+        rows = buffered(run_stage(validate, rows, stats[1]), queue_size)
+        items = buffered(run_stage(transform, rows, stats[2]), queue_size)
+        if self.test_mode:
+            for _ in items:
+                pass
+        else:
+            submit_batches(items, submit, stats[3], batch_size=batch_size,
+                           concurrency=concurrency)
+        return stats
+
     def get_args(self, args, options):
         """
         Pick up common arguments like CSV file path and username
@@ -79,3 +136,90 @@ class Importer(object):
 
         if self.test_mode:
             print 'Testing only...'
+
+
+def load_reference_data(name, loader):
+    """
+    Return the named reference data from the disk cache, or from loader() if it is missing
+    or older than settings.REFERENCE_DATA_CACHE_TIMEOUT. Empty results are not cached.
+    """
+    cache_dir = settings.REFERENCE_DATA_DISK_CACHE_DIR
+    path = os.path.join(cache_dir, '%s.json' % name)
+    try:
+        if time.time() - os.path.getmtime(path) < settings.REFERENCE_DATA_CACHE_TIMEOUT:
+            with open(path, 'r') as cache_file:
+                return json.load(cache_file)
+    except (OSError, IOError, ValueError):
+        pass
+
+    value = loader()
+    if value:
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            # Write to a temporary file first so other commands never read a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+            with os.fdopen(fd, 'w') as cache_file:
+                json.dump(value, cache_file)
+            os.rename(tmp_path, path)
+        except (OSError, IOError):
+            pass
+    return value
+
+
+def delete_reference_data_files(names=None):
+    """
+    Delete the disk cache files of the named reference data, or all of them if no names are
+    passed, so that the next command loads them again. Returns the paths deleted.
+    """
+    cache_dir = settings.REFERENCE_DATA_DISK_CACHE_DIR
+    if names is None:
+        try:
+            names = [filename[:-len('.json')] for filename in os.listdir(cache_dir)
+                     if filename.endswith('.json')]
+        except OSError:
+            return []
+    deleted = []
+    for name in names:
+        path = os.path.join(cache_dir, '%s.json' % name)
+        try:
+            os.remove(path)
+            deleted.append(path)
+        except OSError:
+            pass
+    return deleted
+
+
+class reference_data(object):
+    """
+    Attribute whose value is the named reference data, loaded with load_reference_data()
+    on first access and then kept on the instance. The names are those of
+    apps.core.refdata, so that manage.py clear_reference_data <name> also clears the file.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        key = '_reference_data_%s' % self.name
+        if key not in instance.__dict__:
+            instance.__dict__[key] = load_reference_data(self.name, self.loader)
+        return instance.__dict__[key]
+
+
+class ImporterCommand(Importer, BaseCommand):
+    """ Base for management commands importing or updating objects in OCL """
+
+    # Not _get_locale_list(): its ['en'] fallback for API errors would be saved to disk
+    locale_list = reference_data('locales', lambda: [
+        d['code'] for d in refdata.reference_data.get('locales') or []])
+    source_type_list = reference_data('source_types', _get_source_type_list)
+    concept_class_list = reference_data('concept_classes', _get_concept_class_list)
+    datatype_list = reference_data('datatypes', _get_datatype_list)
+
+    def __init__(self):
+        BaseCommand.__init__(self)
+        Importer.__init__(self)
@@ -3,31 +3,28 @@ Retire concepts using the API.
 
 The input file format is a record per line, each line contains a concept id.
 manage.py retire_concepts input_file_name
+
+Concepts that are already retired in the source are skipped. The others are retired by
+--concurrency threads (default 1). With --dry-run, nothing is retired and the command only
+reports what would change. With --log, the outcome for each concept is written to a file
+as one JSON object per line, e.g.
+{"concept_id": "1234", "action": "retired", "status_code": 204}
 """
 from optparse import make_option
 import os.path
 
-from django.core.management import BaseCommand, CommandError
-
-from libs.ocl import OclApi
-from apps.core.views import _get_concept_class_list
-from apps.core.views import _get_datatype_list
-from apps.core.views import _get_source_type_list
-from apps.core.views import _get_locale_list
+import simplejson as json
 
-from users.models import User
+from django.core.management import CommandError
 
+from apps.core.bulk import run_bulk
+from .importer import ImporterCommand
 
-class FakeRequest(object):
-    """ FakeRequest class """
-    def __init__(self):
-        self.session = {}
 
-
-class Command(BaseCommand):
+class Command(ImporterCommand):
     """ manage.py Command retire_concepts """
     help = 'Retire concepts'
-    option_list = BaseCommand.option_list + (
+    option_list = ImporterCommand.option_list + (
         make_option('--username',
                     action='store',
                     dest='username',
@@ -43,48 +40,37 @@ class Command(BaseCommand):
                     dest='source_id',
                     default=None,
                     help='Source ID, e.g. OMRS'),
+        make_option('--concurrency',
+                    action='store',
+                    dest='concurrency',
+                    type='int',
+                    default=1,
+                    help='Number of concepts retired concurrently, e.g. 8'),
+        make_option('--dry-run',
+                    action='store_true',
+                    dest='dry_run',
+                    default=False,
+                    help='Only report the concepts that would be retired'),
+        make_option('--log',
+                    action='store',
+                    dest='log',
+                    default=None,
+                    help='File to write the result for each concept to, as JSON lines'),
     )
 
     def __init__(self):
         super(Command, self).__init__()
-        self.ocl = None
-        self.username = None
-        self.password = None
         self.api_host = os.environ['OCL_API_HOST']
-        self.web_host = os.environ['OCL_WEB_HOST']
         self.ORG_ID = None
         self.SOURCE_ID = None
-        self.locale_list = [d['code'] for d in _get_locale_list()]
-        self.source_type_list = _get_source_type_list()
-        self.concept_class_list = _get_concept_class_list()
-        self.datatype_list = _get_datatype_list()
+        self.log = None
 
-    def load_user(self, username):
-        """
-            Load access info for specified username to create data.
-            :param username: is an existing user in the system.
-        """
-        user = User.objects.get(username=username)
-        print user.password
-        self.username = username
-        self.password = user.password
-
-    def login(self):
-        """
-            Perform a login for the user to get authenticated access
-            for subsequence create calls.
-        """
-        self.ocl = OclApi(admin=True, debug=True)
-
-        result = self.ocl.get_user_auth(self.username, self.password)
-        print 'get auth:', result.status_code
-        if len(result.text) > 0:
-            print result.json()
-
-        # now use a "normal" API interface, save the user's access permission
-        self.request = FakeRequest()
-        self.ocl.save_auth_token(self.request, result.json())
-        self.ocl = OclApi(self.request, debug=True)
+    def get_retired_concept_ids(self):
+        """ Get the IDs of the concepts of the source that are already retired """
+        concepts = self.ocl.iter_json_list(
+            'orgs', self.ORG_ID, 'sources', self.SOURCE_ID, 'concepts',
+            params={'retired': 'true', 'includeRetired': 'true', 'limit': 0})
+        return set(concept['id'] for concept in concepts if concept.get('retired'))
 
     def retire(self, concept_id):
         """
@@ -95,24 +81,70 @@ class Command(BaseCommand):
         """
 
         # retired_reason is null in CIEL, so no need to set update_comment
-        result = self.ocl.delete(
+        return self.get_api().delete(
             'orgs', self.ORG_ID, 'sources', self.SOURCE_ID, 'concepts', concept_id)
-        print result
+
+    def log_result(self, concept_id, action, status_code=None, error=None):
+        """ Write the outcome for a concept to the result log, if any """
+        if self.log is None:
+            return
+        result = {'concept_id': concept_id, 'action': action}
+        if status_code is not None:
+            result['status_code'] = status_code
+        if error is not None:
+            result['error'] = error
+        self.log.write(json.dumps(result) + '\n')
+
+    def print_result(self, concept_id, payload, result, error):
+        """ Log the result of a retire request, printing failures """
+        if error is not None:
+            print concept_id, error
+            self.log_result(concept_id, 'failed', error=str(error))
+        elif 200 <= result.status_code < 300:
+            self.log_result(concept_id, 'retired', status_code=result.status_code)
+        else:
+            print concept_id, result
+            self.log_result(concept_id, 'failed', status_code=result.status_code)
 
     def retire_concepts(self):
-        """ Load concepts to retire from file, iterate through them, and retire """
+        """ Load concepts to retire from file, skip those already retired, and retire the others """
+        concept_ids = []
+        seen = set()
         for line in self.input:
             cid = line.strip()
-            self.retire(cid)
+            if cid and cid not in seen:
+                seen.add(cid)
+                concept_ids.append(cid)
+        retired_concept_ids = self.get_retired_concept_ids()
+
+        to_retire = []
+        for cid in concept_ids:
+            if cid in retired_concept_ids:
+                self.log_result(cid, 'already_retired')
+            else:
+                to_retire.append(cid)
+        print '%d concepts to retire, %d already retired' % (
+            len(to_retire), len(concept_ids) - len(to_retire))
+
+        if self.dry_run:
+            for cid in to_retire:
+                print 'Would retire', cid
+                self.log_result(cid, 'would_retire')
+            return
+
+        stats = run_bulk(((cid, cid) for cid in to_retire), self.retire,
+                         concurrency=self.concurrency, on_result=self.print_result)
+        stats.skipped = len(concept_ids) - len(to_retire)
+        print stats.summary()
 
     def handle(self, *args, **options):
 
         if len(args) != 1:
             raise CommandError('mapping input text file is required.')
 
-        username = options['username']
+        self.username = options['username']
 
-        if username is None:
+        if self.username is None:
             raise CommandError('--username is required.')
 
         self.ORG_ID = options['org_id']
@@ -135,7 +167,18 @@ class Command(BaseCommand):
         except IOError:
             raise CommandError('Could not open input file %s' % input_file)
 
-        self.load_user(username)
-        self.login()
+        self.concurrency = options['concurrency']
+        self.dry_run = options['dry_run']
+        if options['log']:
+            try:
+                self.log = open(options['log'], 'w')
+            except IOError:
+                raise CommandError('Could not open log file %s' % options['log'])
 
-        self.retire_concepts()
+        self.connect()
+
+        try:
+            self.retire_concepts()
+        finally:
+            if self.log is not None:
+                self.log.close()
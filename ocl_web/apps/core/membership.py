@@ -0,0 +1,105 @@
+"""
+Organization membership checks for the current user, used by the if_can_change template tag.
+
+Instead of asking the API about each org a page references, the list of orgs the user
+belongs to is loaded once, memoized for the rest of the request and cached for
+ORG_MEMBERSHIP_CACHE_TIMEOUT seconds.
+"""
+import logging
+from functools import partial
+
+from django.conf import settings
+from django.core import cache
+
+from libs.ocl import OclApi
+
+logger = logging.getLogger('oclweb')
+
+DEFAULT_ORG_MEMBERSHIP_CACHE_TIMEOUT = 60
+
+
+def get_membership_cache_key(username):
+    """ Return the cache key of the org memberships of a user """
+    return 'org_memberships:%s' % username
+
+
+def invalidate_org_memberships(username):
+    """ Drop the cached org memberships of a user, e.g. after they joined or left an org """
+    cache.get_cache('default').delete(get_membership_cache_key(username))
+
+
+def get_org_membership_resolver(request):
+    """ Return the org membership resolver of the request, creating it on first use """
+    resolver = getattr(request, 'org_membership_resolver', None)
+    if resolver is None:
+        resolver = OrgMembershipResolver(request)
+        request.org_membership_resolver = resolver
+    return resolver
+
+
+class OrgMembershipResolver(object):
+    """
+    Answers whether the authenticated user of a request is a member of an org.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.username = request.user.username
+        self.member_org_ids = None
+        self.loaded = False
+        # Answers of single org checks, only used if the user's org list cannot be loaded
+        self.memberships = {}
+
+    def load_member_org_ids(self):
+        """
+        Return the set of ids of the orgs the user belongs to, or None if the API
+        could not provide it.
+        """
+        if not self.loaded:
+            self.loaded = True
+            local_cache = cache.get_cache('default')
+            key = get_membership_cache_key(self.username)
+            org_ids = local_cache.get(key)
+            if org_ids is None:
+                api = OclApi(self.request, debug=True)
+                response = api.get('users', self.username, 'orgs', params={'limit': 0})
+                if response.status_code == 200:
+                    org_ids = [org['id'] for org in response.json()]
+                    local_cache.set(key, org_ids, getattr(
+                        settings, 'ORG_MEMBERSHIP_CACHE_TIMEOUT',
+                        DEFAULT_ORG_MEMBERSHIP_CACHE_TIMEOUT))
+                else:
+                    logger.warning('Could not load orgs of user %s: %s' % (
+                        self.username, response.status_code))
+            if org_ids is not None:
+                self.member_org_ids = set(org_ids)
+        return self.member_org_ids
+
+    def check_membership(self, api, org_id):
+        """ Ask the API whether the user is a member of a single org """
+        results = api.get('orgs', org_id, 'members', self.username)
+        return results.status_code == 204
+
+    def prefetch(self, org_ids):
+        """
+        Resolve the membership of all the passed orgs in one pass, so that later
+        is_member() calls for them do not hit the API.
+        """
+        if self.load_member_org_ids() is not None:
+            return
+        org_ids = [org_id for org_id in set(org_ids) if org_id not in self.memberships]
+        if not org_ids:
+            return
+        api = OclApi(self.request, debug=True)
+        answers = OclApi.gather(*[partial(self.check_membership, api, org_id)
+                                  for org_id in org_ids])
+        self.memberships.update(zip(org_ids, answers))
+
+    def is_member(self, org_id):
+        """ Returns True if the user is a member of the org """
+        member_org_ids = self.load_member_org_ids()
+        if member_org_ids is not None:
+            return org_id in member_org_ids
+        if org_id not in self.memberships:
+            self.prefetch([org_id])
+        return self.memberships[org_id]
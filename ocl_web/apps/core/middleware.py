@@ -0,0 +1,60 @@
+"""
+Middleware reporting how much of the time spent on a request went to OCL API calls, and
+scoping the API resources fetched to each request.
+"""
+import time
+import logging
+
+from django.conf import settings
+
+from libs.ocl.accounting import start_recording, stop_recording
+from libs.ocl.identity_map import attach_identity_map
+
+logger = logging.getLogger('oclweb')
+
+DEFAULT_API_CALL_BUDGET = 25
+
+
+class ApiCallAccountingMiddleware(object):
+    """
+    Records the API calls made while handling each request (see libs/ocl/accounting.py).
+
+    - the totals are sent in a Server-Timing header, shown by the browser developer tools:
+      api (number of calls and their summed latency), and total (time spent in Django)
+    - the recorder is available to views and debug panels as request.api_calls
+    - a warning is logged when a request makes more than settings.API_CALL_BUDGET calls,
+      with the paths requested more than once, which usually point to an N+1 pattern
+    """
+
+    def process_request(self, request):
+        request.api_calls = start_recording()
+        request.api_calls_start_time = time.time()
+
+    def process_response(self, request, response):
+        recorder = getattr(request, 'api_calls', None)
+        if recorder is None:
+            return response
+        stop_recording()
+
+        total_ms = (time.time() - request.api_calls_start_time) * 1000
+        response['Server-Timing'] = 'api;desc="%d calls";dur=%.1f, total;dur=%.1f' % (
+            recorder.count, recorder.latency_ms, total_ms)
+
+        budget = getattr(settings, 'API_CALL_BUDGET', DEFAULT_API_CALL_BUDGET)
+        if budget and recorder.count > budget:
+            logger.warning('%s %s made %d API calls (budget %d, %.1fms), repeated: %s',
+                           request.method, request.path, recorder.count, budget,
+                           recorder.latency_ms,
+                           ', '.join('%s x%d' % repeated for repeated in recorder.most_repeated()))
+        return response
+
+
+class IdentityMapMiddleware(object):
+    """
+    Attaches an empty identity map to each request (see libs/ocl/identity_map.py), so that
+    the OclApi instances built with the request fetch each resource at most once. The map
+    is dropped with the request.
+    """
+
+    def process_request(self, request):
+        attach_identity_map(request)
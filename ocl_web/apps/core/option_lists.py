@@ -0,0 +1,93 @@
+"""
+Option lists of the combo box widgets, published as content-hashed JSON assets.
+
+Instead of inlining a whole vocabulary (map types, locales, concept classes...) in every
+form page, ComboBoxWidget and MultipleInputWidget reference a named option list by URL:
+
+    /core/options/lists/map_types/<md5 of the content>.json
+
+The URL changes whenever the content does, so the asset is served with a long-lived public
+Cache-Control header and browsers download each vocabulary once across pages. A request
+for another hash, outdated or computed by another server process, gets the current content
+without being cached.
+
+The serialized list and its hash are kept in the Django cache for OPTION_LIST_CACHE_TIMEOUT
+seconds, so rendering a widget neither serializes nor hashes the list.
+"""
+import hashlib
+
+import simplejson as json
+from django.conf import settings
+from django.core import cache
+from django.core.urlresolvers import reverse
+
+DEFAULT_CACHE_TIMEOUT = 5 * 60
+
+
+def to_awesomplete_list(data_list):
+    """
+    Return the entries of an Awesomplete list for a data list of values or [value, label]
+    pairs; Awesomplete takes pairs as [label, value].
+    """
+    return [[item[1], item[0]] if isinstance(item, list) else item for item in data_list]
+
+
+class OptionListRegistry(object):
+    """
+    Registry of named option list loaders, whose serialized results are cached by content hash.
+    """
+
+    def __init__(self, cache_alias='default', key_prefix='option_list'):
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self.loaders = {}
+
+    @property
+    def cache(self):
+        """ The Django cache backing this registry """
+        return cache.get_cache(self.cache_alias)
+
+    def register(self, name, loader):
+        """
+        Register an option list loader.
+        :param name: name of the option list, used in its URL.
+        :param loader: function without arguments returning a list of values or of
+                       [value, label] pairs.
+        """
+        self.loaders[name] = loader
+
+    def __contains__(self, name):
+        return name in self.loaders
+
+    def get_key(self, name):
+        """ Return the cache key of the named option list """
+        return '%s:%s' % (self.key_prefix, name)
+
+    def get(self, name):
+        """
+        Return (content, version) of the named option list: its JSON serialization, and the
+        md5 of the content. Empty lists are returned but not cached, so that API errors are
+        retried.
+        """
+        entry = self.cache.get(self.get_key(name))
+        if entry is not None:
+            return entry
+        content = json.dumps(to_awesomplete_list(self.loaders[name]()))
+        entry = (content, hashlib.md5(content).hexdigest())
+        if content != '[]':
+            timeout = getattr(settings, 'OPTION_LIST_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+            self.cache.set(self.get_key(name), entry, timeout)
+        return entry
+
+    def get_url(self, name):
+        """ Return the URL of the current version of the named option list """
+        _, version = self.get(name)
+        return reverse('option-list-asset', kwargs={'name': name, 'version': version})
+
+    def invalidate(self, name=None):
+        """ Drop the named option list from the cache, or all of them if no name is passed """
+        names = [name] if name else self.loaders.keys()
+        self.cache.delete_many([self.get_key(n) for n in names])
+
+
+option_lists = OptionListRegistry()
@@ -0,0 +1,33 @@
+"""
+django-debug-toolbar panel listing the OCL API calls made for the current page.
+Requires ApiCallAccountingMiddleware.
+"""
+from debug_toolbar.panels import Panel
+
+
+class ApiCallsPanel(Panel):
+    """ Panel showing the API calls recorded by ApiCallAccountingMiddleware """
+
+    title = 'OCL API calls'
+
+    template = 'core/api_calls_panel.html'
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        if not stats:
+            return ''
+        return '%d calls in %.1fms' % (stats['count'], stats['latency_ms'])
+
+    def process_response(self, request, response):
+        recorder = getattr(request, 'api_calls', None)
+        if recorder is None:
+            return
+        self.record_stats({
+            'calls': list(recorder.calls),
+            'count': recorder.count,
+            'latency_ms': recorder.latency_ms,
+            'bytes': recorder.bytes,
+            'repeated': recorder.most_repeated(limit=10),
+            'identity_map_hits': getattr(getattr(request, 'api_resources', None), 'hits', 0),
+        })
@@ -0,0 +1,158 @@
+"""
+Cache for the OCL reference vocabularies (concept classes, datatypes, locales, map types...).
+
+These lists live in the OCL/<X> sources of the API and are downloaded in full, but they
+change very rarely, so they are kept in the Django cache:
+- an entry is fresh for REFERENCE_DATA_CACHE_TIMEOUT seconds
+- once it is stale it is still served for another REFERENCE_DATA_STALE_TIMEOUT seconds
+  while a single background refresh fetches the new value (stale-while-revalidate)
+- on a cold cache only one caller loads the list, the others wait for its result
+- entries can be dropped explicitly with invalidate(), or with manage.py clear_reference_data
+"""
+import time
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.core import cache
+
+from libs.ocl.concurrency import submit
+
+logger = logging.getLogger('oclweb')
+
+DEFAULT_CACHE_TIMEOUT = 24 * 60 * 60
+DEFAULT_STALE_TIMEOUT = 7 * 24 * 60 * 60
+
+# Seconds a refresh may hold the load lock before another caller is allowed to retry
+LOCK_TIMEOUT = 30
+# Seconds a caller waits for another caller loading a cold entry, before loading it itself
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.1
+
+
+class ReferenceDataCache(object):
+    """
+    Registry of named reference data loaders whose results are cached in the Django cache.
+    """
+
+    def __init__(self, cache_alias='default', key_prefix='refdata'):
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self.loaders = {}
+
+    @property
+    def cache(self):
+        """ The Django cache backing this reference data cache """
+        return cache.get_cache(self.cache_alias)
+
+    def register(self, name, loader, timeout=None):
+        """
+        Register a reference data loader.
+        :param name: name of the reference data, used in the cache key.
+        :param loader: function without arguments returning the list. Empty results are
+                       returned but not cached, so that API errors are retried.
+        :param timeout: optional, number of seconds the list is fresh for.
+        """
+        self.loaders[name] = (loader, timeout)
+
+    def get_key(self, name):
+        """ Return the cache key of the named reference data """
+        return '%s:%s' % (self.key_prefix, name)
+
+    def get_lock_key(self, name):
+        """ Return the cache key of the lock held while loading the named reference data """
+        return '%s:%s:lock' % (self.key_prefix, name)
+
+    def get(self, name):
+        """
+        Return the named reference data, loading it only when it is not cached yet.
+        """
+        entry = self.cache.get(self.get_key(name))
+        if entry is not None:
+            value, fresh_until = entry
+            if time.time() >= fresh_until and self._acquire_lock(name):
+                submit(self._refresh_in_background, name)
+            return value
+
+        # Cold cache, a single caller loads the data while the others wait for it
+        if self._acquire_lock(name):
+            try:
+                return self._load(name)
+            finally:
+                self._release_lock(name)
+        deadline = time.time() + LOCK_WAIT
+        while time.time() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = self.cache.get(self.get_key(name))
+            if entry is not None:
+                return entry[0]
+        logger.warning('Timed out waiting for reference data %s, loading it' % name)
+        return self._load(name)
+
+    def refresh(self, name):
+        """ Load the named reference data from the API now and cache it """
+        return self._load(name)
+
+    def invalidate(self, name=None):
+        """
+        Drop the named reference data from the cache, or all of it if no name is passed.
+        The next get() loads it again from the API.
+        """
+        names = [name] if name else self.loaders.keys()
+        self.cache.delete_many([self.get_key(n) for n in names])
+
+    def _load(self, name):
+        """ Call the loader of the named reference data and cache its non-empty result """
+        loader, timeout = self.loaders[name]
+        if timeout is None:
+            timeout = getattr(settings, 'REFERENCE_DATA_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+        stale_timeout = getattr(settings, 'REFERENCE_DATA_STALE_TIMEOUT', DEFAULT_STALE_TIMEOUT)
+
+        value = loader()
+        if value:
+            self.cache.set(self.get_key(name), (value, time.time() + timeout),
+                           timeout + stale_timeout)
+        return value
+
+    def _refresh_in_background(self, name):
+        """ Refresh stale reference data, keeping the stale value if the refresh fails """
+        try:
+            self._load(name)
+        except Exception:   # pylint: disable=W0703
+            logger.exception('Failed to refresh reference data %s' % name)
+        finally:
+            self._release_lock(name)
+
+    def _acquire_lock(self, name):
+        """ Returns True if this caller is the one that should load the named reference data """
+        return self.cache.add(self.get_lock_key(name), True, LOCK_TIMEOUT)
+
+    def _release_lock(self, name):
+        self.cache.delete(self.get_lock_key(name))
+
+
+reference_data = ReferenceDataCache()
+
+
+def cached_reference_data(name, timeout=None, default=None):
+    """
+    Decorator caching the result of a reference data loader in reference_data.
+    :param default: optional, returned instead of an empty result (e.g. if the API is down).
+
+    The decorated function gets invalidate() and refresh() attributes, e.g.
+    _get_map_type_list.invalidate()
+    """
+    def decorator(loader):
+        reference_data.register(name, loader, timeout=timeout)
+
+        @wraps(loader)
+        def get_reference_data():
+            value = reference_data.get(name)
+            if not value and default is not None:
+                return default
+            return value
+
+        get_reference_data.invalidate = lambda: reference_data.invalidate(name)
+        get_reference_data.refresh = lambda: reference_data.refresh(name)
+        return get_reference_data
+    return decorator
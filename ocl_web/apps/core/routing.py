@@ -0,0 +1,188 @@
+"""
+Fast URL resolution and reversal for the large owner-scoped URL configurations.
+
+config/orgs_urls.py and config/users_urls.py have well over a hundred patterns sharing long
+prefixes (/:owner/sources/:source/concepts/:concept/...), which Django tests one by one on
+every request. PrefixTreeResolver indexes the patterns of an included URL configuration in
+a tree of their path segments, literal ("sources") or named group ("(?P<source>...)"), so
+that only the few patterns with the shape of the path are tested, in their original order:
+the view resolved is the one Django would resolve.
+
+cached_reverse() is a drop-in replacement of reverse(name, kwargs=...) for names reversed
+in loops, e.g. a concept-home URL per mapping: the URL template and the compiled pattern
+of the name are looked up once, instead of on each call. get_url_template() returns such a
+template, for code formatting many URLs of a view itself (see libs.ocl.mapping_classifier).
+"""
+import re
+
+from django.conf import settings
+from django.core.urlresolvers import (RegexURLResolver, ResolverMatch, Resolver404,
+                                      get_resolver, get_script_prefix, get_urlconf, reverse)
+from django.utils.encoding import force_text, iri_to_uri
+from django.utils.http import urlquote
+
+# Path segments of a pattern the tree can index: literals, and named groups of a single
+# character class not matching "/"; patterns with other segments are always tested
+LITERAL_SEGMENT = re.compile(r'^[a-zA-Z0-9_\-]*$')
+GROUP_SEGMENT = re.compile(r'^\(\?P<\w+>\[[^\^\]/][^\]/]*\][+*]\)$')
+
+
+class _Node(object):
+    """ Node of the prefix tree: the patterns ending here, and the child nodes by segment """
+
+    def __init__(self):
+        self.literals = {}
+        self.group = None
+        self.patterns = []
+
+
+def _split_pattern(pattern):
+    """ Return the path segments of a pattern regex, or None if the tree cannot index it """
+    regex = pattern.regex.pattern
+    if not (regex.startswith('^') and regex.endswith('$')) or regex.endswith('\\$'):
+        return None
+    segments = regex[1:-1].split('/')
+    for segment in segments:
+        if not (LITERAL_SEGMENT.match(segment) or GROUP_SEGMENT.match(segment)):
+            return None
+    return segments
+
+
+class PrefixTreeResolver(RegexURLResolver):
+    """
+    RegexURLResolver testing only the patterns matching the segments of the path, e.g.
+    PrefixTreeResolver(r'^orgs/', 'config.orgs_urls') in place of
+    url(r'^orgs/', include('config.orgs_urls')).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(PrefixTreeResolver, self).__init__(*args, **kwargs)
+        self._tree = None
+
+    @property
+    def tree(self):
+        """ (root node, indexes of the patterns that are always tested), built at first use """
+        if self._tree is None:
+            root, unindexed = _Node(), []
+            for index, pattern in enumerate(self.url_patterns):
+                segments = _split_pattern(pattern)
+                if segments is None:
+                    unindexed.append(index)
+                    continue
+                node = root
+                for segment in segments:
+                    if LITERAL_SEGMENT.match(segment):
+                        node = node.literals.setdefault(segment, _Node())
+                    else:
+                        node.group = node.group or _Node()
+                        node = node.group
+                node.patterns.append(index)
+            self._tree = (root, unindexed)
+        return self._tree
+
+    def get_candidates(self, path):
+        """ Return the patterns that may match the path, in their original order """
+        root, indexes = self.tree
+        indexes = list(indexes)
+        segments = path.split('/')
+        nodes = [root]
+        for segment in segments:
+            next_nodes = []
+            for node in nodes:
+                if segment in node.literals:
+                    next_nodes.append(node.literals[segment])
+                if node.group is not None:
+                    next_nodes.append(node.group)
+            nodes = next_nodes
+            if not nodes:
+                break
+        for node in nodes:
+            indexes.extend(node.patterns)
+        url_patterns = self.url_patterns
+        return [url_patterns[index] for index in sorted(indexes)]
+
+    def resolve(self, path):
+        match = self.regex.search(path)
+        if not match:
+            raise Resolver404({'path': path})
+        new_path = path[match.end():]
+        for pattern in self.get_candidates(new_path):
+            try:
+                sub_match = pattern.resolve(new_path)
+            except Resolver404:
+                continue
+            if sub_match:
+                sub_match_dict = dict(match.groupdict(), **self.default_kwargs)
+                sub_match_dict.update(sub_match.kwargs)
+                return ResolverMatch(sub_match.func, sub_match.args, sub_match_dict,
+                                     sub_match.url_name, self.app_name or sub_match.app_name,
+                                     [self.namespace] + sub_match.namespaces)
+        raise Resolver404({'tried': [[pattern] for pattern in self.url_patterns],
+                           'path': new_path})
+
+
+# (URL configuration, name) -> [(URL template, parameter names, compiled pattern)]
+_reverse_templates = {}
+
+
+def _get_reverse_templates(urlconf, viewname):
+    templates = []
+    for possibility, pattern, defaults in get_resolver(urlconf).reverse_dict.getlist(viewname):
+        if defaults:
+            continue
+        for result, params in possibility:
+            templates.append((result, frozenset(params), re.compile('^' + pattern, re.UNICODE)))
+    return templates
+
+
+def cached_reverse(viewname, kwargs=None):
+    """
+    Return the URL of the named view for the keyword arguments, like
+    reverse(viewname, kwargs=kwargs), looking up the templates of the name only once.
+    Falls back on reverse() for the names and arguments it does not handle.
+    :raises: NoReverseMatch like reverse()
+    """
+    kwargs = kwargs or {}
+    urlconf = get_urlconf() or settings.ROOT_URLCONF
+    key = (urlconf, viewname)
+    templates = _reverse_templates.get(key)
+    if templates is None:
+        templates = _reverse_templates[key] = _get_reverse_templates(urlconf, viewname)
+
+    text_kwargs = dict((k, force_text(v)) for (k, v) in kwargs.items())
+    params = frozenset(text_kwargs)
+    for template, template_params, regex in templates:
+        if params == template_params and regex.search(template % text_kwargs):
+            quoted_kwargs = dict((k, urlquote(v)) for (k, v) in text_kwargs.items())
+            return iri_to_uri(urlquote(get_script_prefix()) + template % quoted_kwargs)
+    return reverse(viewname, kwargs=kwargs)
+
+
+# (URL configuration, name, parameters) -> URL template, for get_url_template()
+_url_templates = {}
+
+
+def get_url_template(viewname, **params):
+    """
+    Return a template of the URLs of the named view, to format with URL quoted values, e.g.
+    get_url_template('source-home', org='owner', source='source') returns
+    '/orgs/%(owner)s/sources/%(source)s/'. The keyword arguments map the URL parameters to
+    the keys of the template. Memoized.
+    :raises: NoReverseMatch like reverse()
+    """
+    key = (get_urlconf() or settings.ROOT_URLCONF, viewname, tuple(sorted(params.items())))
+    template = _url_templates.get(key)
+    if template is None:
+        placeholders = dict((param, 'URLPARAM%dX' % index)
+                            for index, param in enumerate(sorted(params)))
+        template = reverse(viewname, kwargs=placeholders).replace('%', '%%')
+        for param, placeholder in placeholders.items():
+            template = template.replace(placeholder, '%%(%s)s' % params[param])
+        _url_templates[key] = template
+    return template
+
+
+def clear_reverse_cache():
+    """ Forget the URL templates looked up by cached_reverse() and get_url_template() """
+    _reverse_templates.clear()
+    _url_templates.clear()
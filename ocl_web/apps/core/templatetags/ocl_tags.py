@@ -8,7 +8,7 @@ import re
 import dateutil.parser
 from django import template
 from django.template.base import (Node, NodeList)
-from libs.ocl import OclApi
+from apps.core.membership import get_org_membership_resolver
 
 register = template.Library()
 
@@ -350,7 +350,8 @@ def simple_pager(page, name, url=None, pager_size='', hide_xs=False):
     """
         Display a simple pager with N-M of P {name}[<] [>]
 
-        :param page: is a django paginator Page object.
+        :param page: is a django paginator Page object, or a CountPage from
+            apps.core.utils.CountPaginator for API searches.
         :param name: is for display the item's name.
         :url: is the GET url used to invoke the other page, usually
             includes query parameters.
@@ -415,11 +416,8 @@ class IfCanChangeNode(Node):
 
         elif obj.get('type') == 'Organization':     # pylint: disable=E1101
             # If org, authenticated user can access only if they are a member of the org
-            api = OclApi(context['request'], debug=True)
-            results = api.get('orgs', obj.get('id'), 'members', user.username)  # pylint: disable=E1101
-            if results.status_code == 204:
-                has_access = True
-            print 'ACCESS Check on org:', results.status_code
+            resolver = get_org_membership_resolver(context['request'])
+            has_access = resolver.is_member(obj.get('id'))      # pylint: disable=E1101
 
         elif obj.get('type') == 'User':     # pylint: disable=E1101
             # If user, authenticated user can access only if they are that user
@@ -428,11 +426,8 @@ class IfCanChangeNode(Node):
 
         elif obj.get('owner_type') == 'Organization':       # pylint: disable=E1101
             # If resource is owned by an org, then user must be a member of the org
-            api = OclApi(context['request'], debug=True)
-            results = api.get('orgs', obj.get('owner'), 'members', user.username)       # pylint: disable=E1101
-            if results.status_code == 204:
-                has_access = True
-            print 'ACCESS Check on ' + obj.get('type') + ':', results.status_code       # pylint: disable=E1101
+            resolver = get_org_membership_resolver(context['request'])
+            has_access = resolver.is_member(obj.get('owner'))       # pylint: disable=E1101
 
         elif obj.get('owner_type') == 'User':       # pylint: disable=E1101
             # If resource is owned by a user, then authenticated user must own the resource
@@ -1,6 +1,29 @@
+import os
+import shutil
+import tempfile
+import time
+from StringIO import StringIO
 from unittest import TestCase
-from apps.core.utils import SearchStringFormatter
-from django.http import QueryDict
+from apps.core.utils import SearchStringFormatter, CountPaginator
+from apps.core.refdata import ReferenceDataCache
+from apps.core.membership import OrgMembershipResolver, invalidate_org_memberships
+from apps.core.bulk import BulkRunStats, CheckpointJournal, RateLimiter, run_bulk
+from apps.core.management.commands.importer import Importer, ImporterCommand, reference_data
+from apps.core.management.commands.import_mappings import Command as ImportMappingsCommand
+from apps.core.middleware import ApiCallAccountingMiddleware
+from apps.core.views import RepoVersionsJsonView, CsvExportView, OptionListAssetView
+from apps.core.option_lists import OptionListRegistry
+from apps.core.fields import ComboBoxWidget
+from apps.core.routing import PrefixTreeResolver, cached_reverse, get_url_template
+from django.core.management import call_command
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.core.urlresolvers import RegexURLResolver, Resolver404, NoReverseMatch, reverse
+from django.http import HttpResponse, QueryDict
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from mock import MagicMock, patch
+from requests.models import Response
+from libs.tests.test_response_cache import make_response
 
 
 class FakeRequest(object):
@@ -49,3 +72,458 @@ class SearchStringFormatterTests(TestCase):
         SearchStringFormatter.add_wildcard(request)
 
         self.assertTrue('q' not in request.GET)
+
+
+class CountPaginatorTests(TestCase):
+    def assert_same_page(self, count, per_page, number):
+        page = CountPaginator(count, per_page).page(number)
+        expected = Paginator(range(count), per_page).page(number)
+        for attr in ('has_next', 'has_previous', 'has_other_pages', 'start_index', 'end_index'):
+            self.assertEquals(getattr(page, attr)(), getattr(expected, attr)(), attr)
+        self.assertEquals(page.paginator.num_pages, expected.paginator.num_pages)
+        self.assertEquals(list(page.paginator.page_range), expected.paginator.page_range)
+
+    def test_pages_match_django_paginator(self):
+        for count, per_page, number in ((0, 25, 1), (1, 25, 1), (25, 25, 1), (26, 25, 2),
+                                        (100, 10, 1), (100, 10, 5), (100, 10, 10)):
+            self.assert_same_page(count, per_page, number)
+
+    def test_large_count(self):
+        page = CountPaginator(10 ** 9, 25).page('3')
+        self.assertEquals(page.paginator.num_pages, 40000000)
+        self.assertEquals((page.start_index(), page.end_index()), (51, 75))
+        self.assertEquals((page.previous_page_number(), page.next_page_number()), (2, 4))
+
+    def test_no_limit_is_single_page(self):
+        page = CountPaginator(120, 0).page(1)
+        self.assertEquals((page.start_index(), page.end_index()), (1, 120))
+        self.assertFalse(page.has_other_pages())
+
+    def test_invalid_page(self):
+        paginator = CountPaginator(30, 25)
+        self.assertRaises(PageNotAnInteger, paginator.page, 'last')
+        self.assertRaises(EmptyPage, paginator.page, 0)
+        self.assertRaises(EmptyPage, paginator.page, 3)
+
+
+class ReferenceDataCacheTests(TestCase):
+    def setUp(self):
+        self.reference_data = ReferenceDataCache(key_prefix='test_refdata')
+        self.loader = MagicMock(return_value=['SAME-AS', 'NARROWER-THAN'])
+        self.reference_data.register('map_types', self.loader, timeout=60)
+        self.reference_data.invalidate()
+
+    def test_get_loads_once_then_serves_from_cache(self):
+        self.assertEquals(self.reference_data.get('map_types'), ['SAME-AS', 'NARROWER-THAN'])
+        self.assertEquals(self.reference_data.get('map_types'), ['SAME-AS', 'NARROWER-THAN'])
+        self.assertEquals(self.loader.call_count, 1)
+
+    def test_invalidate_forces_reload(self):
+        self.reference_data.get('map_types')
+        self.reference_data.invalidate('map_types')
+        self.reference_data.get('map_types')
+        self.assertEquals(self.loader.call_count, 2)
+
+    def test_empty_result_is_not_cached(self):
+        self.loader.return_value = []
+        self.reference_data.get('map_types')
+        self.reference_data.get('map_types')
+        self.assertEquals(self.loader.call_count, 2)
+
+    @patch('apps.core.refdata.submit')
+    def test_stale_entry_is_served_while_refreshed(self, mock_submit):
+        self.reference_data.get('map_types')
+        self.loader.return_value = ['SAME-AS']
+        with patch('apps.core.refdata.time.time', return_value=time.time() + 120):
+            self.assertEquals(self.reference_data.get('map_types'), ['SAME-AS', 'NARROWER-THAN'])
+            self.assertEquals(mock_submit.call_count, 1)
+            # The refresh holds the lock, so a second stale read does not start another one
+            self.reference_data.get('map_types')
+            self.assertEquals(mock_submit.call_count, 1)
+            mock_submit.call_args[0][0](*mock_submit.call_args[0][1:])
+        self.assertEquals(self.reference_data.get('map_types'), ['SAME-AS'])
+
+
+class FakeUser(object):
+    """ FakeUser class """
+    username = 'testUser'
+
+
+class OrgMembershipResolverTests(TestCase):
+    def setUp(self):
+        invalidate_org_memberships('testUser')
+        self.request = FakeRequest({})
+        self.request.session = {}
+        self.request.user = FakeUser()
+
+    @patch('libs.ocl.OclApi.get')
+    def test_is_member_loads_user_orgs_once(self, mock_get):
+        response = MagicMock(spec=Response, status_code=200)
+        response.json.return_value = [{'id': 'CIEL'}, {'id': 'OCL'}]
+        mock_get.return_value = response
+
+        resolver = OrgMembershipResolver(self.request)
+        self.assertTrue(resolver.is_member('CIEL'))
+        self.assertFalse(resolver.is_member('WHO'))
+        self.assertTrue(OrgMembershipResolver(self.request).is_member('OCL'))
+        mock_get.assert_called_once_with('users', 'testUser', 'orgs', params={'limit': 0})
+
+    @patch('libs.ocl.OclApi.get')
+    def test_is_member_falls_back_to_member_check(self, mock_get):
+        responses = {
+            ('users', 'testUser', 'orgs'): MagicMock(spec=Response, status_code=500),
+            ('orgs', 'CIEL', 'members', 'testUser'): MagicMock(spec=Response, status_code=204),
+            ('orgs', 'WHO', 'members', 'testUser'): MagicMock(spec=Response, status_code=404),
+        }
+        mock_get.side_effect = lambda *args, **kwargs: responses[args]
+
+        resolver = OrgMembershipResolver(self.request)
+        resolver.prefetch(['CIEL', 'WHO'])
+        self.assertTrue(resolver.is_member('CIEL'))
+        self.assertFalse(resolver.is_member('WHO'))
+        self.assertEquals(mock_get.call_count, 3)
+
+
+class BulkRunTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.journal_path = os.path.join(self.tmp_dir, 'mappings.txt.journal')
+
+    def run_import(self, tasks, status_codes):
+        journal = CheckpointJournal(self.journal_path)
+        try:
+            return run_bulk(tasks, lambda payload: MagicMock(status_code=status_codes[payload]),
+                            concurrency=4, journal=journal)
+        finally:
+            journal.close()
+
+    def test_interrupted_run_resumed_from_journal(self):
+        tasks = [('q_and_a 985 %d' % i, i) for i in range(10)]
+        stats = self.run_import(tasks, dict((i, 500 if i % 3 == 0 else 201) for i in range(10)))
+        self.assertEquals((stats.succeeded, stats.failed, stats.skipped), (6, 4, 0))
+        self.assertEquals(stats.errors[500], 4)
+
+        stats = self.run_import(tasks, dict((i, 201) for i in range(10)))
+        self.assertEquals((stats.succeeded, stats.failed, stats.skipped), (4, 0, 6))
+        journal = CheckpointJournal(self.journal_path, restart=True)
+        journal.close()
+        self.assertEquals(len(journal.done), 0)
+
+    def test_task_errors_counted_as_failures(self):
+        def create(payload):
+            if payload == 1:
+                raise KeyError(payload)
+            return MagicMock(status_code=201)
+        stats = run_bulk([('a', 0), ('b', 1), ('c', 2)], create, concurrency=2)
+        self.assertEquals((stats.succeeded, stats.failed), (2, 1))
+        self.assertEquals(stats.errors['KeyError'], 1)
+
+    def test_invalid_rows_counted_as_failures(self):
+        with patch.dict(os.environ, {'OCL_WEB_HOST': 'http://localhost:7000',
+                                     'OCL_API_HOST': 'http://localhost:8000'}):
+            command = ImportMappingsCommand()
+        command.ORG_ID = command.SOURCE_ID = 'CIEL'
+        command.input = ['q_and_a 985 1173 1152\n', 'internal 986 SAME-AS\n', '\n',
+                         'concept_set\n', 'internal 987 SAME-AS,A01,ICD-10\n']
+        stats = BulkRunStats()
+        tasks = list(command.iter_mapping_tasks(stats))
+        self.assertEquals([key for key, _ in tasks],
+                          ['q_and_a 985 1173', 'q_and_a 985 1152',
+                           'internal 987 SAME-AS,A01,ICD-10'])
+        self.assertEquals(stats.errors, {'ValueError': 1, 'IndexError': 1})
+
+    def test_tasks_error_raised_in_calling_thread(self):
+        def tasks():
+            yield 'a', 0
+            raise ValueError('bad row')
+        with self.assertRaises(ValueError):
+            run_bulk(tasks(), lambda payload: MagicMock(status_code=201), concurrency=2)
+
+    def test_rate_limited(self):
+        rate_limiter = RateLimiter(rate=50)
+        start_time = time.time()
+        for _ in range(6):
+            rate_limiter.wait()
+        self.assertGreaterEqual(time.time() - start_time, 0.09)
+
+
+class ReferenceDataAttributeTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.loader = MagicMock(return_value=['Diagnosis', 'Symptom'])
+
+        class FakeCommand(object):
+            concept_class_list = reference_data('concept_classes', self.loader)
+        self.command_class = FakeCommand
+
+    def test_loaded_on_first_access_only(self):
+        with override_settings(REFERENCE_DATA_DISK_CACHE_DIR=self.tmp_dir):
+            command = self.command_class()
+            self.assertFalse(self.loader.called)
+            self.assertEquals(command.concept_class_list, ['Diagnosis', 'Symptom'])
+            self.assertEquals(command.concept_class_list, ['Diagnosis', 'Symptom'])
+        self.assertEquals(self.loader.call_count, 1)
+
+    def test_cached_on_disk_between_runs(self):
+        with override_settings(REFERENCE_DATA_DISK_CACHE_DIR=self.tmp_dir):
+            self.command_class().concept_class_list
+            self.assertEquals(self.command_class().concept_class_list, ['Diagnosis', 'Symptom'])
+            self.assertEquals(self.loader.call_count, 1)
+
+            with override_settings(REFERENCE_DATA_CACHE_TIMEOUT=0):
+                self.command_class().concept_class_list
+            self.assertEquals(self.loader.call_count, 2)
+
+    def test_files_deleted_by_clear_reference_data(self):
+        with override_settings(REFERENCE_DATA_DISK_CACHE_DIR=self.tmp_dir):
+            self.command_class().concept_class_list
+            self.assertEquals(os.listdir(self.tmp_dir), ['concept_classes.json'])
+            call_command('clear_reference_data', 'concept_classes', stdout=StringIO())
+            self.assertEquals(os.listdir(self.tmp_dir), [])
+            self.command_class().concept_class_list
+        self.assertEquals(self.loader.call_count, 2)
+
+    @patch('apps.core.refdata.reference_data.get')
+    def test_locale_fallback_not_cached_on_disk(self, mock_get):
+        mock_get.return_value = []
+        with patch.dict(os.environ, {'OCL_WEB_HOST': 'http://localhost:7000'}):
+            command = ImporterCommand()
+        with override_settings(REFERENCE_DATA_DISK_CACHE_DIR=self.tmp_dir):
+            self.assertEquals(command.locale_list, [])
+        self.assertEquals(os.listdir(self.tmp_dir), [])
+        mock_get.assert_called_with('locales')
+
+
+class ImportPipelineTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        with patch.dict(os.environ, {'OCL_WEB_HOST': 'http://localhost:7000'}):
+            self.importer = Importer()
+        self.importer.test_mode = False
+        self.importer.filename = os.path.join(self.tmp_dir, 'concepts.csv')
+        with open(self.importer.filename, 'w') as csv_file:
+            csv_file.write('id,name\n')
+            for i in range(250):
+                csv_file.write('%d,%s\n' % (i, 'Malaria' if i % 50 else ''))
+
+    @staticmethod
+    def validate(row):
+        if not row['name']:
+            raise ValueError('name is required')
+        return row
+
+    def test_rows_flow_through_all_stages(self):
+        submitted = []
+
+        def submit(item):
+            submitted.append(item)
+            return MagicMock(status_code=400 if item['id'] == '1' else 201)
+
+        stats = self.importer.run_pipeline(self.validate, lambda row: dict(row, id=row['id']),
+                                           submit, concurrency=3, batch_size=20, queue_size=5)
+        self.assertEquals([(s.name, s.count, s.rejected) for s in stats],
+                          [('parse', 250, 0), ('validate', 245, 5), ('transform', 245, 0),
+                           ('submit', 245, 1)])
+        self.assertEquals(len(submitted), 245)
+        self.assertEquals(stats[3].errors[400], 1)
+
+    def test_nothing_submitted_in_test_mode(self):
+        self.importer.test_mode = True
+        submit = MagicMock()
+        stats = self.importer.run_pipeline(self.validate, lambda row: row, submit)
+        self.assertFalse(submit.called)
+        self.assertEquals(stats[2].count, 245)
+
+
+class ApiCallAccountingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.middleware = ApiCallAccountingMiddleware()
+        self.request = FakeRequest({})
+        self.request.method = 'GET'
+        self.request.path = '/orgs/CIEL/'
+
+    def record_calls(self, paths):
+        self.middleware.process_request(self.request)
+        for path in paths:
+            response = MagicMock(status_code=200, content='[]', _content_consumed=True)
+            response.request.method = 'GET'
+            response.request.path_url = path
+            response.elapsed.total_seconds.return_value = 0.01
+            self.request.api_calls.record(response)
+        return self.middleware.process_response(self.request, HttpResponse())
+
+    def test_server_timing_header(self):
+        response = self.record_calls(['/orgs/CIEL/', '/orgs/CIEL/sources/'])
+        self.assertTrue(response['Server-Timing'].startswith('api;desc="2 calls";dur=20.0, total;dur='))
+
+    @patch('apps.core.middleware.logger')
+    def test_warning_when_over_budget(self, mock_logger):
+        with override_settings(API_CALL_BUDGET=3):
+            self.record_calls(['/orgs/CIEL/'] * 3)
+            self.assertFalse(mock_logger.warning.called)
+            self.record_calls(['/orgs/CIEL/'] + ['/orgs/CIEL/members/demo/'] * 3)
+        self.assertEquals(mock_logger.warning.call_args[0][3], 4)
+        self.assertEquals(mock_logger.warning.call_args[0][-1], '/orgs/CIEL/members/demo/ x3')
+
+
+class RepoVersionSelectorTests(TestCase):
+    def setUp(self):
+        settings_override = override_settings(VERSION_SELECTOR_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.api = MagicMock()
+        self.api.get.return_value = make_response(
+            '[{"id": "HEAD"}, {"id": "v3", "released": true}]', headers={'num_found': '4'})
+        patcher = patch('apps.core.views.OclApi', return_value=self.api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_json(self, **headers):
+        request = RequestFactory().get('/orgs/CIEL/sources/CIEL/versions/json/', {'page': 2},
+                                       **headers)
+        request.session = {}
+        view = RepoVersionsJsonView.as_view(repo_type='sources')
+        return view(request, org='CIEL', source='CIEL')
+
+    def test_selected_version_added_to_recent_ones(self):
+        view = RepoVersionsJsonView(request=None, kwargs={})
+        self.api.get.side_effect = [self.api.get.return_value, make_response('{"id": "v1"}')]
+        versions, has_more = view.get_version_selector(
+            'orgs', 'CIEL', 'sources', 'CIEL', selected_version_id='v1', api_client=self.api)
+        self.assertEquals([version['id'] for version in versions], ['HEAD', 'v3', 'v1'])
+        self.assertTrue(has_more)
+        self.assertEquals(self.api.get.call_args_list[0][1]['params']['limit'], 2)
+
+    def test_json_page_revalidated_with_etag(self):
+        response = self.get_json()
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(self.api.get.call_args[1]['params']['page'], 2)
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertEquals(self.get_json(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class CsvExportViewTests(TestCase):
+    def export(self, **params):
+        request = RequestFactory().get('/core/export/csv/', params)
+        request.user = MagicMock()
+        request.user.is_authenticated.return_value = True
+        request.session = {}
+        return CsvExportView.as_view()(request)
+
+    def test_invalid_path(self):
+        self.assertEquals(self.export(path='/admin/').status_code, 400)
+        self.assertEquals(self.export(path='/orgs/CIEL/members/').status_code, 400)
+
+    @patch('apps.core.views.OclApi')
+    def test_results_streamed_as_csv(self, mock_api_class):
+        mock_api = mock_api_class.return_value
+        mock_api.iter_json_list.return_value = iter([{'id': '1', 'display_name': 'Malaria'}])
+        response = self.export(path='/orgs/CIEL/sources/CIEL/concepts/', q='malaria', start=0)
+        self.assertEquals(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = list(response.streaming_content)
+        self.assertEquals(lines[0].split(',')[:2], ['ID', 'Name'])
+        self.assertTrue(lines[1].startswith('1,Malaria,'))
+        args, kwargs = mock_api.iter_json_list.call_args
+        self.assertEquals(args, ('orgs', 'CIEL', 'sources', 'CIEL', 'concepts'))
+        self.assertEquals(kwargs['params']['q'], 'malaria*')
+        self.assertNotIn('path', kwargs['params'])
+
+    @patch('apps.core.views.OclApi')
+    def test_versions_exported(self, mock_api_class):
+        mock_api = mock_api_class.return_value
+        mock_api.iter_json_list.return_value = iter([{'id': 'v1', 'released': True}])
+        response = self.export(path='/orgs/CIEL/sources/CIEL/versions/')
+        self.assertEquals(response.status_code, 200)
+        lines = list(response.streaming_content)
+        self.assertEquals(lines[0].split(',')[:3], ['ID', 'Description', 'Released'])
+        self.assertTrue(lines[1].startswith('v1,,True,'))
+        args, _ = mock_api.iter_json_list.call_args
+        self.assertEquals(args, ('orgs', 'CIEL', 'sources', 'CIEL', 'versions'))
+
+
+class OptionListAssetTests(TestCase):
+    def setUp(self):
+        self.option_lists = OptionListRegistry(key_prefix='test_option_list')
+        self.loader = MagicMock(return_value=[['en', 'English [en]'], 'fr'])
+        self.option_lists.register('locales', self.loader)
+        self.option_lists.invalidate()
+        patcher = patch('apps.core.views.option_lists', self.option_lists)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('apps.core.fields.option_lists', self.option_lists)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_asset(self, name, version):
+        request = RequestFactory().get('/core/options/lists/%s/%s.json' % (name, version))
+        return OptionListAssetView.as_view()(request, name=name, version=version)
+
+    def test_list_serialized_once(self):
+        content, version = self.option_lists.get('locales')
+        self.assertEquals(content, '[["English [en]", "en"], "fr"]')
+        self.assertEquals(self.option_lists.get('locales'), (content, version))
+        self.assertEquals(self.loader.call_count, 1)
+
+    def test_widget_references_asset(self):
+        _, version = self.option_lists.get('locales')
+        html = ComboBoxWidget(option_list='locales', name='default_locale_list').render(
+            'default_locale', 'en')
+        self.assertIn('/core/options/lists/locales/%s.json' % version, html)
+        self.assertNotIn('English', html)
+
+    def test_current_version_cached_publicly(self):
+        _, version = self.option_lists.get('locales')
+        response = self.get_asset('locales', version)
+        self.assertEquals(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def test_other_version_served_uncached(self):
+        content, _ = self.option_lists.get('locales')
+        response = self.get_asset('locales', 'abc123')
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.content, content)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+
+
+class PrefixTreeResolverTests(TestCase):
+    def setUp(self):
+        self.resolver = PrefixTreeResolver(r'^orgs/', 'config.orgs_urls')
+        self.plain_resolver = RegexURLResolver(r'^orgs/', 'config.orgs_urls')
+
+    def test_resolved_like_regex_resolver(self):
+        for path in ['orgs/', 'orgs/json', 'orgs/new/', 'orgs/CIEL/sources/new/',
+                     'orgs/CIEL/sources/CIEL/', 'orgs/CIEL/sources/CIEL/v1/',
+                     'orgs/CIEL/sources/CIEL/versions/json/',
+                     'orgs/CIEL/sources/CIEL/concepts/new/',
+                     'orgs/CIEL/sources/CIEL/concepts/1234/v2',
+                     'orgs/CIEL/sources/CIEL/concepts/1234/mappings/',
+                     'orgs/CIEL/sources/CIEL/mappings/M1/v1/',
+                     'orgs/CIEL/collections/C1/v1/references/']:
+            match, expected = self.resolver.resolve(path), self.plain_resolver.resolve(path)
+            self.assertEquals((match.url_name, match.func.__name__, match.kwargs),
+                              (expected.url_name, expected.func.__name__, expected.kwargs))
+
+    def test_only_matching_shapes_tested(self):
+        candidates = self.resolver.get_candidates('CIEL/sources/CIEL/concepts/1234/')
+        self.assertLess(len(candidates), 5)
+        self.assertRaises(Resolver404, self.resolver.resolve, 'orgs/CIEL/sources/CIEL/x/y/z/')
+
+    def test_cached_reverse(self):
+        kwargs = {'user': 'jd.payne', 'source': 'CIEL', 'concept': '1_2'}
+        self.assertEquals(cached_reverse('concept-home', kwargs=kwargs),
+                          reverse('concept-home', kwargs=kwargs))
+        kwargs = {'org': 'CIEL', 'source': 'CIEL', 'mapping': 'M1'}
+        self.assertEquals(cached_reverse('mapping-home', kwargs),
+                          '/orgs/CIEL/sources/CIEL/mappings/M1/')
+        self.assertRaises(NoReverseMatch, cached_reverse, 'concept-home',
+                          {'user': 'jd payne', 'source': 'CIEL', 'concept': '1'})
+
+    def test_url_template(self):
+        template = get_url_template('concept-home', org='owner', source='source', concept='concept')
+        self.assertEquals(template, '/orgs/%(owner)s/sources/%(source)s/concepts/%(concept)s/')
+        self.assertEquals(get_url_template('users:detail', username='owner'), '/users/%(owner)s/')
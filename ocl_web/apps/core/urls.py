@@ -4,10 +4,13 @@ Core URLs -- this URL config file is active! Although, not using these pages.
 """
 from django.conf.urls import patterns, url
 
-from .views import (GetOptionListView, GetStatsView)
+from .views import (GetOptionListView, OptionListAssetView, GetStatsView, CsvExportView)
 
 urlpatterns = patterns(
     '',
     url(r'^options/(?P<type>[a-z\-_]+)/$', GetOptionListView.as_view(), name='option-list'),
-    url(r'^stats/(?P<key>[a-z\-_]+)/$', GetStatsView.as_view(), name='core-stats')
+    url(r'^options/lists/(?P<name>[a-z_]+)/(?P<version>[0-9a-f]+)\.json$',
+        OptionListAssetView.as_view(), name='option-list-asset'),
+    url(r'^stats/(?P<key>[a-z\-_]+)/$', GetStatsView.as_view(), name='core-stats'),
+    url(r'^export/csv/$', CsvExportView.as_view(), name='csv-export'),
 )
@@ -1,4 +1,6 @@
 import re
+from django.core.paginator import EmptyPage, PageNotAnInteger
+
 
 class SearchStringFormatter:
     @staticmethod
@@ -9,3 +11,84 @@ class SearchStringFormatter:
         if request.GET.get('q') and not request.GET.get('exact_match'):
             words = re.split('\s+', request.GET.get('q'))
             request.GET['q'] = '* '.join(words) + '*'
+
+
+class CountPaginator(object):
+    """
+    Paginator that only needs the total number of results, for searches whose results are
+    paged by the API. Offers the parts of django.core.paginator.Paginator used by the templates
+    (simple_pager, bootstrap_pagination) without building a sequence of num_found items.
+    :param count: total number of results, e.g. OclSearch.num_found
+    :param per_page: number of results per page, e.g. OclSearch.num_per_page. 0 means all
+                     results are on a single page (limit=0).
+    """
+
+    def __init__(self, count, per_page):
+        self.count = count or 0
+        self.per_page = per_page or 0
+
+    @property
+    def num_pages(self):
+        """ Total number of pages, always at least 1 """
+        if not self.per_page or not self.count:
+            return 1
+        return (self.count + self.per_page - 1) // self.per_page
+
+    @property
+    def page_range(self):
+        """ 1-based range of page numbers, lazily generated """
+        return xrange(1, self.num_pages + 1)
+
+    def validate_number(self, number):
+        """ Validates the given 1-based page number, same errors as the Django paginator """
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        if number > self.num_pages:
+            raise EmptyPage('That page contains no results')
+        return number
+
+    def page(self, number):
+        """ Returns a CountPage object for the given 1-based page number """
+        return CountPage(self.validate_number(number), self)
+
+
+class CountPage(object):
+    """ A page of a CountPaginator, with the same attributes as django.core.paginator.Page """
+
+    def __init__(self, number, paginator):
+        self.number = number
+        self.paginator = paginator
+
+    def __repr__(self):
+        return '<Page %s of %s>' % (self.number, self.paginator.num_pages)
+
+    def has_next(self):
+        return self.number < self.paginator.num_pages
+
+    def has_previous(self):
+        return self.number > 1
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def next_page_number(self):
+        return self.paginator.validate_number(self.number + 1)
+
+    def previous_page_number(self):
+        return self.paginator.validate_number(self.number - 1)
+
+    def start_index(self):
+        """ 1-based index of the first result on this page, 0 if there are no results """
+        if self.paginator.count == 0:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+    def end_index(self):
+        """ 1-based index of the last result on this page """
+        if self.number == self.paginator.num_pages:
+            return self.paginator.count
+        return self.number * self.paginator.per_page
@@ -1,16 +1,26 @@
 """
 OCL Web Core Functionality
 """
-# import requests
+import re
+import hashlib
 import logging
 
-from django.core import cache
-from django.http import HttpResponse
+import requests
+import simplejson as json
+from django.conf import settings
+from django.http import (HttpResponse, HttpResponseNotModified, HttpResponseBadRequest,
+                         StreamingHttpResponse, Http404)
 from django.views.generic.edit import View
+from django.utils.cache import patch_cache_control
 from django.utils.translation import ugettext as _
-from braces.views import JsonRequestResponseMixin
+from braces.views import JsonRequestResponseMixin, LoginRequiredMixin
 
-from libs.ocl import OclApi
+from libs.ocl import OclApi, OclSearch, OclConstants
+from libs.ocl.export import CSV_COLUMNS, iter_search_results, iter_csv
+from libs.ocl.resilience import get_circuit_breaker
+from .option_lists import option_lists
+from .refdata import cached_reference_data
+from .utils import SearchStringFormatter
 
 logger = logging.getLogger('oclweb')
 api = OclApi()
@@ -101,6 +111,93 @@ class UserOrOrgMixin(object):
         return output_string
 
 
+class RepoVersionSelectorMixin(object):
+    """
+    Version dropdown of the source and collection pages.
+
+    Only the settings.VERSION_SELECTOR_SIZE most recent versions, plus the selected one, are
+    loaded with the page; the older ones are loaded on demand, a page at a time, from
+    RepoVersionsJsonView.
+    """
+    VERSION_SEARCH_TYPES = {
+        'sources': OclConstants.RESOURCE_NAME_SOURCE_VERSIONS,
+        'collections': OclConstants.RESOURCE_NAME_COLLECTION_VERSIONS,
+    }
+
+    def get_version_page(self, owner_type, owner_id, repo_type, repo_id, page=1,
+                         api_client=None):
+        """ Return an OclSearch instance with one page of the versions of a source or collection """
+        searcher = OclSearch(search_type=self.VERSION_SEARCH_TYPES[repo_type],
+                             search_scope=OclConstants.SEARCH_SCOPE_RESTRICTED,
+                             params={'limit': settings.VERSION_SELECTOR_SIZE, 'page': page})
+        api = api_client or OclApi(self.request, debug=True)
+        search_response = api.get(owner_type, owner_id, repo_type, repo_id, 'versions',
+                                  params=searcher.search_params)
+        if search_response.status_code == 404:
+            raise Http404
+        elif search_response.status_code != 200:
+            search_response.raise_for_status()
+        searcher.process_search_results(
+            search_type=searcher.search_type, search_response=search_response,
+            search_params=searcher.search_params)
+        return searcher
+
+    def get_version_selector(self, owner_type, owner_id, repo_type, repo_id,
+                             selected_version_id=None, api_client=None):
+        """
+        Return the versions to list in the dropdown, and whether there are more to load.
+        """
+        searcher = self.get_version_page(owner_type, owner_id, repo_type, repo_id,
+                                         api_client=api_client)
+        versions = list(searcher.search_results)
+        if selected_version_id and selected_version_id not in [v['id'] for v in versions]:
+            api = api_client or OclApi(self.request, debug=True)
+            response = api.get(owner_type, owner_id, repo_type, repo_id, selected_version_id)
+            if response.status_code == 200:
+                versions.append(response.json())
+        return versions, searcher.num_found > searcher.num_per_page
+
+
+class RepoVersionsJsonView(RepoVersionSelectorMixin, UserOrOrgMixin, View):
+    """
+    JSON endpoint of the version dropdown: a page of the versions of a source or collection,
+    set repo_type in the URL config. Cached by the browser for settings.VERSION_SELECTOR_CACHE_TIMEOUT
+    seconds, and revalidated with its ETag after that.
+    """
+    repo_type = None
+
+    def get(self, request, *args, **kwargs):
+        self.get_args()
+        repo_id = self.source_id if self.repo_type == 'sources' else self.collection_id
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        searcher = self.get_version_page(self.owner_type, self.owner_id, self.repo_type,
+                                         repo_id, page=page)
+        content = json.dumps({
+            'items': [{'id': version['id'],
+                       'released': version.get('released'),
+                       'retired': version.get('retired')}
+                      for version in searcher.search_results],
+            'page': page,
+            'per_page': searcher.num_per_page,
+            'total': searcher.num_found,
+            'has_more': page * searcher.num_per_page < searcher.num_found,
+        })
+
+        etag = '"%s"' % hashlib.md5(content).hexdigest()
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        # Private, since the versions of a private repository depend on the user
+        patch_cache_control(response, private=True,
+                            max_age=settings.VERSION_SELECTOR_CACHE_TIMEOUT)
+        return response
+
+
 class ExtraJsonView(JsonRequestResponseMixin, UserOrOrgMixin, View):
     """
     Extra handling for org/user/source is different from concept...
@@ -219,6 +316,7 @@ class ExtraJsonView(JsonRequestResponseMixin, UserOrOrgMixin, View):
         return self.render_json_response({'message': _('extra deleted')})
 
 
+@cached_reference_data('concept_classes')
 def _get_concept_class_list():
     """Return a list of concept classes.
 
@@ -229,13 +327,14 @@ def _get_concept_class_list():
     return [] if response.status_code == 404 else [concept_class['id'] for concept_class in response.json()]
 
 
+@cached_reference_data('datatypes')
 def _get_datatype_list():
     """Return a list of datatypes.
 
     Currently from OpenMRS dataset 2014/10/19
     """
     response = api.get('orgs', 'OCL', 'sources', 'Datatypes', 'concepts', params={'limit': 0})
-    return [datatype['id'] for datatype in response.json()]
+    return [] if response.status_code == 404 else [datatype['id'] for datatype in response.json()]
 
 
 # TODO(paynejd@gmail.com): Retire this and replace with values stored in OCL
@@ -270,22 +369,14 @@ def _get_collection_type_list():
     ]
 
 
-locale_list = []
-
+@cached_reference_data('locales', default=[{'code': 'en', 'name': 'en - English'}])
 def _get_locale_list():
     """Return a list of locales only for those having 2-letter codes
     """
-    local_cache = cache.get_cache('default')
-    locale_list_in_cache = local_cache.get('locale')
-
-    if locale_list_in_cache:
-        return locale_list_in_cache
-
     response = api.get('orgs', 'OCL', 'sources', 'Locales', 'concepts', params={'limit': 0})
 
     if response.status_code == 404:
-        locale_list = [{'code': 'en', 'name': 'en - English'}]
-        return locale_list
+        return []
 
     locale_list = [
         {
@@ -295,28 +386,36 @@ def _get_locale_list():
         for locale in response.json() if locale['locale']
         ]
     locale_list.sort()
-
-    day_time_as_minutes = 24 * 60 * 60
-
-    local_cache.set('locale', locale_list, day_time_as_minutes)
     return locale_list
 
 
+@cached_reference_data('name_types')
 def _get_name_type_list():
     response = api.get('orgs', 'OCL', 'sources', 'NameTypes', 'concepts', params={'limit': 0})
     return [] if response.status_code == 404 else [name_type['display_name'] for name_type in response.json()]
 
 
+@cached_reference_data('description_types')
 def _get_description_type_list():
     response = api.get('orgs', 'OCL', 'sources', 'DescriptionTypes', 'concepts', params={'limit': 0})
     return [] if response.status_code == 404 else [description_type['display_name'] for description_type in response.json()]
 
 
+@cached_reference_data('map_types')
 def _get_map_type_list():
     response = api.get('orgs', 'OCL', 'sources', 'MapTypes', 'concepts', params={'limit': 0})
     return [] if response.status_code == 404 else [description_type['display_name'] for description_type in response.json()]
 
 
+option_lists.register('map_types', _get_map_type_list)
+option_lists.register('concept_classes', _get_concept_class_list)
+option_lists.register('datatypes', _get_datatype_list)
+option_lists.register('source_types', _get_source_type_list)
+option_lists.register('collection_types', _get_collection_type_list)
+option_lists.register('locales', lambda: [[l['code'], l['name']] for l in _get_locale_list()])
+option_lists.register('locale_names', lambda: [l['name'] for l in _get_locale_list()])
+
+
 # TODO(paynejd@gmail.com): Retire this and replace with values stored in OCL
 class GetOptionListView(JsonRequestResponseMixin, View):
     """Utility to get a list of valid options for attributes for
@@ -342,6 +441,32 @@ class GetOptionListView(JsonRequestResponseMixin, View):
             return self.render_json_response(_get_locale_list())
 
 
+class OptionListAssetView(View):
+    """
+    Serves a combo box option list as a JSON asset, e.g.
+    /core/options/lists/map_types/<version>.json
+
+    The version is the hash of the content, so the current version is cached publicly for
+    settings.OPTION_LIST_MAX_AGE seconds. Other versions get the current content, not to be
+    cached: the version is computed by each server process from its own cache, so a page
+    rendered by one process may reference a version another process does not have yet, and
+    redirecting could bounce between them.
+    """
+
+    def get(self, request, *args, **kwargs):
+        name = self.kwargs['name']
+        if name not in option_lists:
+            raise Http404
+        content, version = option_lists.get(name)
+
+        response = HttpResponse(content, content_type='application/json')
+        if self.kwargs['version'] == version:
+            patch_cache_control(response, public=True, max_age=settings.OPTION_LIST_MAX_AGE)
+        else:
+            patch_cache_control(response, no_cache=True, max_age=0)
+        return response
+
+
 class GetStatsView(View):
     """Utility views to get basic statistics to monitoring services.
     """
@@ -365,5 +490,70 @@ class GetStatsView(View):
         if key == 'sources':
             response = api.head('sources')
             cnt = response.headers.get('num_found')
+        if key == 'api-breaker':
+            return HttpResponse(json.dumps(get_circuit_breaker().get_stats()),
+                                content_type='application/json')
 
         return HttpResponse(cnt)
+
+
+class CsvExportView(LoginRequiredMixin, View):
+    """
+    Streams the results of a search, repository or versions page as a CSV file, e.g.
+    /core/export/csv/?path=/orgs/CIEL/sources/CIEL/concepts/&q=malaria
+
+    - path is the path of the page, which is also the path of its API resource; the other
+      parameters are the search parameters of the page
+    - the results are requested from the API a page at a time as the file is sent, so the
+      export runs in constant memory and starts right away however large it is
+    - at most settings.CSV_EXPORT_MAX_ROWS rows are exported, fewer with max_rows=...
+    - start=N resumes an interrupted export at row N (0 based, header excluded): the rows
+      before it are not requested again, and the header line is not repeated
+    """
+    EXPORT_PATH_PATTERN = re.compile(
+        r'^/(?:(?:orgs|users)/%(ns)s/(?:(?:sources|collections)/%(ns)s/(?:%(ns)s/)?)?)?'
+        r'(concepts|mappings|references|versions|sources|collections|orgs|users)/$' % {
+            'ns': OclConstants.NAMESPACE_PATTERN})
+    EXPORT_PARAMS = ('path', 'start', 'max_rows', 'csv', 'user', 'type')
+
+    def get(self, request, *args, **kwargs):
+        path = request.GET.get('path', '')
+        match = self.EXPORT_PATH_PATTERN.match(path)
+        if match is None:
+            return HttpResponseBadRequest('Invalid export path')
+        resource_type = match.group(1)
+        try:
+            start = max(int(request.GET.get('start', 0)), 0)
+            max_rows = min(int(request.GET.get('max_rows', settings.CSV_EXPORT_MAX_ROWS)),
+                           settings.CSV_EXPORT_MAX_ROWS)
+        except ValueError:
+            return HttpResponseBadRequest('Invalid start or max_rows')
+
+        SearchStringFormatter.add_wildcard(request)
+        params = request.GET.copy()
+        for param in self.EXPORT_PARAMS:
+            params.pop(param, None)
+        segments = path.strip('/').split('/')
+        searcher = OclSearch(search_type=resource_type,
+                             search_scope=(OclConstants.SEARCH_SCOPE_RESTRICTED
+                                           if len(segments) > 1
+                                           else OclConstants.SEARCH_SCOPE_GLOBAL),
+                             params=params)
+
+        api = OclApi(request, debug=True)
+        try:
+            results = iter_search_results(api, segments, searcher.search_params, start=start,
+                                          max_rows=max_rows,
+                                          page_size=settings.CSV_EXPORT_PAGE_SIZE)
+        except requests.HTTPError as error:
+            if error.response is not None and error.response.status_code == 404:
+                raise Http404
+            raise
+
+        response = StreamingHttpResponse(
+            iter_csv(results, CSV_COLUMNS[resource_type], header=start == 0),
+            content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="%s.csv"' % '-'.join(segments)
+        # Ask proxies (e.g. nginx) to send the rows as they come instead of buffering them
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -4,7 +4,6 @@ Forms for mappings.
 """
 from django.utils.translation import ugettext as _
 from django import forms
-from apps.core.views import _get_map_type_list
 from apps.core.fields import ComboBoxWidget
 
 class MappingRetireForm(forms.Form):
@@ -30,7 +29,7 @@ class MappingNewForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super(MappingNewForm, self).__init__(*args, **kwargs)
         # create widgets here to delay calls to api until initialization of the form
-        self.fields['map_type'].widget = ComboBoxWidget(data_list=[(t) for t in _get_map_type_list()], name="map_type_list")
+        self.fields['map_type'].widget = ComboBoxWidget(option_list='map_types', name="map_type_list")
 
     # TODO(paynejd@gmail.com): Use dynamic resource selector for from_concept
     from_concept_url = forms.CharField(
@@ -0,0 +1,49 @@
+from unittest import TestCase
+from django.core import cache
+from mock import patch, MagicMock
+from requests.models import Response
+from libs.ocl import OclApi
+from apps.ocl_search.views import GlobalSearchView
+
+
+class FakeUser(object):
+    """ FakeUser class """
+    username = 'testUser'
+    def is_authenticated(self):
+        return True
+
+class FakeRequest(object):
+    """ FakeRequest class """
+    def __init__(self):
+        self.session = {}
+        self.GET = {}
+        self.user = FakeUser()
+
+class GlobalSearchResourceCountsTest(TestCase):
+    def setUp(self):
+        cache.get_cache('default').clear()
+
+    @patch('libs.ocl.OclApi.head')
+    def test_getResourceCounts_countsRequestedOnceAndCached(self, mock_head):
+        count_response = MagicMock(spec=Response)
+        count_response.headers = {'num_found': '42'}
+        mock_head.return_value = count_response
+        view = GlobalSearchView()
+        view.request = FakeRequest()
+        api = OclApi(view.request)
+
+        counts = view.get_resource_counts(api, ['sources', 'orgs'], {'q': 'malaria '})
+        self.assertEquals(counts['sources'].result(), 42)
+        self.assertEquals(counts['orgs'].result(), 42)
+        self.assertEquals(mock_head.call_count, 2)
+
+        counts = view.get_resource_counts(api, ['sources', 'orgs'], {'q': ' malaria'})
+        self.assertEquals(counts['sources'].result(), 42)
+        self.assertEquals(mock_head.call_count, 2)
+
+    def test_getCountCacheKey_differsPerUser(self):
+        view = GlobalSearchView()
+        view.request = FakeRequest()
+        key = view.get_count_cache_key('sources', {'q': 'malaria'})
+        view.request.user.username = 'otherUser'
+        self.assertNotEquals(view.get_count_cache_key('sources', {'q': 'malaria'}), key)
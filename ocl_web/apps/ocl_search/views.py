@@ -5,23 +5,81 @@ https://openconceptlab.org/search?q=malaria
 https://openconceptlab.org/search?q=oncology&type=sources
 """
 import logging
+import hashlib
 
+from django.conf import settings
+from django.core import cache
 from django.views.generic import TemplateView
 from django.http import Http404
-from django.core.paginator import Paginator
 from django.utils.http import urlencode
-from apps.core.utils import SearchStringFormatter
+from apps.core.utils import SearchStringFormatter, CountPaginator
 from libs.ocl import (OclApi, OclSearch, OclConstants)
+from libs.ocl.concurrency import ApiFuture, submit
 
 
 logger = logging.getLogger('oclweb')
 
+# Default number of seconds resource counts of a global search are cached for
+DEFAULT_SEARCH_COUNT_CACHE_TIMEOUT = 60
+
 
 class GlobalSearchView(TemplateView):
     """ View for global OCL search """
 
     template_name = "ocl_search/search.html"
 
+    def get_count_cache_key(self, resource_type, search_params):
+        """
+        Return the cache key of the resource count for the passed search params.
+        Params are normalized so that equivalent queries share the same entry, and the key
+        includes the user since counts include the private resources visible to them.
+        """
+        normalized_params = []
+        for key in sorted(search_params):
+            value = search_params[key]
+            if key == 'q':
+                value = ' '.join(value.split())
+            normalized_params.append((key, value))
+        username = ''
+        if self.request.user.is_authenticated():
+            username = self.request.user.username
+        return 'search_count:%s' % hashlib.md5(
+            repr((username, resource_type, normalized_params)).encode('utf-8')).hexdigest()
+
+    def get_resource_counts(self, api, resource_types, search_params):
+        """
+        Return dictionary of the number of results of each resource type for the search params.
+        Counts are served from the cache when possible, the rest are requested concurrently
+        on the API thread pool -- call this before performing the primary search so that
+        they run while it is in progress.
+        :returns: dictionary of ApiFuture instances, call .result() to get the counts.
+        """
+        local_cache = cache.get_cache('default')
+        timeout = getattr(settings, 'SEARCH_COUNT_CACHE_TIMEOUT',
+                          DEFAULT_SEARCH_COUNT_CACHE_TIMEOUT)
+
+        cache_keys = dict((resource_type, self.get_count_cache_key(resource_type, search_params))
+                          for resource_type in resource_types)
+        cached_counts = local_cache.get_many(cache_keys.values())
+
+        def get_count(resource_type):
+            """ Get the count of a resource type from the API and cache it """
+            count_response = api.head(resource_type, params=search_params)
+            count = 0
+            if 'num_found' in count_response.headers:
+                count = int(count_response.headers['num_found'])
+            local_cache.set(cache_keys[resource_type], count, timeout)
+            return count
+
+        resource_counts = {}
+        for resource_type in resource_types:
+            if cache_keys[resource_type] in cached_counts:
+                resource_counts[resource_type] = ApiFuture(
+                    value=cached_counts[cache_keys[resource_type]])
+            else:
+                resource_counts[resource_type] = submit(get_count, resource_type)
+        return resource_counts
+
     def get_context_data(self, *args, **kwargs):
         """ Set context for OCL global search """
 
@@ -37,6 +95,23 @@ class GlobalSearchView(TemplateView):
             self.request, debug=True,
             facets=OclConstants.resource_has_facets(searcher.search_type))
 
+        # Build URL params for navigating to other resources
+        other_resource_search_params = {}
+        for param in OclSearch.TRANSFERRABLE_SEARCH_PARAMS:
+            if param in self.request.GET:
+                if param == 'q':
+                    other_resource_search_params[param] = original_search_string
+                else:
+                    other_resource_search_params[param] = self.request.GET.get(param)
+
+        # Start the counter searches for the other resources, these run during the primary search
+        count_resource_types = [
+            resource_type for resource_type in OclConstants.RESOURCE_TYPE_INFO
+            if resource_type != searcher.search_type and
+            OclConstants.RESOURCE_TYPE_INFO[resource_type]['show_on_global_search']]
+        resource_count_futures = self.get_resource_counts(
+            api, count_resource_types, other_resource_search_params)
+
         search_response = api.get(searcher.search_type, params=searcher.search_params)
         if search_response.status_code == 404:
             raise Http404
@@ -50,7 +125,7 @@ class GlobalSearchView(TemplateView):
             search_params=self.request.GET)
 
         # Setup paginator for primary search
-        search_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+        search_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_current_page = search_paginator.page(searcher.current_page)
 
         # Set context for primary search
@@ -69,15 +144,6 @@ class GlobalSearchView(TemplateView):
         if self.request.user.is_authenticated() and searcher.search_type in ['concepts', 'mappings']:
             context['all_collections'] = api.get_all_collections_for_user(self.request.user.username)
 
-        # Build URL params for navigating to other resources
-        other_resource_search_params = {}
-        for param in OclSearch.TRANSFERRABLE_SEARCH_PARAMS:
-            if param in self.request.GET:
-                if param == 'q':
-                    other_resource_search_params[param] = original_search_string
-                else:
-                    other_resource_search_params[param] = self.request.GET.get(param)
-
         # Encode the search parameters into a single URL-encoded string so that it can
         #   easily be appended onto URL links on the search page
         context['other_resource_search_params'] = ''
@@ -85,19 +151,12 @@ class GlobalSearchView(TemplateView):
             context['other_resource_search_params'] = (
                 '&' + urlencode(other_resource_search_params))
 
-        # Perform the counter searches for the other resources
+        # Collect the counter searches for the other resources
         resource_count = {}
-        for resource_type in OclConstants.RESOURCE_TYPE_INFO:
-            if resource_type == searcher.search_type:
-                # Primary search has already been performed, so just set value from above
-                resource_count[searcher.search_type] = searcher.num_found
-            elif OclConstants.RESOURCE_TYPE_INFO[resource_type]['show_on_global_search']:
-                # Get resource count applying transferrable search criteria
-                count_response = api.head(resource_type, params=other_resource_search_params)
-                if 'num_found' in count_response.headers:
-                    resource_count[resource_type] = int(count_response.headers['num_found'])
-                else:
-                    resource_count[resource_type] = 0
+        for resource_type in resource_count_futures:
+            resource_count[resource_type] = resource_count_futures[resource_type].result()
+        # Primary search has already been performed, so just set value from above
+        resource_count[searcher.search_type] = searcher.num_found
         context['resource_count'] = resource_count
 
         # Set debug variables
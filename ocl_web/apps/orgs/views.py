@@ -3,7 +3,6 @@ OCL Organization Views
 """
 #import requests
 import logging
-import json
 
 import re
 from django.shortcuts import redirect
@@ -13,13 +12,12 @@ from django.views.generic.edit import FormView
 from django.core.urlresolvers import reverse
 from django.contrib import messages
 from django.utils.translation import ugettext as _
-from django.core.paginator import Paginator
 from braces.views import LoginRequiredMixin
 from braces.views import JsonRequestResponseMixin
-from django.http import HttpResponse
 from django.utils.http import urlencode
 
-from apps.core.utils import SearchStringFormatter
+from apps.core.utils import SearchStringFormatter, CountPaginator
+from apps.core.membership import invalidate_org_memberships
 from .forms import (OrganizationNewForm, OrganizationEditForm)
 from .forms import (OrganizationMemberAddForm)
 from libs.ocl import OclApi, OclSearch, OclConstants
@@ -155,7 +153,7 @@ class OrganizationSourcesView(OrganizationReadBaseView):
         original_search_string = self.request.GET.get('q', '')
         # TODO: SearchStringFormatter.add_wildcard(self.request)
         searcher = self.get_org_sources(org_id, search_params=self.request.GET)
-        search_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+        search_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_current_page = search_paginator.page(searcher.current_page)
 
         # Build URL params
@@ -197,8 +195,7 @@ class OrganizationSourcesView(OrganizationReadBaseView):
 
         if request.is_ajax():
             api = OclApi(self.request, debug=True)
-            result = api.get('orgs', kwargs.get("org"), "sources", params={'limit':'0'})
-            return HttpResponse(json.dumps(result.json()), content_type="application/json")
+            return api.get_proxy_response('orgs', kwargs.get("org"), "sources", params={'limit':'0'})
         return super(OrganizationSourcesView, self).get(self, *args, **kwargs)
 
 class OrganizationCollectionsView(OrganizationReadBaseView):
@@ -219,7 +216,7 @@ class OrganizationCollectionsView(OrganizationReadBaseView):
         original_search_string = self.request.GET.get('q', '')
         # TODO: SearchStringFormatter.add_wildcard(self.request)
         searcher = self.get_org_collections(org_id, search_params=self.request.GET)
-        search_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+        search_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_current_page = search_paginator.page(searcher.current_page)
 
         # Build URL params
@@ -259,8 +256,7 @@ class OrganizationCollectionsView(OrganizationReadBaseView):
     def get(self, request, *args, **kwargs):
         if request.is_ajax():
             api = OclApi(self.request, debug=True)
-            result = api.get('orgs', kwargs.get("org"), "collections", params={'limit': '0'})
-            return HttpResponse(json.dumps(result.json()), content_type="application/json")
+            return api.get_proxy_response('orgs', kwargs.get("org"), "collections", params={'limit': '0'})
         return super(OrganizationCollectionsView, self).get(self, *args, **kwargs)
 
 
@@ -322,6 +318,7 @@ class OrganizationNewView(LoginRequiredMixin, FormView):
             result = api.create_org(data)
             # TODO:  Catch exceptions that will be raised by Ocl lib.
             if result.ok:
+                invalidate_org_memberships(self.request.user.username)
                 messages.add_message(self.request, messages.INFO, _('Organization Added'))
                 return redirect(reverse('org-details', kwargs={'org': org_id}))
 
@@ -439,6 +436,7 @@ class OrganizationMemberAddView(LoginRequiredMixin, FormView):
         # TODO:  Catch exceptions that will be raised by
         # Ocl lib.
         if result.status_code == 204:
+            invalidate_org_memberships(new_username)
             messages.add_message(self.request, messages.INFO, _('Member Added'))
             return redirect(reverse('org-details', kwargs={'org': self.org['id']}))
         elif result.status_code == 404:
@@ -460,6 +458,7 @@ class OrganizationMemberRemoveView(LoginRequiredMixin,
 
         api = OclApi(self.request, debug=True)
         result = api.delete('orgs', self.org_id, 'members', self.username)
+        invalidate_org_memberships(self.username)
 
         return self.render_json_response({'message':'Member removed'})
 
@@ -473,5 +472,4 @@ class OrganizationMemberRemoveView(LoginRequiredMixin,
 class OrgJsonView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
         api = OclApi(self.request, debug=True)
-        result = api.get('orgs', params={'limit':'0'})
-        return HttpResponse(json.dumps(result.json()), content_type="application/json")
+        return api.get_proxy_response('orgs', params={'limit':'0'})
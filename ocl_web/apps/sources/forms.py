@@ -7,7 +7,7 @@ from django import forms
 
 from libs.ocl import OclApi
 
-from apps.core.views import _get_source_type_list, _get_locale_list, _get_custom_validation_schema_list
+from apps.core.views import _get_custom_validation_schema_list
 from apps.core.fields import ComboBoxWidget, MultipleInputWidget
 
 
@@ -17,9 +17,9 @@ class SourceNewForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super(SourceNewForm, self).__init__(*args, **kwargs)
         # create widgets here to delay calls to api until initialization of the form
-        self.fields['source_type'].widget = ComboBoxWidget(data_list=[(v) for v in _get_source_type_list()], name="source_type_list")
-        self.fields['default_locale'].widget = ComboBoxWidget(data_list=[[l['code'], l['name']] for l in _get_locale_list()], name="default_locale_list")
-        self.fields['supported_locales'].widget = MultipleInputWidget(data_list=[l['name'] for l in _get_locale_list()], name="supported_locale_list")
+        self.fields['source_type'].widget = ComboBoxWidget(option_list='source_types', name="source_type_list")
+        self.fields['default_locale'].widget = ComboBoxWidget(option_list='locales', name="default_locale_list")
+        self.fields['supported_locales'].widget = MultipleInputWidget(option_list='locale_names', name="supported_locale_list")
 
     required_css_class = 'required'
 
@@ -5,6 +5,7 @@ import re
 import requests
 import logging
 import json
+from functools import partial
 from django.http import HttpResponse
 from django.utils.translation import ugettext as _
 from django.core.urlresolvers import reverse
@@ -12,7 +13,6 @@ from django.http import (HttpResponseRedirect, Http404, QueryDict)
 from django.views.generic import TemplateView, View
 from django.views.generic.edit import FormView
 from django.contrib import messages
-from django.core.paginator import Paginator
 from braces.views import LoginRequiredMixin
 from libs.ocl import OclApi, OclSearch, OclConstants
 from simplejson import JSONDecodeError
@@ -20,23 +20,24 @@ from simplejson import JSONDecodeError
 from .forms import (
     SourceNewForm, SourceEditForm,
     SourceVersionsNewForm, SourceVersionsEditForm, SourceVersionsRetireForm, SourceDeleteForm)
-from apps.core.views import UserOrOrgMixin
-from apps.core.utils import SearchStringFormatter
+from apps.core.views import UserOrOrgMixin, RepoVersionSelectorMixin
+from apps.core.utils import SearchStringFormatter, CountPaginator
 from django.utils.http import urlencode
 
 logger = logging.getLogger('oclweb')
 
 
 
-class SourceReadBaseView(TemplateView):
+class SourceReadBaseView(RepoVersionSelectorMixin, TemplateView):
     """ Base class for Source Read views. """
 
-    def get_source_details(self, owner_type, owner_id, source_id, source_version_id=None):
+    def get_source_details(self, owner_type, owner_id, source_id, source_version_id=None,
+                           api_client=None):
         """ Load source details from the API and return as dictionary. """
         # TODO(paynejd@gmail.com): Load details from source version, if applicable (or remove?)
         # TODO(paynejd@gmail.com): Validate the input parameters
 
-        api = OclApi(self.request, debug=True)
+        api = api_client or OclApi(self.request, debug=True)
         search_response = api.get(owner_type, owner_id, 'sources', source_id)
         if search_response.status_code == 404:
             raise Http404
@@ -44,7 +45,8 @@ class SourceReadBaseView(TemplateView):
             search_response.raise_for_status()
         return search_response.json()
 
-    def get_source_versions(self, owner_type, owner_id, source_id, search_params=None):
+    def get_source_versions(self, owner_type, owner_id, source_id, search_params=None,
+                            api_client=None):
         """
         Load source versions from the API and return OclSearch instance with results.
         """
@@ -55,7 +57,7 @@ class SourceReadBaseView(TemplateView):
                              search_scope=OclConstants.SEARCH_SCOPE_RESTRICTED,
                              params=search_params)
 
-        api = OclApi(self.request, debug=True, facets=False)
+        api = api_client or OclApi(self.request, debug=True, facets=False)
         search_response = api.get(owner_type, owner_id, 'sources', source_id, 'versions',
                                   params=searcher.search_params)
 
@@ -104,7 +106,7 @@ class SourceReadBaseView(TemplateView):
         return searcher
 
     def get_source_mappings(self, owner_type, owner_id, source_id,
-                            source_version_id=None, search_params=None):
+                            source_version_id=None, search_params=None, api_client=None):
         """
         Load source mappings from the API and return OclSearch instance with results.
         """
@@ -113,7 +115,7 @@ class SourceReadBaseView(TemplateView):
         searcher = OclSearch(search_type=OclConstants.RESOURCE_NAME_MAPPINGS,
                              search_scope=OclConstants.SEARCH_SCOPE_RESTRICTED,
                              params=search_params)
-        api = OclApi(self.request, debug=True, facets=True)
+        api = api_client or OclApi(self.request, debug=True, facets=True)
         if source_version_id:
             search_response = api.get(
                 owner_type, owner_id, 'sources', source_id, source_version_id, 'mappings',
@@ -250,26 +252,30 @@ class SourceConceptsView(UserOrOrgMixin, SourceReadBaseView):
         context = super(SourceConceptsView, self).get_context_data(*args, **kwargs)
         self.get_args()
         api = OclApi(self.request, debug=True, facets=True)
-
-        # Load the source details
-        source = self.get_source_details(
-            self.owner_type, self.owner_id, self.source_id,
-            source_version_id=self.source_version_id)
-
-        # Load the concepts in this source, applying search parameters
+        api_no_facets = OclApi(self.request, debug=True)
         original_search_string = self.request.GET.get('q', '')
         # TODO: SearchStringFormatter.add_wildcard(self.request)
-        searcher = self.get_source_concepts(
-            api, self.owner_type, self.owner_id, self.source_id,
-            source_version_id=self.source_version_id,
-            search_params=self.request.GET)
-        search_results_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
-        search_results_current_page = search_results_paginator.page(searcher.current_page)
 
-        # Load the source versions
-        source_version_searcher = self.get_source_versions(
-            self.owner_type, self.owner_id, self.source_id,
-            search_params={'limit': '0'})
+        # Load the source details, the concepts in this source (applying search parameters),
+        # the recent source versions and the user's collections concurrently
+        calls = [
+            partial(self.get_source_details,
+                    self.owner_type, self.owner_id, self.source_id,
+                    source_version_id=self.source_version_id, api_client=api_no_facets),
+            partial(self.get_source_concepts,
+                    api, self.owner_type, self.owner_id, self.source_id,
+                    source_version_id=self.source_version_id,
+                    search_params=self.request.GET),
+            partial(self.get_version_selector,
+                    self.owner_type, self.owner_id, 'sources', self.source_id,
+                    selected_version_id=self.source_version_id, api_client=api_no_facets),
+        ]
+        if self.request.user.is_authenticated():
+            calls.append(partial(api.get_all_collections_for_user, self.request.user.username))
+        results = OclApi.gather(*calls)
+        source, searcher, (source_versions, more_source_versions) = results[:3]
+        search_results_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
+        search_results_current_page = search_results_paginator.page(searcher.current_page)
 
         # Build URL params
         transferrable_search_params = {}
@@ -290,7 +296,8 @@ class SourceConceptsView(UserOrOrgMixin, SourceReadBaseView):
         context['kwargs'] = self.kwargs
         context['source'] = source
         context['source_version'] = self.source_version_id
-        context['source_versions'] = source_version_searcher.search_results
+        context['source_versions'] = source_versions
+        context['more_source_versions'] = more_source_versions
         context['selected_tab'] = 'Concepts'
         context['results'] = searcher.search_results
         context['current_page'] = search_results_current_page
@@ -300,8 +307,8 @@ class SourceConceptsView(UserOrOrgMixin, SourceReadBaseView):
         context['search_query'] = original_search_string
         context['search_filters'] = searcher.search_filter_list
 
-        if self.request.user.is_authenticated():
-            context['all_collections'] = api.get_all_collections_for_user(self.request.user.username)
+        if len(results) > 3:
+            context['all_collections'] = results[3]
 
         # Set debug variables
         context['url_params'] = self.request.GET
@@ -350,26 +357,30 @@ class SourceMappingsView(UserOrOrgMixin, SourceReadBaseView):
         context = super(SourceMappingsView, self).get_context_data(*args, **kwargs)
         self.get_args()
         api = OclApi(self.request, debug=True, facets=True)
-
-        # Load the source details
-        source = self.get_source_details(
-            self.owner_type, self.owner_id, self.source_id,
-            source_version_id=self.source_version_id)
-
-        # Load the mappings in this source, applying search parameters
+        api_no_facets = OclApi(self.request, debug=True)
         original_search_string = self.request.GET.get('q', '')
         # TODO: SearchStringFormatter.add_wildcard(self.request)
-        searcher = self.get_source_mappings(
-            self.owner_type, self.owner_id, self.source_id,
-            source_version_id=self.source_version_id,
-            search_params=self.request.GET)
-        search_results_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
-        search_results_current_page = search_results_paginator.page(searcher.current_page)
 
-        # Load the source versions
-        source_version_searcher = self.get_source_versions(
-            self.owner_type, self.owner_id, self.source_id,
-            search_params={'limit': '0'})
+        # Load the source details, the mappings in this source (applying search parameters),
+        # the recent source versions and the user's collections concurrently
+        calls = [
+            partial(self.get_source_details,
+                    self.owner_type, self.owner_id, self.source_id,
+                    source_version_id=self.source_version_id, api_client=api_no_facets),
+            partial(self.get_source_mappings,
+                    self.owner_type, self.owner_id, self.source_id,
+                    source_version_id=self.source_version_id,
+                    search_params=self.request.GET, api_client=api),
+            partial(self.get_version_selector,
+                    self.owner_type, self.owner_id, 'sources', self.source_id,
+                    selected_version_id=self.source_version_id, api_client=api_no_facets),
+        ]
+        if self.request.user.is_authenticated():
+            calls.append(partial(api.get_all_collections_for_user, self.request.user.username))
+        results = OclApi.gather(*calls)
+        source, searcher, (source_versions, more_source_versions) = results[:3]
+        search_results_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
+        search_results_current_page = search_results_paginator.page(searcher.current_page)
 
         # Build URL params
         transferrable_search_params = {}
@@ -390,7 +401,8 @@ class SourceMappingsView(UserOrOrgMixin, SourceReadBaseView):
         context['kwargs'] = self.kwargs
         context['source'] = source
         context['source_version'] = self.source_version_id
-        context['source_versions'] = source_version_searcher.search_results
+        context['source_versions'] = source_versions
+        context['more_source_versions'] = more_source_versions
         context['selected_tab'] = 'Mappings'
         context['results'] = searcher.search_results
         context['current_page'] = search_results_current_page
@@ -400,8 +412,8 @@ class SourceMappingsView(UserOrOrgMixin, SourceReadBaseView):
         context['search_query'] = original_search_string
         context['search_filters'] = searcher.search_filter_list
 
-        if self.request.user.is_authenticated():
-            context['all_collections'] = api.get_all_collections_for_user(self.request.user.username)
+        if len(results) > 3:
+            context['all_collections'] = results[3]
 
         # Set debug variables
         context['url_params'] = self.request.GET
@@ -459,7 +471,7 @@ class SourceExternalReferencesView(UserOrOrgMixin, SourceReadBaseView):
         searcher = self.get_source_extrefs(
             self.owner_type, self.owner_id, self.source_id,
             source_version_id=self.source_version_id, search_params=self.request.GET)
-        search_results_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+        search_results_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_results_current_page = search_results_paginator.page(searcher.current_page)
 
         # Build URL params
@@ -521,7 +533,7 @@ class SourceVersionsView(UserOrOrgMixin, SourceReadBaseView):
         searcher = self.get_source_versions(
             self.owner_type, self.owner_id, self.source_id,
             search_params=params)
-        search_results_paginator = Paginator(range(searcher.num_found), searcher.num_per_page)
+        search_results_paginator = CountPaginator(searcher.num_found, searcher.num_per_page)
         search_results_current_page = search_results_paginator.page(searcher.current_page)
 
         # Set the context
@@ -539,9 +551,8 @@ class SourceVersionsView(UserOrOrgMixin, SourceReadBaseView):
         self.get_args()
         if request.is_ajax():
             api = OclApi(self.request, debug=True)
-            result = api.get(self.owner_type, self.owner_id, 'sources', kwargs.get('source'),
-                             'versions', params={'limit': '0'})
-            return HttpResponse(json.dumps(result.json()), content_type="application/json")
+            return api.get_proxy_response(self.owner_type, self.owner_id, 'sources',
+                                          kwargs.get('source'), 'versions', params={'limit': '0'})
         return super(SourceVersionsView, self).get(self, *args, **kwargs)
 
 
@@ -39,6 +39,7 @@ from apps.collections.views import CollectionDetailView, CollectionCreateView, C
     CollectionReferencesView, CollectionVersionDeleteView, CollectionDeleteView, CollectionAddReferenceView, CollectionVersionsNewView, CollectionReferencesDeleteView, CollectionVersionEditJsonView, \
     CollectionVersionEditView
 
+from apps.core.views import RepoVersionsJsonView
 #from apps.core.views import ExtraJsonView
 urlpatterns = patterns(
     '',
@@ -148,6 +149,10 @@ urlpatterns = patterns(
     url(r'^(?P<org>' + OclConstants.NAMESPACE_PATTERN + ')/sources/(?P<source>' + OclConstants.NAMESPACE_PATTERN + ')/versions/$',
         SourceVersionsView.as_view(), name='source-versions'),
 
+    # /orgs/:org/sources/:source/versions/json/ - JSON ONLY - version dropdown pages
+    url(r'^(?P<org>' + OclConstants.NAMESPACE_PATTERN + ')/sources/(?P<source>' + OclConstants.NAMESPACE_PATTERN + ')/versions/json/$',
+        RepoVersionsJsonView.as_view(repo_type='sources'), name='source-versions-json'),
+
     # /orgs/:org/sources/:source/versions/new/
     url(r'^(?P<org>' + OclConstants.NAMESPACE_PATTERN + ')/sources/(?P<source>' + OclConstants.NAMESPACE_PATTERN + ')/versions/new/$',
         SourceVersionsNewView.as_view(), name='source-version-new'),
@@ -356,6 +361,10 @@ urlpatterns = patterns(
     url(r'^(?P<org>' + OclConstants.NAMESPACE_PATTERN + ')/collections/(?P<collection>' + OclConstants.NAMESPACE_PATTERN + ')/versions/$',
         CollectionVersionsView.as_view(), name='collection-versions'),
 
+    # /orgs/:org/collections/:collection/versions/json/ - JSON ONLY - version dropdown pages
+    url(r'^(?P<org>' + OclConstants.NAMESPACE_PATTERN + ')/collections/(?P<collection>' + OclConstants.NAMESPACE_PATTERN + ')/versions/json/$',
+        RepoVersionsJsonView.as_view(repo_type='collections'), name='collection-versions-json'),
+
     # /orgs/:org/collections/:collection/:version/edit/
     url(r'^(?P<org>' + OclConstants.NAMESPACE_PATTERN + ')/collections/(?P<collection>' + OclConstants.NAMESPACE_PATTERN + ')/(?P<collection_version>' + OclConstants.NAMESPACE_PATTERN + ')/edit/$',
         CollectionVersionEditView.as_view(), name='collection-version-edit'),
@@ -93,6 +93,8 @@ class Common(Configuration):
         'django.contrib.auth.middleware.AuthenticationMiddleware',
         'django.contrib.messages.middleware.MessageMiddleware',
         'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        'apps.core.middleware.ApiCallAccountingMiddleware',
+        'apps.core.middleware.IdentityMapMiddleware',
     )
     ########## END MIDDLEWARE CONFIGURATION
 
@@ -339,6 +341,92 @@ class Common(Configuration):
     API_HOST = values.Value(default='http://172.17.0.1:8000',environ_name='OCL_API_HOST', environ_prefix=None)
     API_TOKEN = values.Value(default='891b4b17feab99f3ff7e5b5d04ccc5da7aa96da6',environ_name='OCL_API_TOKEN', environ_prefix=None)
 
+    # Keep-alive connection pool shared by all OclApi instances in a process.
+    # API_POOL_MAXSIZE caps the open connections per API host; it should be at least the
+    # number of threads per worker that may talk to the API at the same time.
+    API_POOL_CONNECTIONS = values.IntegerValue(default=10, environ_name='OCL_API_POOL_CONNECTIONS', environ_prefix=None)
+    API_POOL_MAXSIZE = values.IntegerValue(default=20, environ_name='OCL_API_POOL_MAXSIZE', environ_prefix=None)
+    API_POOL_BLOCK = values.BooleanValue(default=False, environ_name='OCL_API_POOL_BLOCK', environ_prefix=None)
+    # Threads used to issue independent API calls of a page concurrently (see OclApi.gather).
+    API_THREAD_POOL_SIZE = values.IntegerValue(default=10, environ_name='OCL_API_THREAD_POOL_SIZE', environ_prefix=None)
+    # Seconds the per resource type result counts of a global search are cached for.
+    SEARCH_COUNT_CACHE_TIMEOUT = values.IntegerValue(default=60, environ_name='OCL_SEARCH_COUNT_CACHE_TIMEOUT', environ_prefix=None)
+    # Seconds the OCL reference vocabularies (map types, locales...) are cached for, and for how
+    # much longer a stale copy is served while it is refreshed in the background.
+    REFERENCE_DATA_CACHE_TIMEOUT = values.IntegerValue(default=24 * 60 * 60, environ_name='OCL_REFERENCE_DATA_CACHE_TIMEOUT', environ_prefix=None)
+    REFERENCE_DATA_STALE_TIMEOUT = values.IntegerValue(default=7 * 24 * 60 * 60, environ_name='OCL_REFERENCE_DATA_STALE_TIMEOUT', environ_prefix=None)
+    # Directory where management commands keep the reference vocabularies between runs.
+    REFERENCE_DATA_DISK_CACHE_DIR = values.Value(default=join(BASE_DIR, '.refdata_cache'), environ_name='OCL_REFERENCE_DATA_DISK_CACHE_DIR', environ_prefix=None)
+    # Number of API calls a single page may make before a warning is logged (0 to disable).
+    API_CALL_BUDGET = values.IntegerValue(default=25, environ_name='OCL_API_CALL_BUDGET', environ_prefix=None)
+    # Panels of django-debug-toolbar where it is installed: the defaults plus the OCL API calls.
+    DEBUG_TOOLBAR_PANELS = [
+        'debug_toolbar.panels.versions.VersionsPanel',
+        'debug_toolbar.panels.timer.TimerPanel',
+        'debug_toolbar.panels.settings.SettingsPanel',
+        'debug_toolbar.panels.headers.HeadersPanel',
+        'debug_toolbar.panels.request.RequestPanel',
+        'apps.core.panels.ApiCallsPanel',
+        'debug_toolbar.panels.sql.SQLPanel',
+        'debug_toolbar.panels.staticfiles.StaticFilesPanel',
+        'debug_toolbar.panels.templates.TemplatesPanel',
+        'debug_toolbar.panels.cache.CachePanel',
+        'debug_toolbar.panels.signals.SignalsPanel',
+        'debug_toolbar.panels.logging.LoggingPanel',
+        'debug_toolbar.panels.redirects.RedirectsPanel',
+    ]
+    # Seconds the list of orgs a user belongs to is cached for permission checks.
+    ORG_MEMBERSHIP_CACHE_TIMEOUT = values.IntegerValue(default=60, environ_name='OCL_ORG_MEMBERSHIP_CACHE_TIMEOUT', environ_prefix=None)
+    # Seconds the collections listed in the add to collection dropdown are cached for, per user.
+    USER_COLLECTIONS_CACHE_TIMEOUT = values.IntegerValue(default=5 * 60, environ_name='OCL_USER_COLLECTIONS_CACHE_TIMEOUT', environ_prefix=None)
+    # API calls are traced to the "oclapi.request" logger at DEBUG level (see libs/ocl/tracing.py).
+    # Set a sample rate between 0.0 and 1.0 to also log the raw body of that share of the calls.
+    API_TRACE_BODY_SAMPLE_RATE = values.FloatValue(default=0.0, environ_name='OCL_API_TRACE_BODY_SAMPLE_RATE', environ_prefix=None)
+    API_TRACE_BODY_MAX_BYTES = values.IntegerValue(default=2048, environ_name='OCL_API_TRACE_BODY_MAX_BYTES', environ_prefix=None)
+    # Opt-in cache of anonymous API GET responses shared by each process (see libs/ocl/response_cache.py).
+    # API_RESPONSE_CACHE_TTLS overrides the seconds responses are fresh for by resource type,
+    # e.g. {"concepts": 600}; a TTL of 0 disables caching for that type.
+    API_RESPONSE_CACHE_ENABLED = values.BooleanValue(default=False, environ_name='OCL_API_RESPONSE_CACHE_ENABLED', environ_prefix=None)
+    API_RESPONSE_CACHE_MAX_BYTES = values.IntegerValue(default=50 * 1024 * 1024, environ_name='OCL_API_RESPONSE_CACHE_MAX_BYTES', environ_prefix=None)
+    API_RESPONSE_CACHE_TTLS = values.DictValue({}, environ_name='OCL_API_RESPONSE_CACHE_TTLS', environ_prefix=None)
+    # Seconds to wait for the API to accept a connection and to answer; API_READ_TIMEOUTS
+    # overrides the read timeout by resource type, e.g. {"references": 120}.
+    API_CONNECT_TIMEOUT = values.FloatValue(default=3.05, environ_name='OCL_API_CONNECT_TIMEOUT', environ_prefix=None)
+    API_READ_TIMEOUT = values.FloatValue(default=30, environ_name='OCL_API_READ_TIMEOUT', environ_prefix=None)
+    API_READ_TIMEOUTS = values.DictValue({}, environ_name='OCL_API_READ_TIMEOUTS', environ_prefix=None)
+    # Retries of GET/HEAD calls failing with a connection error, a timeout or a 502/503/504,
+    # after a random backoff of up to API_RETRY_BACKOFF * 2^attempt seconds.
+    API_RETRIES = values.IntegerValue(default=2, environ_name='OCL_API_RETRIES', environ_prefix=None)
+    API_RETRY_BACKOFF = values.FloatValue(default=0.1, environ_name='OCL_API_RETRY_BACKOFF', environ_prefix=None)
+    # Consecutive failures after which calls to the API fail fast, and the seconds until it is tried again.
+    API_BREAKER_FAILURE_THRESHOLD = values.IntegerValue(default=5, environ_name='OCL_API_BREAKER_FAILURE_THRESHOLD', environ_prefix=None)
+    API_BREAKER_RESET_TIMEOUT = values.IntegerValue(default=30, environ_name='OCL_API_BREAKER_RESET_TIMEOUT', environ_prefix=None)
+
+    # Concurrent identical API GETs share one call (libs/ocl/singleflight.py). Anonymous GETs are
+    # also shared between workers through this cache alias when set; it must be shared, e.g. memcached.
+    API_SINGLE_FLIGHT_ENABLED = values.BooleanValue(default=True, environ_name='OCL_API_SINGLE_FLIGHT_ENABLED', environ_prefix=None)
+    API_SINGLE_FLIGHT_SHARED_CACHE = values.Value(default=None, environ_name='OCL_API_SINGLE_FLIGHT_SHARED_CACHE', environ_prefix=None)
+    # Seconds a worker publishes its response to the others, and the seconds they wait for it.
+    API_SINGLE_FLIGHT_SHARED_TTL = values.IntegerValue(default=2, environ_name='OCL_API_SINGLE_FLIGHT_SHARED_TTL', environ_prefix=None)
+    API_SINGLE_FLIGHT_SHARED_WAIT = values.FloatValue(default=5, environ_name='OCL_API_SINGLE_FLIGHT_SHARED_WAIT', environ_prefix=None)
+
+    # Versions listed in the version dropdown of source and collection pages; older ones are loaded
+    # on demand, and browsers cache them for VERSION_SELECTOR_CACHE_TIMEOUT seconds.
+    VERSION_SELECTOR_SIZE = values.IntegerValue(default=10, environ_name='OCL_VERSION_SELECTOR_SIZE', environ_prefix=None)
+    VERSION_SELECTOR_CACHE_TIMEOUT = values.IntegerValue(default=60, environ_name='OCL_VERSION_SELECTOR_CACHE_TIMEOUT', environ_prefix=None)
+
+    # CSV exports (/core/export/csv/): maximum number of rows, and results requested per API call.
+    CSV_EXPORT_MAX_ROWS = values.IntegerValue(default=100000, environ_name='OCL_CSV_EXPORT_MAX_ROWS', environ_prefix=None)
+    CSV_EXPORT_PAGE_SIZE = values.IntegerValue(default=500, environ_name='OCL_CSV_EXPORT_PAGE_SIZE', environ_prefix=None)
+
+    # Combo box option lists (/core/options/lists/): seconds their JSON is cached by the server,
+    # and by browsers, the URL changing with the content.
+    OPTION_LIST_CACHE_TIMEOUT = values.IntegerValue(default=300, environ_name='OCL_OPTION_LIST_CACHE_TIMEOUT', environ_prefix=None)
+    OPTION_LIST_MAX_AGE = values.IntegerValue(default=365 * 24 * 60 * 60, environ_name='OCL_OPTION_LIST_MAX_AGE', environ_prefix=None)
+
+    # Mappings listed per category and page on the concept mappings page (?mappings_page=2...)
+    CONCEPT_MAPPINGS_PAGE_SIZE = values.IntegerValue(default=100, environ_name='OCL_CONCEPT_MAPPINGS_PAGE_SIZE', environ_prefix=None)
+
 class Local(Common):
     """ Local class """
     DEBUG = values.BooleanValue(True)
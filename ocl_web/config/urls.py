@@ -13,6 +13,7 @@ from django.conf.urls import patterns, include, url
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 
+from apps.core.routing import PrefixTreeResolver
 from apps.ocl_search.views import GlobalSearchView
 from apps.tests.views import TestTagsView
 
@@ -28,10 +29,11 @@ urlpatterns = patterns(
     url(r'^search/$', GlobalSearchView.as_view(), name="search"),
 
     # Organizations - /orgs/...
-    url(r'^orgs/', include('config.orgs_urls')),
+    # Both are resolved through a prefix tree of their patterns, see apps.core.routing
+    PrefixTreeResolver(r'^orgs/', 'config.orgs_urls'),
 
     # Users - /users/...
-    url(r'^users/', include('config.users_urls')),
+    PrefixTreeResolver(r'^users/', 'config.users_urls'),
 
     # Core - /core/options/datatypes/ OR /core/stats/concepts/
     # TODO(paynejd@gmail.com): Core stats/options is interesting but needs to be thought through
@@ -26,7 +26,7 @@ from apps.concepts.views import (
     ConceptRetireView, ConceptNewView, ConceptDescView, ConceptNameView)
 from apps.mappings.views import (
     MappingDetailsView, MappingNewView, MappingEditView, MappingRetireView, MappingVersionsView)
-from apps.core.views import ExtraJsonView
+from apps.core.views import ExtraJsonView, RepoVersionsJsonView
 from apps.collections.views import CollectionDetailView, CollectionCreateView, CollectionEditView, CollectionAboutView, \
     CollectionVersionsView, CollectionConceptsView, CollectionMappingsView, \
     CollectionReferencesView, CollectionVersionDeleteView, CollectionDeleteView, CollectionAddReferenceView, CollectionVersionsNewView, CollectionReferencesDeleteView, CollectionVersionEditJsonView, \
@@ -100,6 +100,10 @@ urlpatterns = patterns(
     url(r'^(?P<user>' + OclConstants.NAMESPACE_PATTERN + ')/sources/(?P<source>' + OclConstants.NAMESPACE_PATTERN + ')/versions/$',
         SourceVersionsView.as_view(), name='source-versions'),
 
+    # /users/:user/sources/:source/versions/json/ - JSON ONLY - version dropdown pages
+    url(r'^(?P<user>' + OclConstants.NAMESPACE_PATTERN + ')/sources/(?P<source>' + OclConstants.NAMESPACE_PATTERN + ')/versions/json/$',
+        RepoVersionsJsonView.as_view(repo_type='sources'), name='source-versions-json'),
+
     # /users/:user/sources/:source/versions/new/
     url(r'^(?P<user>' + OclConstants.NAMESPACE_PATTERN + ')/sources/(?P<source>' + OclConstants.NAMESPACE_PATTERN + ')/versions/new/$',
         SourceVersionsNewView.as_view(), name='source-version-new'),
@@ -326,6 +330,10 @@ urlpatterns = patterns(
     # /users/:user/collections/:collection/versions/
     url(r'^(?P<user>' + OclConstants.NAMESPACE_PATTERN + ')/collections/(?P<collection>' + OclConstants.NAMESPACE_PATTERN + ')/versions/$',
         CollectionVersionsView.as_view(), name='collection-versions'),
+
+    # /users/:user/collections/:collection/versions/json/ - JSON ONLY - version dropdown pages
+    url(r'^(?P<user>' + OclConstants.NAMESPACE_PATTERN + ')/collections/(?P<collection>' + OclConstants.NAMESPACE_PATTERN + ')/versions/json/$',
+        RepoVersionsJsonView.as_view(repo_type='collections'), name='collection-versions-json'),
     # /users/:user/collections/:collection/:collection_version/edit/
     url(r'^(?P<user>' + OclConstants.NAMESPACE_PATTERN + ')/collections/(?P<collection>' + OclConstants.NAMESPACE_PATTERN + ')/(?P<collection_version>' + OclConstants.NAMESPACE_PATTERN + ')/edit/$',
         CollectionVersionEditView.as_view(), name='collection-version-edit'),
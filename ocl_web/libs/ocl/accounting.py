@@ -0,0 +1,81 @@
+"""
+Per-request accounting of the calls made to the OCL API.
+
+While a recorder is active for the current thread (see start_recording(), used by
+apps.core.middleware.ApiCallAccountingMiddleware), every response returned by the
+process-wide API session is recorded with its method, path, status, latency and size.
+Calls submitted to the thread pool (see concurrency.py) are recorded by the recorder of the
+thread that submitted them.
+"""
+import threading
+from collections import namedtuple, Counter
+
+from .tracing import get_response_size
+
+
+ApiCall = namedtuple('ApiCall', ['method', 'path', 'status', 'latency_ms', 'bytes'])
+
+_local = threading.local()
+
+
+class ApiCallRecorder(object):
+    """ The API calls made while handling one request """
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def record(self, response):
+        """ Record the call that returned the given requests.Response """
+        request = response.request
+        call = ApiCall(request.method, request.path_url, response.status_code,
+                       response.elapsed.total_seconds() * 1000, get_response_size(response))
+        with self.lock:
+            self.calls.append(call)
+
+    @property
+    def count(self):
+        return len(self.calls)
+
+    @property
+    def latency_ms(self):
+        """ Sum of the latency of the calls; more than the time waited if calls overlapped """
+        return sum(call.latency_ms for call in self.calls)
+
+    @property
+    def bytes(self):
+        return sum(call.bytes or 0 for call in self.calls)
+
+    def most_repeated(self, limit=3):
+        """ Return the (path, count) of the paths requested more than once, most frequent first """
+        counts = Counter(call.path.split('?', 1)[0] for call in self.calls)
+        return [(path, count) for path, count in counts.most_common(limit) if count > 1]
+
+
+def get_recorder():
+    """ Return the recorder active for the current thread, or None """
+    return getattr(_local, 'recorder', None)
+
+
+def set_recorder(recorder):
+    """ Make recorder the active recorder of the current thread (None to stop recording) """
+    _local.recorder = recorder
+
+
+def start_recording():
+    """ Start recording the API calls of the current thread and return the recorder """
+    recorder = ApiCallRecorder()
+    set_recorder(recorder)
+    return recorder
+
+
+def stop_recording():
+    """ Stop recording the API calls of the current thread """
+    set_recorder(None)
+
+
+def record_response_hook(response, *args, **kwargs):
+    """ requests response hook recording the call with the active recorder, if any """
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.record(response)
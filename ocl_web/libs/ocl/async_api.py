@@ -0,0 +1,56 @@
+"""
+Non-blocking sibling of OclApi.
+
+AsyncOclApi has the same methods as OclApi for the calls usually issued in bulk, but each one
+schedules the call on a thread pool and returns an ApiFuture right away, so that many calls
+can be in flight at once from a single thread:
+
+    api = AsyncOclApi(request)
+    futures = [api.get('orgs', org_id) for org_id in org_ids]
+    responses = api.wait_all(futures)
+
+The calls run on the shared thread pool (settings.API_THREAD_POOL_SIZE), or on the executor
+passed in, e.g. ApiExecutor(200) for a management command driving hundreds of calls. They use
+the process-wide connection pool, the response cache and the circuit breaker like any other
+OclApi call, and are recorded in the API accounting of the request that scheduled them.
+"""
+from . import OclApi
+from .concurrency import submit, wait_all
+
+
+def _scheduled(name):
+    """ Return an AsyncOclApi method scheduling the OclApi method of the given name """
+    def method(self, *args, **kwargs):
+        return self.submit(getattr(self.api, name), *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = 'Schedule OclApi.%s() and return an ApiFuture of its result.' % name
+    return method
+
+
+class AsyncOclApi(object):
+    """
+    Interface to the OCL API whose calls return ApiFutures instead of waiting for the API.
+    Takes the arguments of OclApi, plus an optional executor to run the calls on.
+    """
+
+    def __init__(self, request=None, debug=False, admin=False, facets=False, executor=None):
+        self.api = OclApi(request, debug=debug, admin=admin, facets=facets)
+        self.executor = executor
+
+    def submit(self, func, *args, **kwargs):
+        """ Schedule func(*args, **kwargs) and return an ApiFuture of its result """
+        if self.executor is not None:
+            return self.executor.submit(func, *args, **kwargs)
+        return submit(func, *args, **kwargs)
+
+    get = _scheduled('get')
+    head = _scheduled('head')
+    post = _scheduled('post')
+    put = _scheduled('put')
+    delete = _scheduled('delete')
+    create_concept = _scheduled('create_concept')
+    create_mapping = _scheduled('create_mapping')
+    get_all_collections_for_user = _scheduled('get_all_collections_for_user')
+
+    # Sync bridge: wait for scheduled calls, e.g. api.wait_all([api.get(...), api.get(...)])
+    wait_all = staticmethod(wait_all)
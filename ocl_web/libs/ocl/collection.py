@@ -0,0 +1,17 @@
+# from ..ocl import ApiResource
+
+
+# class Collection(ApiResource):
+#     def __init__(self):
+#         super(Collection, self).__init__()
+#         self.names = []
+#         self.descriptions = []
+#         self.collectionType = ""
+#         self.owner = ""
+#         self.publicAccess = ""
+#         self.sharedUsers = []
+#         self.starCount = 0
+#         self.concepts = []
+
+#     def getPreferredName(self, locale='en'):
+#         pass
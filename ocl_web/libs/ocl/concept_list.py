@@ -0,0 +1,8 @@
+# from ..ocl import ApiResource
+
+
+# class ConceptList(ApiResource):
+#     # Source and Collection inherit from this?
+#     def __init__(self):
+#         super(ConceptList, self).__init__()
+#         self.conceptList = {}
@@ -0,0 +1,147 @@
+"""
+Thread pool used to issue independent OCL API requests concurrently.
+
+Most page views need several unrelated API resources (the repository, its versions, a search,
+the user's collections...). Dispatching them together makes page latency the slowest call
+rather than the sum of all of them.
+"""
+import os
+import sys
+import threading
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
+
+from .accounting import get_recorder, set_recorder
+
+
+DEFAULT_THREAD_POOL_SIZE = 10
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_thread_pool():
+    """
+    Return the process-wide thread pool, creating it on first use (or after a fork).
+    Its size is set by settings.API_THREAD_POOL_SIZE.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                size = getattr(settings, 'API_THREAD_POOL_SIZE', DEFAULT_THREAD_POOL_SIZE)
+                _pool = ThreadPool(processes=size)
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def _run_in_worker(func, args, kwargs, recorder):
+    """
+    Runs func in a pool thread, flagging the thread so nested submits run inline, and
+    recording its API calls with the recorder of the submitting thread.
+    """
+    _local.in_worker = True
+    set_recorder(recorder)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        set_recorder(None)
+
+
+class ApiFuture(object):
+    """
+    Handle to the result of a call submitted with submit().
+    """
+
+    def __init__(self, async_result=None, value=None, exc_info=None):
+        self._async_result = async_result
+        self._value = value
+        self._exc_info = exc_info
+
+    def result(self, timeout=None):
+        """
+        Wait for the call to finish and return its return value.
+        Any exception raised by the call is re-raised here.
+        """
+        if self._async_result is not None:
+            return self._async_result.get(timeout)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._value
+
+
+def submit(func, *args, **kwargs):
+    """
+    Schedule func(*args, **kwargs) on the thread pool and return an ApiFuture.
+
+    Calls submitted from a pool thread are run immediately in that thread instead,
+    so that nested fan-outs can never deadlock waiting on the pool they are using.
+    """
+    if getattr(_local, 'in_worker', False):
+        try:
+            return ApiFuture(value=func(*args, **kwargs))
+        except Exception:   # pylint: disable=W0703
+            return ApiFuture(exc_info=sys.exc_info())
+    return ApiFuture(async_result=get_thread_pool().apply_async(
+        _run_in_worker, (func, args, kwargs, get_recorder())))
+
+
+class ApiExecutor(object):
+    """
+    A thread pool of its own, for callers that need many more calls in flight than
+    settings.API_THREAD_POOL_SIZE, e.g. management commands. Its calls share the process-wide
+    connection pool, so raise settings.API_POOL_MAXSIZE to match its size, otherwise the
+    connections beyond it are opened and closed for each call.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.pool = ThreadPool(processes=size)
+
+    def submit(self, func, *args, **kwargs):
+        """ Same as submit(), on this executor's threads """
+        return ApiFuture(async_result=self.pool.apply_async(
+            _run_in_worker, (func, args, kwargs, get_recorder())))
+
+    def close(self):
+        """ Wait for the submitted calls to finish and stop the threads """
+        self.pool.close()
+        self.pool.join()
+
+
+def wait_all(futures):
+    """
+    Wait for the passed ApiFutures and return their results in the same order.
+    If any of them raises, the first exception (in argument order) is re-raised once
+    all of them have finished.
+    """
+    results = []
+    error = None
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception:   # pylint: disable=W0703
+            results.append(None)
+            if error is None:
+                error = sys.exc_info()
+    if error is not None:
+        raise error[0], error[1], error[2]
+    return results
+
+
+def gather(*funcs):
+    """
+    Run the passed callables concurrently and return their results in the same order.
+    If any of them raises, the first exception (in argument order) is re-raised once
+    all of the callables have finished.
+
+    Use functools.partial to pass arguments, e.g.:
+        source, versions = gather(partial(api.get, 'orgs', 'CIEL', 'sources', 'CIEL'),
+                                  partial(api.get, 'orgs', 'CIEL', 'sources', 'CIEL', 'versions'))
+    """
+    if len(funcs) == 1:
+        return [funcs[0]()]
+    return wait_all([submit(func) for func in funcs])
@@ -0,0 +1,123 @@
+"""
+CSV export of search and repository results, streamed in constant memory.
+
+iter_search_results() walks the result pages of a search through OclApi, decoding each page
+one item at a time, and iter_csv() turns the items into CSV lines, so an export never holds
+more than the item being written, whatever the number of results.
+"""
+import csv
+
+import simplejson as json
+
+
+DEFAULT_PAGE_SIZE = 500
+
+# (Header, field) of the CSV columns, by resource type
+CSV_COLUMNS = {
+    'concepts': [
+        ('ID', 'id'), ('Name', 'display_name'), ('Concept Class', 'concept_class'),
+        ('Datatype', 'datatype'), ('Locale', 'display_locale'), ('Retired', 'retired'),
+        ('Owner', 'owner'), ('Source', 'source'), ('Version', 'version'), ('URL', 'url'),
+    ],
+    'mappings': [
+        ('ID', 'id'), ('Map Type', 'map_type'),
+        ('From Source', 'from_source_name'), ('From Concept', 'from_concept_code'),
+        ('From Concept Name', 'from_concept_name'),
+        ('To Source', 'to_source_name'), ('To Concept', 'to_concept_code'),
+        ('To Concept Name', 'to_concept_name'), ('Retired', 'retired'),
+        ('Owner', 'owner'), ('Source', 'source'), ('URL', 'url'),
+    ],
+    'references': [
+        ('Expression', 'expression'), ('Reference Type', 'reference_type'),
+    ],
+    'versions': [
+        ('ID', 'id'), ('Description', 'description'), ('Released', 'released'),
+        ('Retired', 'retired'), ('External ID', 'external_id'), ('Created On', 'created_on'),
+        ('Updated On', 'updated_on'), ('URL', 'url'),
+    ],
+    'sources': [
+        ('ID', 'id'), ('Name', 'name'), ('Full Name', 'full_name'),
+        ('Source Type', 'source_type'), ('Owner', 'owner'), ('Owner Type', 'owner_type'),
+        ('Default Locale', 'default_locale'), ('URL', 'url'),
+    ],
+    'collections': [
+        ('ID', 'id'), ('Name', 'name'), ('Full Name', 'full_name'),
+        ('Collection Type', 'collection_type'), ('Owner', 'owner'),
+        ('Owner Type', 'owner_type'), ('URL', 'url'),
+    ],
+    'orgs': [
+        ('ID', 'id'), ('Name', 'name'), ('Company', 'company'), ('Location', 'location'),
+        ('Website', 'website'), ('URL', 'url'),
+    ],
+    'users': [
+        ('Username', 'username'), ('Name', 'name'), ('Company', 'company'),
+        ('Location', 'location'), ('URL', 'url'),
+    ],
+}
+
+
+def iter_search_results(api, path, params, start=0, max_rows=None,
+                        page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return an iterator over the results of a search, requesting them a page at a time.
+
+    The first page is requested right away, so that errors are raised before a response
+    starts streaming.
+    :param path: API path segments, e.g. ['orgs', 'CIEL', 'sources', 'CIEL', 'concepts']
+    :param params: API search parameters, e.g. OclSearch.search_params; page and limit are
+                   set here
+    :param start: 0-based index of the first result, to resume an interrupted export
+    :param max_rows: maximum number of results, None for all of them
+    :raises: requests.HTTPError if the API does not return the first page
+    """
+    page, skip = divmod(start, page_size)
+    first_page = api.iter_json_list(*path, params=dict(params, page=page + 1, limit=page_size))
+    return _iter_pages(api, path, params, first_page, page + 1, skip, max_rows, page_size)
+
+
+def _iter_pages(api, path, params, items, page, skip, max_rows, page_size):
+    count = 0
+    while True:
+        page_count = 0
+        for item in items:
+            page_count += 1
+            if page_count <= skip:
+                continue
+            if max_rows is not None and count >= max_rows:
+                return
+            count += 1
+            yield item
+        if page_count < page_size or (max_rows is not None and count >= max_rows):
+            return
+        page += 1
+        skip = 0
+        items = api.iter_json_list(*path, params=dict(params, page=page, limit=page_size))
+
+
+class _Echo(object):
+    """ File-like object returning what is written to it, so csv.writer returns its lines """
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value)
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+
+def iter_csv(items, columns, header=True):
+    """
+    Yield the items as UTF-8 encoded CSV lines, with the given (Header, field) columns.
+    :param header: whether to start with the header line; not when resuming an export
+    """
+    writer = csv.writer(_Echo())
+    if header:
+        yield writer.writerow([_format_value(title) for title, _ in columns])
+    for item in items:
+        yield writer.writerow([_format_value(item.get(field)) for _, field in columns])
@@ -0,0 +1,67 @@
+"""
+Request-scoped identity map of the API resources fetched while handling a page.
+
+Views often GET the same resource more than once per request, e.g. a source loaded by both
+get_form_class() and get_context_data(), or by a base class and again by the view. Every
+OclApi built with the request records its GET responses in the map attached to the request,
+and answers the later identical GETs (same URL, params and headers) from it, so each
+resource is fetched at most once per page whatever the structure of the view code.
+
+The map is attached to the HTTP requests by apps.core.middleware.IdentityMapMiddleware, so
+that it lives as long as one page: OclApi only looks it up, and objects passed as request
+outside of a page (e.g. the long-lived fake request of the importer) get no map.
+
+Any POST, PUT or DELETE made for the request empties the map, before the call and again
+after it, since it may have changed the resources already fetched, including those fetched
+by other threads of the request while it was running.
+"""
+import threading
+
+import requests
+
+from .singleflight import make_key, copy_response
+
+
+REQUEST_ATTRIBUTE = 'api_resources'
+
+
+class IdentityMap(object):
+    """ The API responses fetched for one request, by GET key """
+
+    def __init__(self):
+        self.responses = {}
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, params, headers):
+        """ Return a copy of the response of an identical GET made before, or None """
+        with self.lock:
+            response = self.responses.get(make_key(url, params, headers))
+            if response is not None:
+                self.hits += 1
+        return copy_response(response) if response is not None else None
+
+    def set(self, url, params, headers, response):
+        """ Record the fully read response of a GET, if successful """
+        if response.status_code == requests.codes.ok:
+            with self.lock:
+                self.responses[make_key(url, params, headers)] = response
+
+    def clear(self):
+        with self.lock:
+            self.responses.clear()
+
+    def __len__(self):
+        return len(self.responses)
+
+
+def attach_identity_map(request):
+    """ Attach an empty identity map to an HTTP request, and return it """
+    identity_map = IdentityMap()
+    setattr(request, REQUEST_ATTRIBUTE, identity_map)
+    return identity_map
+
+
+def get_identity_map(request):
+    """ Return the identity map attached to the request, or None """
+    return getattr(request, REQUEST_ATTRIBUTE, None)
@@ -0,0 +1,9 @@
+# from ..ocl import ApiResource
+
+
+# class MapType(ApiResource):
+#     def __init__(self):
+#         super(MapType, self).__init__()
+#         self.names = []
+#         self.descriptions = []
+#         self.sources = []
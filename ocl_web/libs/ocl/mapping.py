@@ -0,0 +1,9 @@
+# from ..ocl import ApiResource
+
+
+# class Mapping(ApiResource):
+#     def __init__(self):
+#         super(Mapping, self).__init__()
+#         self.conceptA = {}
+#         self.conceptB = {}
+#         self.mapType = ""
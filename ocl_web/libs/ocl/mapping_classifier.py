@@ -0,0 +1,139 @@
+"""
+Classification of the mappings of a concept, relative to that concept.
+
+A concept details or mappings page lists the direct mappings of the concept (from it) and
+its inverse mappings (to it), by category, with links to the mapping and to the concepts,
+sources and owners at both ends. MappingClassifier classifies a whole batch of mappings in
+a single pass, comparing a precomputed key of the concept to the key of each end, and
+builds the links from precomputed URL templates instead of reversing URLs per mapping, so
+that concepts with thousands of mappings (CONCEPT-SET or Q-AND-A hubs) stay cheap to render.
+
+paginate_categories() then cuts the classified mappings in pages, so that such concepts
+are not rendered all at once.
+"""
+from collections import OrderedDict
+import urllib
+
+
+DIRECT_INTERNAL = 'Direct Internal Mapping'
+DIRECT_EXTERNAL = 'Direct External Mapping'
+INVERSE = 'Inverse Mapping'
+LINKED_ANSWER = 'Linked Answer'
+LINKED_QUESTION = 'Linked Question'
+SET_MEMBER = 'Set Member'
+SET_PARENT = 'Set Parent'
+OTHER = 'Other'
+
+MAPPING_CATEGORIES = (DIRECT_INTERNAL, DIRECT_EXTERNAL, INVERSE, LINKED_ANSWER,
+                      LINKED_QUESTION, SET_MEMBER, SET_PARENT, OTHER)
+
+# Categories of the map types listed apart, for direct and inverse mappings
+DIRECT_MAP_TYPE_CATEGORIES = {'Q-AND-A': LINKED_ANSWER, 'CONCEPT-SET': SET_MEMBER}
+INVERSE_MAP_TYPE_CATEGORIES = {'Q-AND-A': LINKED_QUESTION, 'CONCEPT-SET': SET_PARENT}
+
+
+def _owner_type(owner_type):
+    """ Return the owner type of the URL templates: 'Organization', else 'User' """
+    return owner_type if owner_type == 'Organization' else 'User'
+
+
+def _quote(value):
+    """ Return the value quoted for a URL path segment """
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return urllib.quote(str(value), safe='')
+
+
+class MappingClassifier(object):
+    """
+    Classifies the mappings of a concept relative to the concept.
+
+    :param owner_type: 'Organization' or 'User', owner type of the source of the concept
+    :param url_templates: optional, URL templates by (resource, owner type), resource being
+        'owner', 'source', 'concept' or 'mapping', and owner type 'Organization' or 'User';
+        formatted with the keys owner, source, concept and mapping, e.g.
+        {('concept', 'Organization'): '/orgs/%(owner)s/sources/%(source)s/concepts/%(concept)s/'}
+    """
+
+    def __init__(self, owner_type, owner_id, source_id, concept_id, url_templates=None):
+        self.concept_key = (owner_type, owner_id, source_id, concept_id)
+        self.url_templates = url_templates
+
+    def classify(self, mappings):
+        """
+        Classify the mappings, and return them by category, in the order of
+        MAPPING_CATEGORIES. Sets on each mapping:
+        - is_direct_mapping, is_inverse_mapping: mapping from or to the concept, or neither
+          (category 'Other') if the concept is at neither end
+        - is_internal_mapping, is_external_mapping: whether the to concept is in OCL
+        - mapping_category
+        - if URL templates were passed, mapping_url, and the URLs of the concept, source and
+          owner at each end: from_url, from_source_url, from_owner_url, to_url,
+          to_source_url and to_owner_url. to_url is the URL of the to source of external
+          mappings.
+        """
+        categories = OrderedDict((category, []) for category in MAPPING_CATEGORIES)
+        concept_key = self.concept_key
+        direct_categories = DIRECT_MAP_TYPE_CATEGORIES
+        inverse_categories = INVERSE_MAP_TYPE_CATEGORIES
+        set_urls = self._set_urls if self.url_templates else None
+
+        for mapping in mappings:
+            is_internal = bool(mapping['to_concept_url'])
+            if (mapping['from_source_owner_type'], mapping['from_source_owner'],
+                    mapping['from_source_name'], mapping['from_concept_code']) == concept_key:
+                is_direct, is_inverse = True, False
+                category = direct_categories.get(
+                    mapping['map_type'], DIRECT_INTERNAL if is_internal else DIRECT_EXTERNAL)
+            elif (mapping['to_source_owner_type'], mapping['to_source_owner'],
+                  mapping['to_source_name'], mapping['to_concept_code']) == concept_key:
+                is_direct, is_inverse = False, True
+                category = inverse_categories.get(mapping['map_type'], INVERSE)
+            else:
+                is_direct = is_inverse = False
+                category = OTHER
+
+            mapping['is_direct_mapping'] = is_direct
+            mapping['is_inverse_mapping'] = is_inverse
+            mapping['is_internal_mapping'] = is_internal
+            mapping['is_external_mapping'] = not is_internal
+            mapping['mapping_category'] = category
+            if set_urls is not None:
+                set_urls(mapping, is_internal)
+            categories[category].append(mapping)
+        return categories
+
+    def _set_urls(self, mapping, is_internal):
+        templates = self.url_templates
+        mapping['mapping_url'] = templates['mapping', _owner_type(mapping['owner_type'])] % {
+            'owner': _quote(mapping['owner']),
+            'source': _quote(mapping['source']),
+            'mapping': _quote(mapping['id']),
+        }
+
+        for end in ('from', 'to'):
+            owner_type = _owner_type(mapping[end + '_source_owner_type'])
+            values = {
+                'owner': _quote(mapping[end + '_source_owner']),
+                'source': _quote(mapping[end + '_source_name']),
+                'concept': _quote(mapping[end + '_concept_code']),
+            }
+            mapping[end + '_owner_url'] = templates['owner', owner_type] % values
+            mapping[end + '_source_url'] = templates['source', owner_type] % values
+            if end == 'from' or is_internal:
+                mapping[end + '_url'] = templates['concept', owner_type] % values
+            else:
+                mapping[end + '_url'] = mapping[end + '_source_url']
+
+
+def paginate_categories(categories, page, per_page):
+    """
+    Return (categories, has_more): the given page of the mappings of each category, and
+    whether any category has more mappings after that page.
+    :param page: 1-based page number
+    """
+    start, end = (page - 1) * per_page, page * per_page
+    page_categories = OrderedDict(
+        (category, mappings[start:end]) for category, mappings in categories.items())
+    has_more = any(len(mappings) > end for mappings in categories.values())
+    return page_categories, has_more
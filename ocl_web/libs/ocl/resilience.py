@@ -0,0 +1,224 @@
+"""
+Protection of the web tier against a slow or failing OCL API.
+
+- every call has a connect and a read timeout; the read timeout depends on the type of
+  resource requested (the last known one in the path), see DEFAULT_READ_TIMEOUTS and
+  settings.API_READ_TIMEOUTS
+- idempotent calls (GET, HEAD) that fail with a connection error, a timeout or a 502/503/504
+  are retried up to settings.API_RETRIES times, after a jittered exponential backoff
+- a circuit breaker opens after settings.API_BREAKER_FAILURE_THRESHOLD consecutive failures
+  of that kind. While it is open calls fail fast with ApiUnavailable, and OclApi.get serves
+  stale cached responses where it has them. After settings.API_BREAKER_RESET_TIMEOUT seconds
+  a single trial call is let through, and its outcome closes or re-opens the breaker. A trial
+  without outcome after another API_BREAKER_RESET_TIMEOUT seconds is considered lost, and
+  another one is let through.
+
+The breaker state and counters are returned by get_circuit_breaker().get_stats().
+"""
+import time
+import random
+import logging
+import threading
+
+import requests
+from django.conf import settings
+
+
+logger = logging.getLogger('oclapi')
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30
+# Seconds to wait for the API to answer, by the type of resource requested
+DEFAULT_READ_TIMEOUTS = {
+    'orgs': 10,
+    'users': 10,
+    'sources': 15,
+    'collections': 15,
+    'concepts': 30,
+    'mappings': 30,
+    'references': 60,
+    'export': 120,
+}
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.1
+MAX_BACKOFF = 2
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+class ApiUnavailable(requests.ConnectionError):
+    """ Raised instead of calling the API while the circuit breaker is open """
+
+
+def get_timeout(url):
+    """ Return the (connect, read) timeout of a call to the given URL """
+    read_timeouts = dict(DEFAULT_READ_TIMEOUTS)
+    read_timeouts.update(getattr(settings, 'API_READ_TIMEOUTS', None) or {})
+    read_timeout = getattr(settings, 'API_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)
+    for segment in reversed(url.split('?', 1)[0].rstrip('/').split('/')):
+        if segment in read_timeouts:
+            read_timeout = read_timeouts[segment]
+            break
+    return getattr(settings, 'API_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT), read_timeout
+
+
+def get_backoff(attempt):
+    """ Return the seconds to wait before retry number attempt (0 based), with full jitter """
+    base = getattr(settings, 'API_RETRY_BACKOFF', DEFAULT_BACKOFF)
+    return random.uniform(0, min(MAX_BACKOFF, base * 2 ** attempt))
+
+
+class CircuitBreaker(object):
+    """
+    Tracks the health of the API across the threads of the process.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+        self.lock = threading.Lock()
+        self.counters = {
+            'calls': 0,
+            'failures': 0,
+            'retries': 0,
+            'short_circuited': 0,
+            'stale_served': 0,
+            'opened': 0,
+        }
+
+    def increment(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def allow_request(self):
+        """
+        Return True if a call may be sent to the API. While the breaker is open this is
+        False, except for one trial call once reset_timeout has passed. A trial call still
+        without outcome after reset_timeout is considered lost, and a new one is let through.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.time()
+            if self.state == self.HALF_OPEN and now - self.trial_started_at >= self.reset_timeout:
+                logger.warning('API circuit breaker trial call lost, opened again')
+                self.state = self.OPEN
+                self.opened_at = self.trial_started_at
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial_started_at = now
+                return True
+            self.counters['short_circuited'] += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.counters['calls'] += 1
+            self.consecutive_failures = 0
+            if self.state != self.CLOSED:
+                logger.warning('API circuit breaker closed')
+                self.state = self.CLOSED
+
+    def record_failure(self):
+        with self.lock:
+            self.counters['calls'] += 1
+            self.counters['failures'] += 1
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or (
+                    self.state == self.CLOSED and
+                    self.consecutive_failures >= self.failure_threshold):
+                if self.state == self.CLOSED:
+                    self.counters['opened'] += 1
+                logger.warning('API circuit breaker opened after %d consecutive failures',
+                               self.consecutive_failures)
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def get_stats(self):
+        """ Return the breaker state and counters, e.g. for monitoring """
+        with self.lock:
+            stats = dict(self.counters)
+            stats['state'] = self.state
+            stats['consecutive_failures'] = self.consecutive_failures
+        return stats
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """ Return the process-wide circuit breaker of the API """
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    failure_threshold=getattr(settings, 'API_BREAKER_FAILURE_THRESHOLD',
+                                              DEFAULT_FAILURE_THRESHOLD),
+                    reset_timeout=getattr(settings, 'API_BREAKER_RESET_TIMEOUT',
+                                          DEFAULT_RESET_TIMEOUT))
+    return _breaker
+
+
+def is_failure(response):
+    """
+    Returns True if the response means the API is unavailable, rather than that the call
+    itself failed (e.g. a 500 for one broken resource should not open the breaker).
+    """
+    return response.status_code in RETRY_STATUS_CODES
+
+
+def send(session_method, method, url, **kwargs):
+    """
+    Send a call to the API through the circuit breaker, with a timeout and, for idempotent
+    methods, retries.
+
+    :param session_method: bound method of the requests session to call, e.g. session.get
+    :param method: HTTP method name, e.g. 'GET'
+    :returns: requests.Response; the last one if all the attempts failed with a 502/503/504
+    :raises: ApiUnavailable if the breaker is open, or the exception of the last attempt
+    """
+    breaker = get_circuit_breaker()
+    kwargs.setdefault('timeout', get_timeout(url))
+    retries = 0
+    if method in IDEMPOTENT_METHODS:
+        retries = getattr(settings, 'API_RETRIES', DEFAULT_RETRIES)
+
+    attempt = 0
+    while True:
+        if not breaker.allow_request():
+            raise ApiUnavailable('OCL API circuit breaker open: %s %s' % (method, url))
+        try:
+            response = session_method(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.record_failure()
+            if attempt >= retries:
+                raise
+        except Exception:
+            # Not retried, but still an outcome, so that a trial call cannot leave the breaker
+            # half-open
+            breaker.record_failure()
+            raise
+        else:
+            if not is_failure(response):
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if attempt >= retries:
+                return response
+            response.close()
+        breaker.increment('retries')
+        time.sleep(get_backoff(attempt))
+        attempt += 1
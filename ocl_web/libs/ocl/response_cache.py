@@ -0,0 +1,174 @@
+"""
+In-process cache of API GET responses for anonymous visitors.
+
+Anonymous traffic on public sources, concepts and mappings makes the same API requests again
+and again, and the answers do not depend on who is asking, so they can be shared:
+- responses are keyed on the URL path, the canonicalized query params and includeFacets
+- each entry is fresh for a TTL that depends on the resource type requested (concepts,
+  sources...), see DEFAULT_TTLS and settings.API_RESPONSE_CACHE_TTLS
+- stale entries are revalidated with If-None-Match/If-Modified-Since when the API sent an
+  ETag or Last-Modified header, so unchanged responses are not downloaded again
+- the least recently used entries are evicted once the cached bodies exceed
+  settings.API_RESPONSE_CACHE_MAX_BYTES
+
+The cache is off unless settings.API_RESPONSE_CACHE_ENABLED is True.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from django.conf import settings
+
+
+# Seconds a response is fresh for, by the type of resource it lists or describes
+DEFAULT_TTLS = {
+    'orgs': 5 * 60,
+    'users': 5 * 60,
+    'sources': 2 * 60,
+    'collections': 2 * 60,
+    'versions': 60,
+    'concepts': 5 * 60,
+    'mappings': 5 * 60,
+    'references': 60,
+}
+DEFAULT_TTL = 60
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class CachedResponse(object):
+    """ A cached API response and its validators """
+
+    def __init__(self, response, ttl):
+        self.status_code = response.status_code
+        self.content = response.content
+        self.headers = dict(response.headers)
+        self.url = response.url
+        self.encoding = response.encoding
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        self.size = len(self.content)
+        self.ttl = ttl
+        self.expires_at = time.time() + ttl
+
+    def is_fresh(self):
+        """ Returns True if the response can be served without asking the API """
+        return time.time() < self.expires_at
+
+    def get_validator_headers(self):
+        """ Return the conditional request headers to revalidate this response """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self):
+        """ Return a new requests.Response object for this cached response """
+        response = requests.Response()
+        response.status_code = self.status_code
+        response._content = self.content    # pylint: disable=W0212
+        response._content_consumed = True    # pylint: disable=W0212
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.url = self.url
+        response.encoding = self.encoding
+        return response
+
+
+class ApiResponseCache(object):
+    """
+    Size-bounded LRU cache of API responses, safe to share between threads.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttls=None, default_ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.default_ttl = default_ttl
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url, params=None, include_facets=False):
+        """
+        Return the cache key of a request. Params may be a dict or a QueryDict; their order
+        and the order of the values of multi-valued params do not matter.
+        """
+        canonical_params = []
+        if params:
+            if hasattr(params, 'lists'):
+                items = params.lists()
+            else:
+                items = params.items()
+            for key, value in items:
+                if isinstance(value, (list, tuple)):
+                    value = tuple(sorted(unicode(v) for v in value))
+                else:
+                    value = (unicode(value),)
+                canonical_params.append((unicode(key), value))
+            canonical_params.sort()
+        return (url, tuple(canonical_params), bool(include_facets))
+
+    def get_ttl(self, url):
+        """ Return the TTL of the resource type a URL points to, i.e. the last one in its path """
+        for segment in reversed(url.split('?', 1)[0].rstrip('/').split('/')):
+            if segment in self.ttls:
+                return self.ttls[segment]
+        return self.default_ttl
+
+    def get(self, key):
+        """ Return the cached response for the key (fresh or not), or None """
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.entries[key] = entry     # Most recently used go last
+            return entry
+
+    def set(self, key, response):
+        """ Cache a successful response, if its resource type has a TTL """
+        ttl = self.get_ttl(key[0])
+        if ttl <= 0 or response.status_code != requests.codes.ok:
+            return
+        entry = CachedResponse(response, ttl)
+        if entry.size > self.max_bytes:
+            return
+        with self.lock:
+            old_entry = self.entries.pop(key, None)
+            if old_entry is not None:
+                self.size -= old_entry.size
+            self.entries[key] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def revalidated(self, entry):
+        """ Mark an entry as fresh again after the API answered 304 Not Modified """
+        entry.expires_at = time.time() + entry.ttl
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+def get_response_cache():
+    """
+    Return the process-wide API response cache, or None if it is not enabled.
+    """
+    global _cache
+    if not getattr(settings, 'API_RESPONSE_CACHE_ENABLED', False):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ApiResponseCache(
+                    max_bytes=getattr(settings, 'API_RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+                    ttls=getattr(settings, 'API_RESPONSE_CACHE_TTLS', None))
+    return _cache
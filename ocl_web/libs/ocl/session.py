@@ -0,0 +1,75 @@
+"""
+Process-wide HTTP connection pool for talking to the OCL API.
+"""
+import threading
+import cookielib
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+from .accounting import record_response_hook
+
+
+# Defaults used when the settings do not specify the pool configuration
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 20
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_api_session():
+    """
+    Build a new requests.Session with a keep-alive connection pool mounted for http and https.
+
+    The pool is sized using the following settings:
+    :API_POOL_CONNECTIONS: number of per-host connection pools to keep around
+    :API_POOL_MAXSIZE: max number of connections kept open to a single host
+    :API_POOL_BLOCK: if True, callers wait for a free connection instead of opening
+                     a throwaway connection when the pool for a host is exhausted
+    """
+    pool_connections = getattr(settings, 'API_POOL_CONNECTIONS', DEFAULT_POOL_CONNECTIONS)
+    pool_maxsize = getattr(settings, 'API_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE)
+    pool_block = getattr(settings, 'API_POOL_BLOCK', False)
+
+    session = requests.Session()
+
+    # The session is shared by every user of the process, so it must never remember
+    # cookies set by the API -- authentication is done per request with the token header.
+    session.cookies.set_policy(cookielib.DefaultCookiePolicy(allowed_domains=[]))
+
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    # Count every call in the API accounting of the request being handled, see accounting.py
+    session.hooks['response'].append(record_response_hook)
+    return session
+
+
+def get_api_session():
+    """
+    Return the process-wide API session, creating it on first use.
+    The underlying urllib3 pools are thread-safe, so the session is shared between threads.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_api_session()
+    return _session
+
+
+def reset_api_session():
+    """
+    Close the process-wide API session. A fresh one is created on the next call.
+    Useful after forking a worker process, since sockets must not be shared across processes.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
@@ -0,0 +1,140 @@
+"""
+Coalescing of identical API GETs that are in flight at the same time ("single flight").
+
+When several threads of a process ask for the same URL, with the same params and headers
+(so the same user and facets), only the first one calls the API; the others wait for its
+response and get their own copy of it. Errors are shared the same way.
+
+Optionally, anonymous GETs are also coalesced across worker processes through the Django
+cache named by settings.API_SINGLE_FLIGHT_SHARED_CACHE (which must be shared by the workers,
+e.g. memcached): the worker that calls the API publishes the response for
+API_SINGLE_FLIGHT_SHARED_TTL seconds, and the other workers wait up to
+API_SINGLE_FLIGHT_SHARED_WAIT seconds for it instead of calling the API as well.
+"""
+import sys
+import time
+import hashlib
+import threading
+
+import requests
+from django.conf import settings
+from django.core import cache
+
+from .response_cache import ApiResponseCache, CachedResponse
+
+
+DEFAULT_SHARED_TTL = 2
+DEFAULT_SHARED_WAIT = 5
+SHARED_POLL_INTERVAL = 0.05
+
+
+def make_key(url, params, headers):
+    """ Return the key identifying identical GETs """
+    return hashlib.md5(repr((ApiResponseCache.make_key(url, params),
+                             sorted(headers.items())))).hexdigest()
+
+
+def copy_response(response):
+    """ Return a copy of a fully read requests.Response, for another caller to consume """
+    copy = CachedResponse(response, 0).to_response()
+    copy.request = response.request
+    copy.elapsed = response.elapsed
+    return copy
+
+
+class _Call(object):
+    """ A call in flight and its outcome """
+    __slots__ = ('event', 'result', 'exc_info')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+    """ Runs at most one call at a time per key, sharing its outcome with concurrent callers """
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        Return (result, shared): the result of func(), or of the identical call already in
+        flight, and whether it came from another caller.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception:   # pylint: disable=W0703
+                call.exc_info = sys.exc_info()
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.event.set()
+        else:
+            call.event.wait()
+
+        if call.exc_info is not None:
+            raise call.exc_info[0], call.exc_info[1], call.exc_info[2]
+        return call.result, not leader
+
+
+_single_flight = SingleFlight()
+
+
+def _get_shared_cache():
+    alias = getattr(settings, 'API_SINGLE_FLIGHT_SHARED_CACHE', None)
+    return cache.get_cache(alias) if alias else None
+
+
+def _do_shared(key, func):
+    """ Coalesce the call with the identical calls of the other workers, see module doc """
+    shared_cache = _get_shared_cache()
+    if shared_cache is None:
+        return func()
+
+    result_key = 'singleflight:%s' % key
+    lock_key = 'singleflight:%s:lock' % key
+    wait = getattr(settings, 'API_SINGLE_FLIGHT_SHARED_WAIT', DEFAULT_SHARED_WAIT)
+    deadline = time.time() + wait
+    while not shared_cache.add(lock_key, 1, wait):
+        published = shared_cache.get(result_key)
+        if published is not None:
+            return published.to_response()
+        if time.time() >= deadline:
+            return func()
+        time.sleep(SHARED_POLL_INTERVAL)
+
+    try:
+        response = func()
+        if response.status_code == requests.codes.ok:
+            shared_cache.set(result_key, CachedResponse(response, 0),
+                             getattr(settings, 'API_SINGLE_FLIGHT_SHARED_TTL', DEFAULT_SHARED_TTL))
+        return response
+    finally:
+        shared_cache.delete(lock_key)
+
+
+def coalesced_get(func, url, params, headers):
+    """
+    Call func(), a GET of url with params and headers returning a fully read response,
+    unless an identical GET is already in flight, in which case a copy of its response
+    is returned.
+    """
+    if not getattr(settings, 'API_SINGLE_FLIGHT_ENABLED', True):
+        return func()
+    key = make_key(url, params, headers)
+    if 'Authorization' not in headers:
+        call = lambda: _do_shared(key, func)
+    else:
+        call = func
+    response, shared = _single_flight.do(key, call)
+    return copy_response(response) if shared else response
@@ -0,0 +1,90 @@
+"""
+Helpers to consume large API list responses without holding them in memory at once.
+
+Use them on responses requested with stream=True, e.g. api.get(..., stream=True):
+- iter_json_list() decodes the items of a JSON list one at a time as the body arrives
+- iter_response_content() yields the raw body in chunks, to pipe it to the browser untouched
+"""
+import codecs
+
+import simplejson as json
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_response_content(response, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the raw body of a streamed response in chunks, releasing the connection when done.
+    """
+    try:
+        for chunk in response.iter_content(chunk_size):
+            if chunk:
+                yield chunk
+    finally:
+        response.close()
+
+
+def _skip_whitespace(buf, pos):
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def iter_json_list(response, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Decode a streamed response whose body is a JSON list, yielding its items one by one.
+    Only the item being decoded and the current chunk are kept in memory, not the whole body.
+    :raises: simplejson.JSONDecodeError if the body is not a valid JSON list.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    chunks = iter_response_content(response, chunk_size)
+    buf = u''
+    pos = 0
+    exhausted = False
+    started = False
+
+    try:
+        while True:
+            pos = _skip_whitespace(buf, pos)
+            if pos < len(buf):
+                if not started:
+                    if buf[pos] != '[':
+                        raise json.JSONDecodeError('Expected a JSON list', buf, pos)
+                    started = True
+                    pos += 1
+                    continue
+                if buf[pos] == ']':
+                    return
+                if buf[pos] == ',':
+                    pos += 1
+                    continue
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise
+                else:
+                    # Only trust the item once the separator after it has arrived, since a
+                    # number at the end of the buffer (e.g. -0.) may continue in the next chunk
+                    next_pos = _skip_whitespace(buf, end)
+                    if exhausted or (next_pos < len(buf) and buf[next_pos] in ',]'):
+                        yield item
+                        pos = end
+                        continue
+            elif exhausted:
+                raise json.JSONDecodeError('Unexpected end of JSON list', buf, pos)
+
+            # Need more data -- drop what has been decoded so far, then read the next chunk
+            buf = buf[pos:]
+            pos = 0
+            try:
+                buf += text_decoder.decode(next(chunks))
+            except StopIteration:
+                buf += text_decoder.decode('', final=True)
+                exhausted = True
+    finally:
+        chunks.close()
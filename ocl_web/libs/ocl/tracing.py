@@ -0,0 +1,65 @@
+"""
+Cheap tracing of the calls made to the OCL API.
+
+Each traced call is logged as a single line with its method, path, status, latency and size.
+The same values are attached to the log record (api_method, api_path, api_status,
+api_latency_ms and api_bytes) for handlers that want structured data.
+Nothing is formatted unless the logger is enabled for the level of the record.
+
+Response bodies are never parsed. The raw body of a sample of the calls is logged at DEBUG
+level when settings.API_TRACE_BODY_SAMPLE_RATE is set (0.0 to 1.0, off by default), and
+always for server errors. Bodies are truncated to settings.API_TRACE_BODY_MAX_BYTES.
+"""
+import logging
+import random
+
+from django.conf import settings
+
+
+DEFAULT_BODY_MAX_BYTES = 2048
+
+
+def get_response_size(response):
+    """
+    Return the size in bytes of the response body, without reading it if it is streamed.
+    """
+    if getattr(response, '_content_consumed', True):
+        return len(response.content or '')
+    try:
+        return int(response.headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return None
+
+
+def should_capture_body():
+    """ Returns True if the body of the current call is part of the sample to log """
+    sample_rate = getattr(settings, 'API_TRACE_BODY_SAMPLE_RATE', 0)
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def trace_response(logger, response):
+    """
+    Log the outcome of an API call.
+    :param logger: logger to write to, usually "oclapi.request".
+    :param response: requests.Response object of the call.
+    """
+    level = logging.ERROR if response.status_code >= 500 else logging.DEBUG
+    if not logger.isEnabledFor(level):
+        return
+
+    request = response.request
+    trace = {
+        'api_method': request.method,
+        'api_path': request.path_url,
+        'api_status': response.status_code,
+        'api_latency_ms': response.elapsed.total_seconds() * 1000,
+        'api_bytes': get_response_size(response),
+    }
+    logger.log(level, 'API %(api_method)s %(api_path)s %(api_status)s '
+                      '%(api_latency_ms).1fms %(api_bytes)sB', trace, extra=trace)
+
+    if level == logging.ERROR or (logger.isEnabledFor(logging.DEBUG) and should_capture_body()):
+        if getattr(response, '_content_consumed', True):
+            max_bytes = getattr(settings, 'API_TRACE_BODY_MAX_BYTES', DEFAULT_BODY_MAX_BYTES)
+            logger.log(level, 'API %s %s body: %s', request.method, request.path_url,
+                       (response.content or '')[:max_bytes], extra=trace)
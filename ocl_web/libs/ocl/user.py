@@ -0,0 +1,17 @@
+# from ..ocl import ApiResource
+
+
+# class User(ApiResource):
+
+#     def __init__(self):
+#         super(User, self).__init__()
+#         self.username = ""
+#         self.firstName = ""
+#         self.lastName = ""
+#         self.organization = ""
+#         self.location = ""
+#         self.email = ""
+#         self.roles = []
+#         self.starCount = {}
+#         self.collections = []
+#         self.sources = []
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from functools import partial
+from unittest import TestCase
+
+from requests.models import Response, PreparedRequest
+
+from libs.ocl.accounting import (get_recorder, record_response_hook, start_recording,
+                                 stop_recording)
+from libs.ocl.concurrency import gather
+
+
+def make_response(path='/orgs/', status_code=200, content='[{"id": "CIEL"}]'):
+    response = Response()
+    response.status_code = status_code
+    response._content = content
+    response._content_consumed = True
+    response.elapsed = timedelta(milliseconds=20)
+    response.request = PreparedRequest()
+    response.request.prepare(method='GET', url='http://api.test' + path)
+    return response
+
+
+class ApiCallRecorderTest(TestCase):
+    def tearDown(self):
+        stop_recording()
+
+    def test_nothing_recorded_without_recorder(self):
+        record_response_hook(make_response())
+        self.assertIsNone(get_recorder())
+
+    def test_calls_recorded(self):
+        recorder = start_recording()
+        record_response_hook(make_response('/orgs/CIEL/'))
+        record_response_hook(make_response('/orgs/CIEL/?verbose=true', status_code=404))
+        record_response_hook(make_response('/users/demo/'))
+        self.assertEquals(recorder.count, 3)
+        self.assertEquals(recorder.latency_ms, 60)
+        self.assertEquals(recorder.bytes, 48)
+        self.assertEquals(recorder.calls[1].status, 404)
+        self.assertEquals(recorder.most_repeated(), [('/orgs/CIEL/', 2)])
+
+    def test_calls_from_pool_threads_recorded(self):
+        recorder = start_recording()
+        gather(partial(record_response_hook, make_response('/orgs/')),
+               partial(record_response_hook, make_response('/users/')))
+        self.assertEquals(sorted(call.path for call in recorder.calls), ['/orgs/', '/users/'])
@@ -0,0 +1,54 @@
+import threading
+from unittest import TestCase
+
+import requests
+from mock import MagicMock, patch
+
+from libs.ocl.async_api import AsyncOclApi
+from libs.ocl.concurrency import ApiExecutor
+from libs.ocl.resilience import CircuitBreaker
+from libs.tests.test_response_cache import FakeRequest, make_response
+
+
+class AsyncOclApiTest(TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+        # Own breaker, so that the failed calls of the tests do not count on the process-wide one
+        breaker = CircuitBreaker()
+        for target, value in (('libs.ocl.get_api_session', self.session),
+                              ('libs.ocl.get_circuit_breaker', breaker),
+                              ('libs.ocl.resilience.get_circuit_breaker', breaker)):
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_calls_in_flight_at_once(self):
+        # Each call waits until all of them have started, which only works if they run concurrently
+        barrier = threading.Semaphore(0)
+        calls = []
+
+        def session_get(url, **kwargs):
+            calls.append(url)
+            if len(calls) == 3:
+                for _ in range(3):
+                    barrier.release()
+            barrier.acquire()
+            return make_response('{"id": "%s"}' % url.rstrip('/').split('/')[-1])
+        self.session.get.side_effect = session_get
+
+        executor = ApiExecutor(3)
+        self.addCleanup(executor.close)
+        api = AsyncOclApi(FakeRequest(token='abc'), executor=executor)
+        futures = [api.get('orgs', org_id) for org_id in ('CIEL', 'PIH', 'WHO')]
+        responses = api.wait_all(futures)
+        self.assertEquals([response.json()['id'] for response in responses], ['CIEL', 'PIH', 'WHO'])
+
+    def test_first_error_raised_after_all_calls(self):
+        self.session.post.side_effect = [requests.ConnectionError(), make_response('{}')]
+        executor = ApiExecutor(1)
+        self.addCleanup(executor.close)
+        api = AsyncOclApi(FakeRequest(token='abc'), executor=executor)
+        futures = [api.post('orgs', 'CIEL', 'sources', id='A'),
+                   api.post('orgs', 'CIEL', 'sources', id='B')]
+        self.assertRaises(requests.ConnectionError, api.wait_all, futures)
+        self.assertEquals(self.session.post.call_count, 2)
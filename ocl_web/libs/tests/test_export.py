@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from libs.ocl.export import iter_search_results, iter_csv
+
+
+class FakeApi(object):
+    """ Serves pages of a list of count results, like OclApi.iter_json_list """
+    def __init__(self, count):
+        self.results = [{'id': str(index)} for index in range(count)]
+        self.pages = []
+
+    def iter_json_list(self, *args, **kwargs):
+        page, limit = kwargs['params']['page'], kwargs['params']['limit']
+        self.pages.append(page)
+        return iter(self.results[(page - 1) * limit:page * limit])
+
+
+class IterSearchResultsTest(TestCase):
+    def ids(self, results):
+        return [int(result['id']) for result in results]
+
+    def test_all_pages_walked(self):
+        api = FakeApi(25)
+        results = iter_search_results(api, ['concepts'], {'q': 'a'}, page_size=10)
+        self.assertEquals(api.pages, [1])
+        self.assertEquals(self.ids(results), range(25))
+        self.assertEquals(api.pages, [1, 2, 3])
+
+    def test_resumed_without_requesting_previous_pages(self):
+        api = FakeApi(25)
+        results = iter_search_results(api, ['concepts'], {}, start=13, page_size=10)
+        self.assertEquals(self.ids(results), range(13, 25))
+        self.assertEquals(api.pages, [2, 3])
+
+    def test_row_cap(self):
+        api = FakeApi(30)
+        results = iter_search_results(api, ['concepts'], {}, max_rows=20, page_size=10)
+        self.assertEquals(self.ids(results), range(20))
+        self.assertEquals(api.pages, [1, 2])
+
+
+class IterCsvTest(TestCase):
+    def test_lines(self):
+        columns = [('ID', 'id'), ('Name', 'display_name'), ('Extras', 'extras')]
+        items = [{'id': '1', 'display_name': u'Fi\xe8vre, jaune', 'extras': {'a': 1}},
+                 {'id': '2'}]
+        self.assertEquals(list(iter_csv(items, columns)), [
+            'ID,Name,Extras\r\n',
+            '1,"Fi\xc3\xa8vre, jaune","{""a"": 1}"\r\n',
+            '2,,\r\n',
+        ])
+        self.assertEquals(list(iter_csv(items[1:], columns, header=False)), ['2,,\r\n'])
@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+from libs.ocl import OclApi
+from libs.ocl.identity_map import attach_identity_map
+from libs.tests.test_response_cache import FakeRequest, make_response
+
+
+def make_request(token='abc'):
+    """ Return a fake request with an identity map, as attached by the middleware """
+    request = FakeRequest(token=token)
+    attach_identity_map(request)
+    return request
+
+
+@patch('libs.ocl.get_response_cache', return_value=None)
+class IdentityMapTest(TestCase):
+    def get_apis(self, *requests):
+        """ Return an OclApi for each request, sharing one mocked session """
+        self.session = MagicMock()
+        self.session.get.return_value = make_response('{"id": "CIEL"}')
+        self.session.put.return_value = make_response('{}')
+        with patch('libs.ocl.get_api_session', return_value=self.session):
+            return [OclApi(request) for request in requests]
+
+    def test_resource_fetched_once_per_request(self, mock_get_response_cache):
+        request = make_request()
+        api, other_api = self.get_apis(request, request)
+        api.get('orgs', 'CIEL', 'sources', 'CIEL')
+        response = other_api.get('orgs', 'CIEL', 'sources', 'CIEL')
+        self.assertEquals(self.session.get.call_count, 1)
+        self.assertEquals(response.json(), {'id': 'CIEL'})
+        self.assertEquals(request.api_resources.hits, 1)
+
+        other_api.get('orgs', 'CIEL', 'sources', 'CIEL', params={'verbose': True})
+        self.assertEquals(self.session.get.call_count, 2)
+
+    def test_not_shared_between_requests(self, mock_get_response_cache):
+        api, other_api = self.get_apis(make_request(), make_request())
+        api.get('orgs', 'CIEL')
+        other_api.get('orgs', 'CIEL')
+        self.assertEquals(self.session.get.call_count, 2)
+
+    def test_forgotten_after_update(self, mock_get_response_cache):
+        api, = self.get_apis(make_request())
+        api.get('orgs', 'CIEL')
+        api.put('orgs', 'CIEL', name='Columbia')
+        api.get('orgs', 'CIEL')
+        self.assertEquals(self.session.get.call_count, 2)
+
+    def test_failed_response_not_kept(self, mock_get_response_cache):
+        api, = self.get_apis(make_request())
+        self.session.get.return_value = make_response('', status_code=404)
+        api.get('orgs', 'CIEL')
+        api.get('orgs', 'CIEL')
+        self.assertEquals(self.session.get.call_count, 2)
+
+    def test_forgotten_after_concurrent_update(self, mock_get_response_cache):
+        request = make_request()
+        api, other_api = self.get_apis(request, request)
+
+        def put(*args, **kwargs):
+            # A GET of another thread of the request, while the update is running
+            other_api.get('orgs', 'CIEL')
+            return make_response('{}')
+        self.session.put.side_effect = put
+        api.put('orgs', 'CIEL', name='Columbia')
+        api.get('orgs', 'CIEL')
+        self.assertEquals(self.session.get.call_count, 2)
+
+    def test_no_map_outside_of_http_requests(self, mock_get_response_cache):
+        request = FakeRequest(token='abc')
+        api, = self.get_apis(request)
+        api.get('orgs', 'CIEL')
+        api.get('orgs', 'CIEL')
+        self.assertEquals(self.session.get.call_count, 2)
+        self.assertFalse(hasattr(request, 'api_resources'))
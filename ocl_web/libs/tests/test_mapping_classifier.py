@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+from libs.ocl.mapping_classifier import MappingClassifier, paginate_categories
+
+
+URL_TEMPLATES = {
+    ('owner', 'Organization'): '/orgs/%(owner)s/',
+    ('owner', 'User'): '/users/%(owner)s/',
+    ('source', 'Organization'): '/orgs/%(owner)s/sources/%(source)s/',
+    ('source', 'User'): '/users/%(owner)s/sources/%(source)s/',
+    ('concept', 'Organization'): '/orgs/%(owner)s/sources/%(source)s/concepts/%(concept)s/',
+    ('concept', 'User'): '/users/%(owner)s/sources/%(source)s/concepts/%(concept)s/',
+    ('mapping', 'Organization'): '/orgs/%(owner)s/sources/%(source)s/mappings/%(mapping)s/',
+    ('mapping', 'User'): '/users/%(owner)s/sources/%(source)s/mappings/%(mapping)s/',
+}
+
+
+def make_mapping(map_type, from_concept, to_concept, to_concept_url=True, **kwargs):
+    mapping = {
+        'id': 'M%s' % from_concept, 'owner': 'CIEL', 'owner_type': 'Organization',
+        'source': 'CIEL', 'map_type': map_type,
+        'from_source_owner': 'CIEL', 'from_source_owner_type': 'Organization',
+        'from_source_name': 'CIEL', 'from_concept_code': from_concept,
+        'to_source_owner': 'CIEL', 'to_source_owner_type': 'Organization',
+        'to_source_name': 'CIEL', 'to_concept_code': to_concept,
+        'to_concept_url': None,
+    }
+    if to_concept_url:
+        mapping['to_concept_url'] = '/orgs/CIEL/sources/CIEL/concepts/%s/' % to_concept
+    mapping.update(kwargs)
+    return mapping
+
+
+class MappingClassifierTest(TestCase):
+    def setUp(self):
+        self.classifier = MappingClassifier('Organization', 'CIEL', 'CIEL', '1',
+                                            url_templates=URL_TEMPLATES)
+
+    def test_categories(self):
+        categories = self.classifier.classify([
+            make_mapping('SAME-AS', '1', '2'),
+            make_mapping('SAME-AS', '1', 'A01', to_concept_url=False, to_source_name='ICD-10'),
+            make_mapping('Q-AND-A', '1', '3'),
+            make_mapping('CONCEPT-SET', '4', '1'),
+            make_mapping('NARROWER-THAN', '5', '1'),
+            make_mapping('SAME-AS', '6', '7'),
+        ])
+        self.assertEquals(
+            [(category, [m['from_concept_code'] + '>' + m['to_concept_code'] for m in mappings])
+             for category, mappings in categories.items() if mappings],
+            [('Direct Internal Mapping', ['1>2']), ('Direct External Mapping', ['1>A01']),
+             ('Inverse Mapping', ['5>1']), ('Linked Answer', ['1>3']),
+             ('Set Parent', ['4>1']), ('Other', ['6>7'])])
+        other = categories['Other'][0]
+        self.assertFalse(other['is_direct_mapping'] or other['is_inverse_mapping'])
+
+    def test_urls_from_templates(self):
+        direct, external, inverse = self.classifier.classify([
+            make_mapping('SAME-AS', '1', '2 b'),
+            make_mapping('SAME-AS', '1', 'A01', to_concept_url=False, to_source_owner='jd',
+                         to_source_owner_type='User', to_source_name='ICD-10'),
+            make_mapping('SAME-AS', '5', '1'),
+        ]).values()[:3]
+        self.assertEquals(direct[0]['mapping_url'], '/orgs/CIEL/sources/CIEL/mappings/M1/')
+        self.assertEquals(direct[0]['to_url'], '/orgs/CIEL/sources/CIEL/concepts/2%20b/')
+        self.assertEquals(external[0]['to_url'], '/users/jd/sources/ICD-10/')
+        self.assertEquals(external[0]['to_owner_url'], '/users/jd/')
+        self.assertEquals(inverse[0]['from_url'], '/orgs/CIEL/sources/CIEL/concepts/5/')
+        self.assertEquals(inverse[0]['from_source_url'], '/orgs/CIEL/sources/CIEL/')
+
+    def test_paginate_categories(self):
+        categories = self.classifier.classify(
+            [make_mapping('CONCEPT-SET', '1', str(index)) for index in range(5)] +
+            [make_mapping('SAME-AS', '1', 'A')])
+        page, has_more = paginate_categories(categories, 1, 2)
+        self.assertEquals(len(page['Set Member']), 2)
+        self.assertEquals(len(page['Direct Internal Mapping']), 1)
+        self.assertTrue(has_more)
+        page, has_more = paginate_categories(categories, 3, 2)
+        self.assertEquals([m['to_concept_code'] for m in page['Set Member']], ['4'])
+        self.assertEquals(page['Direct Internal Mapping'], [])
+        self.assertFalse(has_more)
@@ -0,0 +1,86 @@
+import time
+from unittest import TestCase
+
+import requests
+from mock import MagicMock, patch
+
+from libs.ocl import OclApi
+from libs.ocl.resilience import ApiUnavailable, CircuitBreaker, get_timeout, send
+from libs.ocl.response_cache import ApiResponseCache
+from libs.tests.test_response_cache import FakeRequest, make_response
+
+
+class SendTest(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        for target, value in (('libs.ocl.resilience.get_circuit_breaker', self.breaker),
+                              ('libs.ocl.get_circuit_breaker', self.breaker),
+                              ('libs.ocl.resilience.get_backoff', 0)):
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_timeout_by_resource_type(self):
+        self.assertEquals(get_timeout('http://api/orgs/CIEL/sources/CIEL/concepts/')[1], 30)
+        self.assertEquals(get_timeout('http://api/orgs/CIEL/')[1], 10)
+
+    def test_idempotent_call_retried(self):
+        session_get = MagicMock(side_effect=[requests.ConnectionError(),
+                                             make_response(status_code=503), make_response()])
+        response = send(session_get, 'GET', 'http://api/orgs/')
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(session_get.call_count, 3)
+        self.assertEquals(session_get.call_args[1]['timeout'], get_timeout('http://api/orgs/'))
+        self.assertEquals(self.breaker.get_stats()['retries'], 2)
+
+    def test_post_not_retried(self):
+        session_post = MagicMock(return_value=make_response(status_code=503))
+        self.assertEquals(send(session_post, 'POST', 'http://api/orgs/').status_code, 503)
+        self.assertEquals(session_post.call_count, 1)
+
+    def test_breaker_opens_and_closes(self):
+        session_get = MagicMock(side_effect=requests.Timeout())
+        self.assertRaises(requests.Timeout, send, session_get, 'GET', 'http://api/orgs/')
+        self.assertEquals(self.breaker.get_stats()['state'], CircuitBreaker.OPEN)
+
+        self.assertRaises(ApiUnavailable, send, session_get, 'GET', 'http://api/orgs/')
+        self.assertEquals(session_get.call_count, 3)
+        self.assertEquals(self.breaker.get_stats()['short_circuited'], 1)
+
+        self.breaker.opened_at -= 60
+        session_get.side_effect = None
+        session_get.return_value = make_response()
+        self.assertEquals(send(session_get, 'GET', 'http://api/orgs/').status_code, 200)
+        self.assertEquals(self.breaker.get_stats()['state'], CircuitBreaker.CLOSED)
+
+    def test_trial_call_error_reopens_breaker(self):
+        session_get = MagicMock(side_effect=requests.Timeout())
+        self.assertRaises(requests.Timeout, send, session_get, 'GET', 'http://api/orgs/')
+        self.breaker.opened_at -= 60
+        session_get.side_effect = requests.exceptions.ChunkedEncodingError()
+        self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                          send, session_get, 'GET', 'http://api/orgs/')
+        self.assertEquals(self.breaker.get_stats()['state'], CircuitBreaker.OPEN)
+
+    def test_lost_trial_call_replaced(self):
+        self.breaker.state = CircuitBreaker.OPEN
+        self.breaker.opened_at = time.time() - 60
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.trial_started_at -= 60
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEquals(self.breaker.get_stats()['state'], CircuitBreaker.HALF_OPEN)
+
+    @patch('libs.ocl.get_response_cache')
+    def test_stale_response_served_when_api_unavailable(self, mock_get_response_cache):
+        mock_get_response_cache.return_value = ApiResponseCache()
+        api = OclApi(FakeRequest())
+        with patch.object(api, 'session') as mock_session:
+            mock_session.get.return_value = make_response('[{"id": "CIEL"}]')
+            api.get('orgs')
+            mock_get_response_cache.return_value.entries.values()[0].expires_at = 0
+            mock_session.get.side_effect = requests.ConnectionError()
+            api.forget_fetched_resources()
+            response = api.get('orgs')
+        self.assertEquals(response.json(), [{'id': 'CIEL'}])
+        self.assertEquals(self.breaker.get_stats()['stale_served'], 1)
@@ -0,0 +1,89 @@
+from unittest import TestCase
+
+from django.http import QueryDict
+from mock import MagicMock, patch
+from requests.models import Response
+
+from libs.ocl import OclApi
+from libs.ocl.response_cache import ApiResponseCache
+
+
+class FakeRequest(object):
+    """ FakeRequest class """
+    def __init__(self, token=None):
+        self.session = {'API_USER_TOKEN': token} if token else {}
+
+
+def make_response(content='[]', status_code=200, headers=None):
+    response = Response()
+    response.status_code = status_code
+    response._content = content
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    response.request = MagicMock(method='GET', path_url='/')
+    return response
+
+
+class ApiResponseCacheTest(TestCase):
+    def test_key_ignores_param_order(self):
+        key = ApiResponseCache.make_key('/orgs/', QueryDict('q=malaria&limit=25'))
+        self.assertEquals(key, ApiResponseCache.make_key('/orgs/', {'limit': 25, 'q': 'malaria'}))
+        self.assertNotEquals(key, ApiResponseCache.make_key('/orgs/', {'limit': 25, 'q': 'malaria'},
+                                                            include_facets=True))
+
+    def test_ttl_of_last_resource_type_in_path(self):
+        response_cache = ApiResponseCache(ttls={'versions': 0})
+        self.assertEquals(response_cache.get_ttl('http://api/orgs/CIEL/sources/CIEL/concepts/1/'),
+                          response_cache.ttls['concepts'])
+        self.assertEquals(response_cache.get_ttl('http://api/orgs/CIEL/sources/CIEL/versions/'), 0)
+
+    def test_least_recently_used_evicted(self):
+        response_cache = ApiResponseCache(max_bytes=10)
+        response_cache.set(('/orgs/a/',), make_response('1234'))
+        response_cache.set(('/orgs/b/',), make_response('1234'))
+        response_cache.get(('/orgs/a/',))
+        response_cache.set(('/orgs/c/',), make_response('1234'))
+        self.assertIsNotNone(response_cache.get(('/orgs/a/',)))
+        self.assertIsNone(response_cache.get(('/orgs/b/',)))
+        self.assertEquals(response_cache.size, 8)
+
+
+class OclApiResponseCacheTest(TestCase):
+    def setUp(self):
+        self.response_cache = ApiResponseCache()
+        patcher = patch('libs.ocl.get_response_cache', return_value=self.response_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_anonymous_get_served_from_cache(self):
+        api = OclApi(FakeRequest())
+        with patch.object(api, 'session') as mock_session:
+            mock_session.get.return_value = make_response('[{"id": "CIEL"}]')
+            api.get('orgs', params={'limit': 25})
+            api.forget_fetched_resources()  # as for another page
+            response = api.get('orgs', params={'limit': 25})
+        self.assertEquals(mock_session.get.call_count, 1)
+        self.assertEquals(response.json(), [{'id': 'CIEL'}])
+
+    def test_authenticated_get_not_cached(self):
+        api = OclApi(FakeRequest(token='secret'))
+        with patch.object(api, 'session') as mock_session:
+            mock_session.get.return_value = make_response('[{"id": "CIEL"}]')
+            api.get('orgs')
+            api.forget_fetched_resources()  # as for another page
+            api.get('orgs')
+        self.assertEquals(mock_session.get.call_count, 2)
+
+    def test_stale_response_revalidated(self):
+        api = OclApi(FakeRequest())
+        with patch.object(api, 'session') as mock_session:
+            mock_session.get.return_value = make_response('[{"id": "CIEL"}]', headers={'ETag': '"v1"'})
+            api.get('orgs')
+            self.response_cache.entries.values()[0].expires_at = 0
+            mock_session.get.return_value = make_response('', status_code=304)
+            api.forget_fetched_resources()
+            response = api.get('orgs')
+        self.assertEquals(mock_session.get.call_args[1]['headers']['If-None-Match'], '"v1"')
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.json(), [{'id': 'CIEL'}])
+        self.assertTrue(self.response_cache.entries.values()[0].is_fresh())
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+from django.http import QueryDict
+
+from libs.ocl import OclConstants
+from libs.ocl.search import OclSearch, SEARCH_FILTER_TEMPLATES
+
+
+CONCEPT_FACETS = {
+    'source': [['CIEL', 120], ['PIH', 4]],
+    'locale': [['en', 100]],
+}
+
+
+class SearchFilterTest(TestCase):
+    def build_filters(self, search_scope=OclConstants.SEARCH_SCOPE_GLOBAL, facets=None):
+        searcher = OclSearch(search_scope=search_scope)
+        searcher.build_filters('concepts', facets=facets)
+        return searcher.search_filter_list
+
+    def test_filters_built_from_templates_and_facets(self):
+        filter_list = self.build_filters(facets=CONCEPT_FACETS)
+        self.assertEquals([f.filter_id for f in filter_list],
+                          [t.filter_id for t in SEARCH_FILTER_TEMPLATES['concepts']])
+        source_filter = filter_list.match_search_filter('source')
+        self.assertEquals([(o.option_value, o.option_num) for o in source_filter.options],
+                          [('CIEL', 120), ('PIH', 4)])
+        retired_filter = filter_list.match_search_filter('includeRetired')
+        self.assertEquals([o.option_value for o in retired_filter.options], ['true'])
+        self.assertTrue(retired_filter.attrs['hide_numbers'])
+        self.assertIsNone(filter_list.match_search_filter('q'))
+
+    def test_restricted_scope_hides_filters(self):
+        filter_list = self.build_filters(search_scope=OclConstants.SEARCH_SCOPE_RESTRICTED)
+        self.assertIsNone(filter_list.match_search_filter('source'))
+        self.assertIsNotNone(filter_list.match_search_filter('conceptClass'))
+
+    def test_selection_not_shared_between_searches(self):
+        filter_list = self.build_filters(facets=CONCEPT_FACETS)
+        searcher = OclSearch()
+        searcher.search_filter_list = filter_list
+        searcher.select_search_filters(QueryDict('source=CIEL&includeRetired=true'))
+        self.assertEquals([o.selected for o in filter_list.match_search_filter('source').options],
+                          [True, False])
+
+        other_filter_list = self.build_filters()
+        self.assertEquals(other_filter_list.match_search_filter('source').options, [])
+        self.assertFalse(other_filter_list.match_search_filter('includeRetired').options[0].selected)
+        self.assertNotIn('facet_results', OclConstants.SEARCH_FILTER_INFO['concepts'][1])
@@ -0,0 +1,93 @@
+import time
+import threading
+from unittest import TestCase
+
+from django.core import cache
+from django.test.utils import override_settings
+from mock import MagicMock, patch
+
+from libs.ocl import OclApi
+from libs.ocl.response_cache import CachedResponse
+from libs.ocl.singleflight import SingleFlight, make_key, _do_shared
+from libs.tests.test_response_cache import FakeRequest, make_response
+
+
+def blocking(release, result):
+    """ Return a function returning result once release is set """
+    def func(*args, **kwargs):
+        release.wait()
+        return result
+    return func
+
+
+def run_concurrently(func, count):
+    """ Start count threads calling func, return them and the list their results go to """
+    results = [None] * count
+
+    def target(index):
+        results[index] = func()
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class SingleFlightTest(TestCase):
+    def test_concurrent_calls_share_one_call(self):
+        release = threading.Event()
+        func = MagicMock(side_effect=blocking(release, 'result'))
+        single_flight = SingleFlight()
+
+        threads, results = run_concurrently(lambda: single_flight.do('key', func), 3)
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(func.call_count, 1)
+        self.assertEquals(sorted(results), [('result', False), ('result', True), ('result', True)])
+        self.assertEquals(single_flight.calls, {})
+
+    def test_error_raised_to_all_callers(self):
+        single_flight = SingleFlight()
+        self.assertRaises(ValueError, single_flight.do, 'key', MagicMock(side_effect=ValueError))
+        self.assertEquals(single_flight.do('key', lambda: 'result'), ('result', False))
+
+    def test_key_depends_on_params_and_headers(self):
+        key = make_key('http://api/orgs/', {'q': 'malaria', 'limit': 25}, {})
+        self.assertEquals(key, make_key('http://api/orgs/', {'limit': 25, 'q': 'malaria'}, {}))
+        self.assertNotEquals(key, make_key('http://api/orgs/', {'q': 'malaria', 'limit': 25},
+                                           {'Authorization': 'Token abc'}))
+        self.assertNotEquals(key, make_key('http://api/orgs/', {'q': 'malaria'}, {}))
+
+    @patch('libs.ocl.get_response_cache', return_value=None)
+    def test_concurrent_api_gets_coalesced(self, mock_get_response_cache):
+        release = threading.Event()
+        api = OclApi(FakeRequest(token='abc'))
+        with patch.object(api, 'session') as mock_session:
+            mock_session.get.side_effect = blocking(release, make_response('[{"id": "CIEL"}]'))
+            threads, results = run_concurrently(lambda: api.get('orgs', params={'q': 'CIEL'}), 2)
+            time.sleep(0.2)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEquals(mock_session.get.call_count, 1)
+        self.assertIsNot(results[0], results[1])
+        self.assertEquals([result.json() for result in results], [[{'id': 'CIEL'}]] * 2)
+
+    @override_settings(API_SINGLE_FLIGHT_SHARED_CACHE='default')
+    def test_shared_response_used_by_other_workers(self):
+        shared_cache = cache.get_cache('default')
+        func = MagicMock(return_value=make_response('[{"id": "CIEL"}]'))
+        self.assertEquals(_do_shared('key', func).json(), [{'id': 'CIEL'}])
+        self.assertIsNotNone(shared_cache.get('singleflight:key'))
+        self.assertIsNone(shared_cache.get('singleflight:key:lock'))
+
+        # Another worker is calling the API, and publishes its response
+        shared_cache.add('singleflight:other:lock', 1)
+        shared_cache.set('singleflight:other', CachedResponse(make_response('[]'), 0))
+        self.assertEquals(_do_shared('other', func).json(), [])
+        self.assertEquals(func.call_count, 1)
+        shared_cache.delete_many(['singleflight:key', 'singleflight:other',
+                                  'singleflight:other:lock'])
@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+import simplejson as json
+from mock import MagicMock
+from requests.models import Response
+
+from libs.ocl.streaming import iter_json_list, iter_response_content
+
+
+def make_streamed_response(body, chunk_size):
+    response = MagicMock(spec=Response)
+    response.encoding = 'utf-8'
+    response.iter_content.return_value = [
+        body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    return response
+
+
+class IterJsonListTest(TestCase):
+    items = [{'id': 'CIEL', 'name': u'Columbia International eHealth Laboratory \xe9'},
+             12345, 'text, with [brackets]', [1, 2], None, True, -0.5]
+
+    def test_items_decoded_whatever_the_chunk_size(self):
+        body = json.dumps(self.items, ensure_ascii=False).encode('utf-8')
+        for chunk_size in (1, 2, 3, 7, 64, 1024):
+            response = make_streamed_response(body, chunk_size)
+            self.assertEquals(list(iter_json_list(response)), self.items)
+            self.assertTrue(response.close.called)
+
+    def test_empty_list(self):
+        self.assertEquals(list(iter_json_list(make_streamed_response(' [ ] ', 2))), [])
+
+    def test_invalid_body_raises(self):
+        for body in ('{"detail": "Not found."}', '[1, 2', '[{"id": ]'):
+            self.assertRaises(json.JSONDecodeError, list,
+                              iter_json_list(make_streamed_response(body, 3)))
+
+
+class IterResponseContentTest(TestCase):
+    def test_chunks_passed_through_and_response_closed(self):
+        response = make_streamed_response('[{"id": "CIEL"}]', 4)
+        self.assertEquals(''.join(iter_response_content(response)), '[{"id": "CIEL"}]')
+        self.assertTrue(response.close.called)
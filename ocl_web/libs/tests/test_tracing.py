@@ -0,0 +1,53 @@
+import logging
+from datetime import timedelta
+from unittest import TestCase
+
+from mock import MagicMock, patch
+from requests.models import Response, PreparedRequest
+
+from libs.ocl.tracing import trace_response
+
+
+def make_response(status_code=200, content='[{"id": "CIEL"}]'):
+    response = Response()
+    response.status_code = status_code
+    response._content = content
+    response._content_consumed = True
+    response.elapsed = timedelta(milliseconds=25)
+    response.request = PreparedRequest()
+    response.request.prepare(method='GET', url='http://api.test/orgs/?limit=0')
+    return response
+
+
+class TraceResponseTest(TestCase):
+    def setUp(self):
+        self.logger = MagicMock(spec=logging.Logger)
+
+    def test_nothing_logged_if_level_disabled(self):
+        self.logger.isEnabledFor.return_value = False
+        trace_response(self.logger, make_response())
+        self.assertFalse(self.logger.log.called)
+
+    def test_call_traced_without_body(self):
+        self.logger.isEnabledFor.return_value = True
+        trace_response(self.logger, make_response())
+        self.assertEquals(self.logger.log.call_count, 1)
+        trace = self.logger.log.call_args[1]['extra']
+        self.assertEquals(trace['api_method'], 'GET')
+        self.assertEquals(trace['api_path'], '/orgs/?limit=0')
+        self.assertEquals(trace['api_status'], 200)
+        self.assertEquals(trace['api_latency_ms'], 25)
+        self.assertEquals(trace['api_bytes'], 16)
+
+    @patch('libs.ocl.tracing.should_capture_body', return_value=True)
+    def test_sampled_body_logged(self, mock_should_capture_body):
+        self.logger.isEnabledFor.return_value = True
+        trace_response(self.logger, make_response())
+        self.assertEquals(self.logger.log.call_count, 2)
+        self.assertEquals(self.logger.log.call_args[0][4], '[{"id": "CIEL"}]')
+
+    def test_server_error_body_logged(self):
+        self.logger.isEnabledFor.side_effect = lambda level: level >= logging.ERROR
+        trace_response(self.logger, make_response(status_code=500, content='Oops'))
+        self.assertEquals(self.logger.log.call_count, 2)
+        self.assertEquals(self.logger.log.call_args[0][0], logging.ERROR)
@@ -374,6 +374,19 @@ _.CBO_CLICK = function (cbo) {
 	}
 }
 
+_.LOAD_LIST = function (cbo, url) {
+	var xhr = new XMLHttpRequest();
+	xhr.open("GET", url);
+	xhr.onload = function () {
+		if (xhr.status === 200) {
+			var list = JSON.parse(xhr.responseText);
+			cbo.maxItems = list.length;
+			cbo.list = list;
+		}
+	};
+	xhr.send();
+}
+
 
 _.DATA = function (item/*, input*/) { return item; };
 
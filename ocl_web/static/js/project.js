@@ -1393,25 +1393,16 @@ $.urlParam = function (name) {
     return results[1] || 0;
 };
 
-var httpURL = function (url) {
-    if (_.includes(window.location.protocol, 'https:'))
-        url = '//api.' + window.location.hostname.replace('www.', '');
-    return url;
-}
-
+// Formatted CSV of the current search or repository page, streamed by CsvExportView
 if ($('.download-csv').length > 0) {
     $('a.download-csv').on('click', function (el) {
         var downloadCaller = $('input#download-origin').val(),
             selectedTab = $('div.list-group a.active').text(),
-            user = $("meta[name='user']").attr('content'),
-            portInfo = ':8000',
-            exactMatch = $("input[name='exact_match']:checked").size() > 0,
-            url = '//' + window.location.hostname + portInfo;
-        url = httpURL(url);
+            exactMatch = $("input[name='exact_match']:checked").size() > 0;
 
         getQueryParams = function (extraParams) {
             extraParams = extraParams || '';
-            var mandatoryParams = "csv=true&user=" + user + extraParams,
+            var mandatoryParams = extraParams.replace(/^&/, ''),
                 paramsWithExistingSearchParams = window.location.search + "&" + mandatoryParams;
 
             return _.isEmpty(window.location.search) ? "?" + mandatoryParams : paramsWithExistingSearchParams;
@@ -1427,17 +1418,13 @@ if ($('.download-csv').length > 0) {
             },
 
             getURL = function () {
-                var exactMatchParam = exactMatch ? '&exact_match=on' : '';
-                if (downloadCaller) {
-                    var entity = getSearchEntity();
-
-                    return url + '/' + entity + '/' + getQueryParams("&type=" + entity + exactMatchParam);
-                } else {
-                    return url + window.location.pathname + getQueryParams("&type=repoSearch" + exactMatchParam);
-                }
+                var exactMatchParam = exactMatch ? '&exact_match=on' : '',
+                    path = downloadCaller ? '/' + getSearchEntity() + '/' : window.location.pathname;
+                return '/core/export/csv/' + getQueryParams("&path=" + encodeURIComponent(path) + exactMatchParam);
             };
 
-        fireDownload(getURL());
+        alertify.success('Preparing CSV...');
+        window.location.href = getURL();
     });
 }
 ;
@@ -1475,6 +1462,29 @@ $('#sourceVersion').change(function () {
     }
 });
 
+// Version dropdown: load the older versions a page at a time, see RepoVersionsJsonView
+$(document).on('click', 'li.repo-version-more a', function (ev) {
+    ev.preventDefault();
+    ev.stopPropagation();
+    var $more = $(this).closest('li'),
+        page = ($more.data('page') || 1) + 1;
+    $.getJSON($more.data('url'), {page: page}, function (data) {
+        _.each(data.items, function (version) {
+            var href = $more.data('version-url').replace(/\/VERSION\/([^\/]*\/)$/, '/' + version.id + '/$1');
+            if ($more.siblings().find('a[href="' + href + '"]').length > 0) return;
+            var $label = $('<span>').text(version.id);
+            if (version.retired) $label.addClass('repo-version-retired');
+            else if (version.released) $label.addClass('repo-version-released');
+            var $link = $('<a>').attr('href', href).append($label);
+            if (version.released && !version.retired) $link.append(' <span class="text-muted">(Released)</span>');
+            if (version.retired) $link.append(' <span class="text-muted">(Retired)</span>');
+            $('<li>').append($link).insertBefore($more);
+        });
+        $more.data('page', page);
+        if (!data.has_more) $more.remove();
+    });
+});
+
 $('#collection_add_reference_form > div > input').keypress(function (e) {
     if (e.which == 13) {
         e.preventDefault();
@@ -33,7 +33,9 @@ class UserDetailViewTest(TestCase):
         src = FakeResponse('src')
         col = FakeResponse('col')
 
-        mock_get.side_effect = [user, org, src, col]
+        # The user resources are fetched concurrently, so answer by resource rather than call order
+        responses = {(): user, ('orgs',): org, ('sources',): src, ('collections',): col}
+        mock_get.side_effect = lambda *args, **kwargs: responses[args[2:]]
 
         userDetailView = UserDetailView()
         userDetailView.object = ''
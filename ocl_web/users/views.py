@@ -51,10 +51,15 @@ class UserDetailView(LoginRequiredMixin, DetailView):
         # TODO(paynejd@gmail.com): Create page for each user resource list to handle > than limit
         limit = 20
 
-        ocl_user = api.get('users', username).json()
-        ocl_user_orgs = api.get('users', username, 'orgs', params={'limit':limit}).json()
-        ocl_user_sources = api.get('users', username, 'sources', params={'limit':limit}).json()
-        ocl_user_collections = api.get('users', username, 'collections', params={'limit':limit}).json()
+        # The user and their resource lists are independent, so fetch them concurrently
+        user_future = api.get_async('users', username)
+        orgs_future = api.get_async('users', username, 'orgs', params={'limit':limit})
+        sources_future = api.get_async('users', username, 'sources', params={'limit':limit})
+        collections_future = api.get_async('users', username, 'collections', params={'limit':limit})
+        ocl_user = user_future.result().json()
+        ocl_user_orgs = orgs_future.result().json()
+        ocl_user_sources = sources_future.result().json()
+        ocl_user_collections = collections_future.result().json()
 
         # Set the selected tab
         default_tab = 'repositories'
@@ -149,8 +154,7 @@ class UserJsonView(LoginRequiredMixin, View):
         if not request.user.is_staff:
             return HttpResponse(status=401)
         api = OclApi(self.request, debug=True)
-        result = api.get('users', params={'limit': '0'})
-        return HttpResponse(json.dumps(result.json()), content_type="application/json")
+        return api.get_proxy_response('users', params={'limit': '0'})
 
 
 class UserSourcesView(LoginRequiredMixin, View):
@@ -159,8 +163,7 @@ class UserSourcesView(LoginRequiredMixin, View):
         if not (request.user.is_staff or request.user.username == username):
             return HttpResponse(status=401)
         api = OclApi(self.request, debug=True)
-        result = api.get('users', username, "sources", params={'limit': '0'})
-        return HttpResponse(json.dumps(result.json()), content_type="application/json")
+        return api.get_proxy_response('users', username, "sources", params={'limit': '0'})
 
 class UserCollectionsView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
@@ -168,5 +171,4 @@ class UserCollectionsView(LoginRequiredMixin, View):
         if not (request.user.is_staff or request.user.username == username):
             return HttpResponse(status=401)
         api = OclApi(self.request, debug=True)
-        result = api.get('users', username, "collections", params={'limit': '0'})
-        return HttpResponse(json.dumps(result.json()), content_type="application/json")
+        return api.get_proxy_response('users', username, "collections", params={'limit': '0'})